@@ -0,0 +1,210 @@
+"""
+Benchmark das etapas do módulo de análise sobre dados OHLC sintéticos.
+
+Mede tempo (melhor de N execuções) e pico de memória (tracemalloc) de cada etapa
+em vários tamanhos de histórico, grava o resultado em JSON e compara com uma
+baseline salva: a execução falha (código 1) quando alguma etapa regride além do limite
+e (código 2) quando não há baseline ou nenhuma medição tem par na baseline.
+
+Uso:
+    python benchmarks/bench_analysis.py --save                # grava a baseline
+    python benchmarks/bench_analysis.py                       # compara com a baseline
+    python benchmarks/bench_analysis.py --sizes 1000 10000 --stages calculate_all_indicators
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import tracemalloc
+import importlib.util
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from src.data.synthetic import generate_ohlc
+from src.analysis.analysis import (
+    calculate_all_indicators,
+    classify_heuristic,
+    get_feature_importance,
+    analyze_market,
+)
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+
+# Execuções acima deste tempo não são repetidas (o ruído relativo já é pequeno)
+_SLOW_RUN_SECONDS = 2.0
+
+
+def _load_validate_data():
+    spec = importlib.util.spec_from_file_location(
+        "forex_scrapping", os.path.join(ROOT, "src", "data", "forex-scrapping.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.validate_data
+
+
+# Cada etapa recebe o OHLC bruto e o DataFrame com indicadores (calculado fora da medição).
+# As que treinam o Random Forest são limitadas por --max-model-bars. analyze_market é
+# medida como main.py a chama (indicators=[]: só os indicadores que a análise consome).
+STAGES = {
+    'calculate_all_indicators': (lambda raw, ind: calculate_all_indicators(raw), False),
+    'classify_heuristic': (lambda raw, ind: classify_heuristic(ind), False),
+    'get_feature_importance': (lambda raw, ind: get_feature_importance(ind), True),
+    'analyze_market': (lambda raw, ind: analyze_market(raw, indicators=[]), True),
+}
+
+
+def measure(func, repeat):
+    """Retorna (melhor tempo em segundos, pico de memória em MiB) de func()."""
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+        if best > _SLOW_RUN_SECONDS:
+            break
+    return best, peak / 2**20
+
+
+def run(sizes, stages, repeat, max_model_bars, seed):
+    """Executa as etapas pedidas e retorna {etapa: {candles: resultado}}."""
+    validate_data = _load_validate_data()
+    results = {stage: {} for stage in stages}
+
+    for n_bars in sizes:
+        raw = generate_ohlc(n_bars, seed=seed)
+        if len(validate_data(raw)) != n_bars:
+            raise RuntimeError(f"Dados sintéticos com {n_bars} candles não passaram em validate_data")
+        indicators = calculate_all_indicators(raw)
+
+        for stage in stages:
+            func, trains_model = STAGES[stage]
+            if trains_model and n_bars > max_model_bars:
+                results[stage][str(n_bars)] = {'skipped': f'acima de --max-model-bars ({max_model_bars})'}
+                print(f"{stage:>26} {n_bars:>10,}        (ignorado)")
+                continue
+            seconds, peak_mib = measure(lambda: func(raw, indicators), repeat)
+            results[stage][str(n_bars)] = {'seconds': seconds, 'peak_mib': peak_mib}
+            print(f"{stage:>26} {n_bars:>10,} {seconds:>10.4f}s {peak_mib:>10.1f} MiB")
+    return results
+
+
+def compare(results, baseline, threshold, memory_threshold, min_seconds):
+    """
+    Compara com a baseline.
+
+    Returns:
+        tuple: (regressões encontradas, como strings legíveis;
+                medições sem par na baseline, como 'etapa @ candles')
+    """
+    regressions = []
+    uncovered = []
+    for stage, by_size in results.items():
+        for size, current in by_size.items():
+            if 'seconds' not in current:
+                continue
+            previous = baseline.get('results', {}).get(stage, {}).get(size)
+            if not previous or 'seconds' not in previous:
+                uncovered.append(f"{stage} @ {size}")
+                continue
+            if current['seconds'] > min_seconds and current['seconds'] > previous['seconds'] * (1 + threshold):
+                regressions.append(
+                    f"{stage} @ {size}: tempo {previous['seconds']:.4f}s -> {current['seconds']:.4f}s "
+                    f"(+{current['seconds'] / previous['seconds'] - 1:.0%})"
+                )
+            if current['peak_mib'] > previous['peak_mib'] * (1 + memory_threshold):
+                regressions.append(
+                    f"{stage} @ {size}: memória {previous['peak_mib']:.1f} -> {current['peak_mib']:.1f} MiB "
+                    f"(+{current['peak_mib'] / previous['peak_mib'] - 1:.0%})"
+                )
+    return regressions, uncovered
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-model-bars', type=int, default=100_000,
+                        help='Maior histórico usado nas etapas que treinam o Random Forest')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save', action='store_true', help='Grava o resultado como nova baseline')
+    parser.add_argument('--output', help='Arquivo JSON para gravar o resultado desta execução')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Aumento relativo de tempo tolerado (0.25 = 25%%)')
+    parser.add_argument('--memory-threshold', type=float, default=0.25,
+                        help='Aumento relativo de pico de memória tolerado')
+    parser.add_argument('--min-seconds', type=float, default=0.01,
+                        help='Tempos abaixo deste valor não contam como regressão (ruído)')
+    args = parser.parse_args()
+
+    # Sem baseline não há o que comparar: falha antes de medir, para o gate não passar vazio
+    if not args.save and not os.path.exists(args.baseline):
+        print(f"Baseline não encontrada em {args.baseline}; use --save para criá-la", file=sys.stderr)
+        return 2
+
+    # validate_data só registra outliers (não remove); o aviso não interessa aqui
+    logging.basicConfig(level=logging.ERROR)
+
+    results = run(args.sizes, args.stages, args.repeat, args.max_model_bars, args.seed)
+    report = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.platform(),
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline gravada em {args.baseline}")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+
+    regressions, uncovered = compare(results, baseline, args.threshold, args.memory_threshold, args.min_seconds)
+    if uncovered:
+        print(f"\nMedições sem par na baseline (não comparadas): {', '.join(uncovered)}")
+    compared = sum('seconds' in current for by_size in results.values() for current in by_size.values())
+    if compared == len(uncovered):
+        print(f"\nNenhuma medição pôde ser comparada com {args.baseline}", file=sys.stderr)
+        return 2
+
+    if regressions:
+        print("\nRegressões em relação à baseline:")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+
+    print("\nNenhuma regressão em relação à baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
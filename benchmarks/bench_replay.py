@@ -0,0 +1,113 @@
+"""
+Teste de carga do pipeline com candles reproduzidos localmente (sem rede).
+
+Reproduz um histórico gravado ou sintético (src/data/replay.py) no ritmo original
+multiplicado por --speed e, a cada candle, executa a análise técnica e a geração
+do insight, medindo vazão e latência (da chegada do candle ao fim do processamento).
+
+Uso:
+    python benchmarks/bench_replay.py --speed 0 --events 200              # vazão máxima
+    python benchmarks/bench_replay.py --interval 1m --speed 600 --mode bursty
+    python benchmarks/bench_replay.py --path .cache/history --pairs BRL=X EURBRL=X
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import importlib.util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from src.data.replay import ReplayFeed, REPLAY_MODES, load_recording, synthetic_recording, run_load_test
+from src.data.synthetic import INTERVAL_FREQS
+from src.analysis.analysis import analyze_market, EXPLAIN_MODES
+from src.agent.agent import generate_insight
+
+
+def _load_news():
+    spec = importlib.util.spec_from_file_location(
+        "news_scrapping", os.path.join(ROOT, "src", "news", "news-scrapping.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.fetch_news_with_llm
+
+
+def make_handler(explain_mode, llm_provider, news_list):
+    """Pipeline executado a cada candle: análise técnica e insight, com o tempo de cada etapa."""
+    def handler(pair, history):
+        start = time.perf_counter()
+        analysis = analyze_market(history, explain_mode=explain_mode)
+        analyzed = time.perf_counter()
+        generate_insight(
+            classification={
+                'classification': analysis['classification'],
+                'confidence': analysis['confidence'],
+                'explanation': analysis['explanation']
+            },
+            indicators_summary=analysis['indicators_summary'],
+            news_list=news_list,
+            llm_provider=llm_provider
+        )
+        return {'analysis': analyzed - start, 'insight': time.perf_counter() - analyzed}
+    return handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--path', help='Arquivo ou diretório gravado (padrão: histórico sintético)')
+    parser.add_argument('--pairs', nargs='+',
+                        help='Pares sintéticos (padrão: BRL=X), ou filtro dos pares gravados')
+    parser.add_argument('--bars', type=int, default=2000, help='Candles sintéticos por par')
+    parser.add_argument('--interval', choices=list(INTERVAL_FREQS), default='1d')
+    parser.add_argument('--speed', type=float, default=0.0,
+                        help='Multiplicador do ritmo original (0 = sem espera entre candles)')
+    parser.add_argument('--mode', choices=REPLAY_MODES, default='steady')
+    parser.add_argument('--burst-size', type=int, default=10)
+    parser.add_argument('--warmup-bars', type=int, default=300)
+    parser.add_argument('--events', type=int, default=200, help='Candles processados (0 = todos)')
+    parser.add_argument('--explain-mode', choices=EXPLAIN_MODES, default='rules')
+    parser.add_argument('--llm-provider', default='fallback',
+                        help="Provedor do insight ('fallback' roda sem rede)")
+    parser.add_argument('--output', help='Arquivo JSON para gravar o resultado')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+
+    if args.path:
+        recordings = load_recording(args.path)
+        if args.pairs:
+            recordings = {pair: df for pair, df in recordings.items() if pair in args.pairs}
+    else:
+        recordings = synthetic_recording(args.pairs or ['BRL=X'], n_bars=args.bars, interval=args.interval)
+
+    feed = ReplayFeed(recordings, speed=args.speed or None, mode=args.mode,
+                      burst_size=args.burst_size, warmup_bars=args.warmup_bars)
+    news_list = _load_news()(currency_pair="BRL/USD", days=7, llm_provider=args.llm_provider)
+    handler = make_handler(args.explain_mode, args.llm_provider, news_list)
+
+    result = run_load_test(feed, handler, max_events=args.events or None)
+
+    print(f"Pares: {', '.join(recordings)} | modo {args.mode} | velocidade {args.speed or 'máxima'}")
+    print(f"Candles processados: {result['events']} em {result['elapsed_seconds']:.2f}s")
+    if result['arrival_rate']:
+        print(f"Chegada: {result['arrival_rate']:.2f} candles/s")
+    print(f"Vazão:   {result['throughput']:.2f} candles/s")
+    latency = result['latency']
+    print(f"Latência (s): média {latency['mean']:.4f} | p50 {latency['p50']:.4f} | "
+          f"p95 {latency['p95']:.4f} | p99 {latency['p99']:.4f} | máx {latency['max']:.4f}")
+    for stage, stats in result['stages'].items():
+        print(f"  {stage:>9}: média {stats['mean']:.4f}s | p95 {stats['p95']:.4f}s")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
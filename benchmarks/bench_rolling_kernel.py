@@ -0,0 +1,76 @@
+"""
+Benchmark do kernel de momentos móveis contra as chamadas rolling do pandas.
+
+Compara, para o mesmo conjunto de indicadores (SMA 20/50/200, Bandas de Bollinger,
+volatilidade e suporte/resistência), o caminho anterior com uma chamada rolling por
+indicador e o caminho atual via src/analysis/kernels.py.
+
+Uso:
+    python benchmarks/bench_rolling_kernel.py [--sizes 100000 1000000] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.synthetic import generate_ohlc
+from src.analysis.analysis import calculate_volatility, calculate_support_resistance
+from src.analysis.kernels import rolling_moments, moments_to_mean, moments_to_std
+
+
+def pandas_rolling(df):
+    """Caminho anterior: uma passada rolling do pandas por indicador (como antes em calculate_all_indicators)."""
+    close = df['Close']
+    out = {period: close.rolling(window=period).mean() for period in (20, 50, 200)}
+    sma = close.rolling(window=20).mean()
+    std = close.rolling(window=20).std()
+    out['bb'] = (sma + std * 2, sma - std * 2)
+    out['vol'] = close.pct_change().rolling(window=20).std() * np.sqrt(252) * 100
+    out['sr'] = (df['Low'].rolling(window=20, center=True).min(),
+                 df['High'].rolling(window=20, center=True).max())
+    return out
+
+
+def kernel(df):
+    """Caminho atual: uma chamada do kernel para SMA 20/50/200 e Bollinger, como em calculate_all_indicators."""
+    close = df['Close']
+    moments = rolling_moments(close, [20, 50, 200], stats=('sum', 'sumsq'))
+    out = {period: pd.Series(moments_to_mean(moments, period), index=close.index) for period in (20, 50, 200)}
+    std = pd.Series(moments_to_std(moments, 20), index=close.index)
+    out['bb'] = (out[20] + std * 2, out[20] - std * 2)
+    out['vol'] = calculate_volatility(df, 20)
+    out['sr'] = calculate_support_resistance(df, 20)
+    return out
+
+
+def _best_time(func, df, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'candles':>12} {'pandas (s)':>12} {'kernel (s)':>12} {'ganho':>8}")
+    for n_bars in args.sizes:
+        df = generate_ohlc(n_bars)
+        t_pandas = _best_time(pandas_rolling, df, args.repeat)
+        t_kernel = _best_time(kernel, df, args.repeat)
+        print(f"{n_bars:>12,} {t_pandas:>12.4f} {t_kernel:>12.4f} {t_pandas / t_kernel:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
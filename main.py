@@ -5,7 +5,10 @@ Combina análise técnica com notícias para gerar insights contextualizados.
 
 import sys
 import os
+import time
 import logging
+import threading
+from concurrent.futures import Future, CancelledError, TimeoutError as FutureTimeoutError
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -20,14 +23,18 @@ forex_module = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(forex_module)
 fetch_forex_data = forex_module.fetch_forex_data
 
+from src.data.ohlc_cache import OHLCCache
 from src.analysis.analysis import analyze_market
+from src.analysis.model_cache import ExplainabilityModelCache
 
 spec = importlib.util.spec_from_file_location("news_scrapping", os.path.join(os.path.dirname(__file__), "src", "news", "news-scrapping.py"))
 news_module = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(news_module)
 fetch_news_with_llm = news_module.fetch_news_with_llm
 
-from src.agent.agent import generate_insight
+from src.news.news_cache import NewsCache
+
+from src.agent.agent import generate_insight, InsightStream
 
 logging.basicConfig(
     level=logging.INFO,
@@ -105,6 +112,176 @@ def save_analysis_to_file(analysis: dict, insight: str, output_dir: str = "outpu
         raise
 
 
+PIPELINE_MODES = ('concurrent', 'sequential')
+
+
+def _start_stage(name, stage, timings, *args):
+    """
+    Executa uma etapa em uma thread daemon e devolve o Future do resultado.
+
+    A thread é daemon para que uma etapa abandonada por timeout (ex.: uma chamada
+    ao LLM que não responde) não impeça o processo de terminar.
+    """
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        started = time.perf_counter()
+        try:
+            result = stage(*args)
+        except BaseException as e:
+            timings.setdefault(name, time.perf_counter() - started)
+            future.set_exception(e)
+            return
+        # O tempo é registrado antes de liberar quem aguarda o resultado
+        timings.setdefault(name, time.perf_counter() - started)
+        future.set_result(result)
+
+    threading.Thread(target=run, name=f"stage-{name}", daemon=True).start()
+    return future
+
+
+def _analyze(forex_data, model_cache, pair):
+    """Análise técnica com as opções do ambiente."""
+    return analyze_market(
+        forex_data,
+        model_cache=model_cache,
+        explain_mode=os.getenv("EXPLAIN_MODE", "model"),
+        time_budget=float(os.getenv("EXPLAIN_TIME_BUDGET", "2.0")),
+        pair=pair,
+        # Só os indicadores que a análise consome (latest_data não é usado aqui)
+        indicators=[]
+    )
+
+
+def _replay_stage(cancel):
+    """
+    Etapas 1 e 2 com candles gravados ou sintéticos, sem rede (src/data/replay.py).
+
+    Um único feed é reproduzido no ritmo configurado (velocidade, rajadas, vários
+    pares) e a análise técnica roda a cada candle, com vazão e latência medidas por
+    run_load_test. Seguem para o restante do pipeline o histórico do primeiro par e
+    a análise do último candle dele.
+    """
+    from src.data.replay import ReplayFeed, run_load_test
+
+    feed = ReplayFeed.from_env()
+    model_cache = ExplainabilityModelCache()
+    latest = {}
+
+    def handler(pair, history):
+        if cancel.is_set():
+            raise CancelledError("Análise técnica cancelada")
+        started = time.perf_counter()
+        latest[pair] = _analyze(history, model_cache, pair)
+        return {'analysis': time.perf_counter() - started}
+
+    logger.info(f"Etapa 2/4: Reproduzindo {', '.join(feed.pairs)} com análise técnica a cada candle...")
+    run_load_test(feed, handler, max_events=int(os.getenv("FOREX_REPLAY_EVENTS", "100")) or None)
+
+    pair = feed.pairs[0]
+    forex_data = feed.history(pair)
+    if pair not in latest:
+        latest[pair] = _analyze(forex_data, model_cache, pair)
+    return forex_data, latest[pair]
+
+
+def _market_stage(cancel):
+    """Etapas 1 e 2: busca dos candles e análise técnica."""
+    logger.info("Etapa 1/4: Buscando dados históricos de BRL/USD...")
+    if os.getenv("FOREX_DATA_SOURCE", "yahoo") == "replay":
+        return _replay_stage(cancel)
+
+    forex_data = fetch_forex_data(
+        years=5,
+        interval=os.getenv("FOREX_INTERVAL", "1d"),
+        cache=OHLCCache(),
+        force_refresh=os.getenv("FOREX_FORCE_REFRESH", "false").lower() == "true"
+    )
+    if cancel.is_set():
+        raise CancelledError("Análise técnica cancelada")
+    
+    logger.info("Etapa 2/4: Executando análise técnica...")
+    return forex_data, _analyze(forex_data, ExplainabilityModelCache(), "BRL/USD")
+
+
+def _news_stage(llm_provider, news_cache, cancel=None, deadline=None):
+    """
+    Etapa 3: notícias recentes (independente da análise técnica).
+
+    A busca no LLM desiste em deadline (time.monotonic), e cancel interrompe a
+    etapa antes da busca: assim a thread não segue trabalhando depois que
+    run_stages deixou de esperar por ela.
+    """
+    if cancel is not None and cancel.is_set():
+        raise CancelledError("Coleta de notícias cancelada")
+    logger.info("Etapa 3/4: Buscando notícias recentes...")
+    return fetch_news_with_llm(
+        currency_pair="BRL/USD",
+        days=7,
+        llm_provider=llm_provider,
+        cache=news_cache,
+        deadline=deadline
+    )
+
+
+def run_stages(llm_provider, news_cache, mode='concurrent', market_timeout=None, news_timeout=None):
+    """
+    Executa a análise técnica (candles + análise) e a coleta de notícias.
+
+    - concurrent: as duas etapas rodam em paralelo, cada uma com seu timeout
+      contado a partir do início. A busca de notícias recebe o próprio timeout
+      como prazo (a chamada ao LLM desiste junto com a espera); estourado, a
+      execução segue com as notícias do fallback. Se a análise estourar ou
+      falhar, a etapa de notícias é cancelada (antes de começar a busca, ou no
+      prazo dela) e o erro é propagado.
+    - sequential: uma etapa após a outra, sem timeout (comportamento anterior).
+
+    Returns:
+        tuple: (forex_data, analysis, news_list, {etapa: segundos})
+    """
+    if mode not in PIPELINE_MODES:
+        raise ValueError(f"Modo de pipeline inválido: {mode}. Use um de {PIPELINE_MODES}")
+
+    timings = {}
+    cancel = threading.Event()
+
+    if mode == 'sequential':
+        started = time.perf_counter()
+        forex_data, analysis = _market_stage(cancel)
+        timings['market'] = time.perf_counter() - started
+        started = time.perf_counter()
+        news_list = _news_stage(llm_provider, news_cache)
+        timings['news'] = time.perf_counter() - started
+        return forex_data, analysis, news_list, timings
+
+    started = time.perf_counter()
+    news_deadline = None if news_timeout is None else time.monotonic() + news_timeout
+    news_future = _start_stage('news', _news_stage, timings, llm_provider, news_cache, cancel, news_deadline)
+    market_future = _start_stage('market', _market_stage, timings, cancel)
+
+    def remaining(timeout):
+        return None if timeout is None else max(0.0, started + timeout - time.perf_counter())
+
+    try:
+        forex_data, analysis = market_future.result(timeout=remaining(market_timeout))
+    except FutureTimeoutError:
+        cancel.set()
+        raise TimeoutError(f"Análise técnica excedeu {market_timeout:g}s")
+    except BaseException:
+        cancel.set()
+        raise
+
+    try:
+        news_list = news_future.result(timeout=remaining(news_timeout))
+    except FutureTimeoutError:
+        logger.warning(f"Coleta de notícias excedeu {news_timeout:g}s; seguindo com o fallback")
+        timings['news'] = time.perf_counter() - started
+        news_list = news_module._fetch_news_fallback("BRL/USD", 7)
+    return forex_data, analysis, news_list, timings
+
+
 def main():
     """Função principal que orquestra todo o pipeline."""
     
@@ -114,26 +291,7 @@ def main():
     print()
     
     try:
-        # 1. Buscar dados OHLC
-        logger.info("Etapa 1/4: Buscando dados históricos de BRL/USD...")
-        print("Buscando dados históricos...")
-        forex_data = fetch_forex_data(years=5)
-        print(f"✓ Dados coletados: {len(forex_data)} registros")
-        print(f"  Período: {forex_data['Date'].min().date()} até {forex_data['Date'].max().date()}")
-        print()
-        
-        # 2. Executar análise técnica e classificação
-        logger.info("Etapa 2/4: Executando análise técnica...")
-        print("Analisando indicadores técnicos...")
-        analysis = analyze_market(forex_data)
-        print(f"✓ Classificação: {analysis['classification']}")
-        print(f"  Confiança: {analysis['confidence']:.1%}")
-        print(f"  Explicação: {analysis['explanation']}")
-        print()
-        
-        # 3. Buscar notícias recentes
-        logger.info("Etapa 3/4: Buscando notícias recentes...")
-        print("Buscando contexto de notícias...")
+        started = time.perf_counter()
         
         # Determinar provedor de LLM
         llm_provider = os.getenv("LLM_PROVIDER", "gemini")
@@ -141,11 +299,26 @@ def main():
             logger.warning("GOOGLE_API_KEY não encontrada. Usando fallback para notícias.")
             llm_provider = "fallback"
         
-        news_list = fetch_news_with_llm(
-            currency_pair="BRL/USD",
-            days=7,
-            llm_provider=llm_provider
+        # 1-3. Dados OHLC + análise técnica em paralelo com as notícias
+        mode = os.getenv("PIPELINE_MODE", "concurrent")
+        print("Buscando dados históricos e contexto de notícias"
+              + (" em paralelo..." if mode == 'concurrent' else "..."))
+        news_cache = NewsCache()
+        market_timeout = float(os.getenv("MARKET_STAGE_TIMEOUT", "300"))
+        news_timeout = float(os.getenv("NEWS_STAGE_TIMEOUT", "60"))
+        forex_data, analysis, news_list, timings = run_stages(
+            llm_provider,
+            news_cache,
+            mode=mode,
+            market_timeout=market_timeout or None,
+            news_timeout=news_timeout or None
         )
+        
+        print(f"✓ Dados coletados: {len(forex_data)} registros")
+        print(f"  Período: {forex_data['Date'].min().date()} até {forex_data['Date'].max().date()}")
+        print(f"✓ Classificação: {analysis['classification']}")
+        print(f"  Confiança: {analysis['confidence']:.1%}")
+        print(f"  Explicação: {analysis['explanation']}")
         print(f"✓ Notícias coletadas: {len(news_list)} itens")
         for i, news in enumerate(news_list[:3], 1):
             print(f"  {i}. {news.get('title', 'Sem título')}")
@@ -156,16 +329,35 @@ def main():
         print("Gerando insight contextualizado...")
         
         # Usar mesmo provedor de LLM para insights
-        insight = generate_insight(
-            classification={
-                'classification': analysis['classification'],
-                'confidence': analysis['confidence'],
-                'explanation': analysis['explanation']
-            },
-            indicators_summary=analysis['indicators_summary'],
-            news_list=news_list,
-            llm_provider=llm_provider if llm_provider != "fallback" else "fallback"
-        )
+        insight_started = time.perf_counter()
+        insight_classification = {
+            'classification': analysis['classification'],
+            'confidence': analysis['confidence'],
+            'explanation': analysis['explanation']
+        }
+        if os.getenv("INSIGHT_STREAMING", "false").lower() == "true":
+            # Trechos exibidos à medida que o LLM responde, já filtrados
+            stream = InsightStream(
+                insight_classification,
+                analysis['indicators_summary'],
+                news_list,
+                llm_provider=llm_provider if llm_provider != "fallback" else "fallback"
+            )
+            print("   ", end="", flush=True)
+            for chunk in stream:
+                print(chunk, end="", flush=True)
+            print()
+            insight = stream.insight
+            timings['insight_ttft'] = stream.ttft
+        else:
+            insight = generate_insight(
+                classification=insight_classification,
+                indicators_summary=analysis['indicators_summary'],
+                news_list=news_list,
+                llm_provider=llm_provider if llm_provider != "fallback" else "fallback"
+            )
+        timings['insight'] = time.perf_counter() - insight_started
+        timings['total'] = time.perf_counter() - started
         print("Insight gerado")
         print()
         
@@ -195,6 +387,20 @@ def main():
         print(f"   {insight}")
         print()
         
+        print("TEMPOS")
+        print(f"   Dados + análise técnica: {timings['market']:.2f}s")
+        print(f"   Notícias: {timings['news']:.2f}s")
+        print(f"   Insight: {timings['insight']:.2f}s"
+              + (f" (primeiro trecho em {timings['insight_ttft']:.2f}s)" if timings.get('insight_ttft') is not None else ""))
+        if mode == 'concurrent':
+            # Soma dos tempos medidos em paralelo: estimativa, não uma execução sequencial
+            stages_sum = timings['market'] + timings['news'] + timings['insight']
+            print(f"   Total: {timings['total']:.2f}s (concurrent; soma das etapas: {stages_sum:.2f}s, "
+                  f"estimativa do modo sequential)")
+        else:
+            print(f"   Total: {timings['total']:.2f}s (sequential)")
+        print()
+        
         print("=" * 60)
         print(f"Análise concluída em {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("=" * 60)
@@ -209,13 +415,18 @@ def main():
             logger.error(f"Erro ao salvar arquivo: {str(e)}")
             print(f"\nAviso: Não foi possível salvar o arquivo: {str(e)}")
         
+        # Atualização das notícias em segundo plano (entrada vencida servida do cache)
+        if not news_cache.wait(timeout=float(os.getenv("NEWS_CACHE_WAIT", "30"))):
+            logger.warning("Atualização do cache de notícias não terminou; ficará para a próxima execução")
+        
         return {
             'classification': analysis['classification'],
             'confidence': analysis['confidence'],
             'insight': insight,
             'indicators': analysis['indicators_summary'],
             'news_count': len(news_list),
-            'filepath': filepath
+            'filepath': filepath,
+            'timings': timings
         }
     
     except KeyboardInterrupt:
@@ -4,26 +4,32 @@ Combina análise técnica com notícias para criar insights informativos.
 """
 
 import os
-import re
+import time
+import asyncio
 import logging
 from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
-# Palavras proibidas que indicam recomendações explícitas
-FORBIDDEN_WORDS = [
-    'compre agora', 'venda agora', 'compre', 'venda', 'invista', 'não invista',
-    'é o momento de comprar', 'é o momento de vender', 'deve comprar', 'deve vender',
-    'recomendo comprar', 'recomendo vender', 'sugiro comprar', 'sugiro vender',
-    'buy now', 'sell now', 'you should buy', 'you should sell', 'invest now'
-]
+# Palavras proibidas e padrões de recomendação: listas por idioma em src/agent/compliance.py
+
+SYSTEM_INSTRUCTION = "Você é um analista financeiro que fornece informações contextuais sobre câmbio, sem fazer recomendações de investimento."
+
+# Limites padrão de agenerate_insights: chamadas simultâneas ao LLM e taxa de
+# requisições por segundo (0 = sem limite de taxa)
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_RATE_LIMIT = 0.0
+
+# Tamanho mínimo do insight; abaixo dele a validação final usa o fallback
+MIN_INSIGHT_LENGTH = 50
 
 
 def generate_insight(
     classification: Dict,
     indicators_summary: Dict,
     news_list: List[Dict],
-    llm_provider: str = "gemini"
+    llm_provider: str = "gemini",
+    on_token=None
 ) -> str:
     """
     Gera insight contextualizado combinando análise técnica e notícias.
@@ -33,11 +39,19 @@ def generate_insight(
         indicators_summary: Dicionário com resumo dos indicadores
         news_list: Lista de notícias recentes
         llm_provider: Provedor de LLM a usar ('gemini', 'openai', 'anthropic', 'ollama')
+        on_token: Callback opcional; com ele, o insight é transmitido (InsightStream) e
+            on_token recebe cada trecho já filtrado assim que é liberado
     
     Returns:
         str: Insight
     """
     try:
+        if on_token is not None:
+            stream = InsightStream(classification, indicators_summary, news_list, llm_provider)
+            for chunk in stream:
+                on_token(chunk)
+            return stream.insight
+        
         prompt = _build_prompt(classification, indicators_summary, news_list)
         
         if llm_provider == "gemini":
@@ -51,20 +65,192 @@ def generate_insight(
             logger.warning(f"Provedor {llm_provider} não suportado. Usando fallback.")
             insight = _generate_fallback(classification, indicators_summary, news_list)
         
-        insight = _validate_insight(insight)
-        
-        if len(insight) < 50:
-            logger.warning(f"Insight final muito curto ({len(insight)} caracteres). Usando fallback.")
-            insight = _generate_fallback(classification, indicators_summary, news_list)
-        
-        logger.debug(f"Insight final validado: {len(insight)} caracteres")
-        return insight
+        return _finalize_insight(insight, classification, indicators_summary, news_list)
     
     except Exception as e:
         logger.error(f"Erro ao gerar insight: {str(e)}", exc_info=True)
         return _generate_fallback(classification, indicators_summary, news_list)
 
 
+async def agenerate_insights(
+    requests: List[Dict],
+    llm_provider: str = "gemini",
+    max_concurrency: Optional[int] = None,
+    rate_limit: Optional[float] = None,
+    burst: Optional[int] = None,
+    registry=None
+) -> List[str]:
+    """
+    Gera vários insights em paralelo com chamadas assíncronas ao LLM.
+    
+    Cada pedido segue o mesmo caminho de generate_insight (prompt, validação e
+    fallback), de forma independente: a falha de um item gera o fallback só dele.
+    
+    Args:
+        requests: Lista de pedidos, cada um com 'classification', 'indicators_summary'
+            e 'news_list' (argumentos de generate_insight)
+        llm_provider: Provedor de LLM ('gemini'; outros usam o fallback)
+        max_concurrency: Máximo de chamadas simultâneas ao LLM (padrão: LLM_MAX_CONCURRENCY ou 8)
+        rate_limit: Requisições por segundo, via token bucket (padrão: LLM_RATE_LIMIT; 0 = sem limite)
+        burst: Requisições acumuláveis acima da taxa (padrão: LLM_RATE_BURST ou a própria taxa)
+        registry: LLMClientRegistry (padrão: o compartilhado; com
+            factory=lambda *args: FakeChatModel() roda sem rede)
+    
+    Returns:
+        List[str]: Insights, na ordem dos pedidos
+    """
+    from src.agent.llm_clients import get_registry, TokenBucket
+    
+    registry = registry or get_registry()
+    max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+    rate_limit = float(rate_limit if rate_limit is not None else os.getenv("LLM_RATE_LIMIT", DEFAULT_RATE_LIMIT))
+    burst = burst or int(os.getenv("LLM_RATE_BURST", 0)) or None
+    semaphore = asyncio.Semaphore(max_concurrency)
+    bucket = TokenBucket(rate_limit, burst) if rate_limit > 0 else None
+    
+    async def generate(request):
+        classification = request['classification']
+        indicators_summary = request['indicators_summary']
+        news_list = request['news_list']
+        try:
+            if llm_provider != "gemini":
+                insight = _generate_fallback(classification, indicators_summary, news_list)
+            else:
+                prompt = _build_prompt(classification, indicators_summary, news_list)
+                async with semaphore:
+                    if bucket is not None:
+                        await bucket.acquire()
+                    response, route = await registry.ainvoke(
+                        prompt,
+                        system=SYSTEM_INSTRUCTION,
+                        temperature=0.7,
+                        max_output_tokens=2500,
+                    )
+                logger.debug(f"Insight gerado pelo modelo {route}")
+                insight = _response_text(response)
+            return _finalize_insight(insight, classification, indicators_summary, news_list)
+        except Exception as e:
+            logger.warning(f"Erro ao gerar insight: {str(e)}. Usando fallback.")
+            return _generate_fallback(classification, indicators_summary, news_list)
+    
+    return await asyncio.gather(*(generate(request) for request in requests))
+
+
+class InsightStream:
+    """
+    Insight transmitido à medida que o LLM gera o texto.
+    
+    Iterar produz os trechos já filtrados (StreamingComplianceFilter de
+    src/agent/compliance.py). Nada é liberado antes de o texto atingir
+    MIN_INSIGHT_LENGTH caracteres, então um texto que a validação final trocaria
+    pelo fallback nunca chega a ser exibido: nesse caso só o fallback é produzido.
+    Ao final, o texto passa pela mesma validação de generate_insight; se ela só
+    completar o texto (ex.: pontuação final), o complemento é o último trecho.
+    Concatenados, os trechos são iguais ao que generate_insight devolveria para a
+    mesma resposta. Depois da iteração:
+    
+    - insight: texto final validado (o mesmo que generate_insight devolveria)
+    - ttft: segundos até o primeiro trecho liberado
+    - total_seconds: duração total
+    """
+    
+    def __init__(self, classification: Dict, indicators_summary: Dict, news_list: List[Dict],
+                 llm_provider: str = "gemini", registry=None):
+        self.classification = classification
+        self.indicators_summary = indicators_summary
+        self.news_list = news_list
+        self.llm_provider = llm_provider
+        self.registry = registry
+        self.insight = None
+        self.ttft = None
+        self.total_seconds = None
+    
+    def _llm_chunks(self):
+        from src.agent.llm_clients import get_registry
+        
+        if self.llm_provider != "gemini":
+            logger.warning(f"Provedor {self.llm_provider} não suportado. Usando fallback.")
+            return
+        if not os.getenv("GOOGLE_API_KEY"):
+            logger.error("Erro de configuração: GOOGLE_API_KEY não encontrada. Configure a variável de ambiente GOOGLE_API_KEY no arquivo .env")
+            return
+        prompt = _build_prompt(self.classification, self.indicators_summary, self.news_list)
+        yield from (self.registry or get_registry()).stream(
+            prompt,
+            system=SYSTEM_INSTRUCTION,
+            temperature=0.7,
+            max_output_tokens=2500,
+        )
+    
+    def __iter__(self):
+        from src.agent.compliance import StreamingComplianceFilter
+        
+        started = time.perf_counter()
+        compliance = StreamingComplianceFilter()
+        raw, held, emitted = [], "", ""
+        
+        def release(text):
+            nonlocal emitted
+            if not emitted:
+                text = text.lstrip()
+            if text:
+                if self.ttft is None:
+                    self.ttft = time.perf_counter() - started
+                emitted += text
+            return text
+        
+        try:
+            for chunk in self._llm_chunks():
+                raw.append(chunk)
+                held += compliance.feed(chunk)
+                # Texto (bruto ou filtrado) abaixo do mínimo ainda pode virar fallback
+                if not emitted and min(len("".join(raw).strip()), len(held.strip())) < MIN_INSIGHT_LENGTH:
+                    continue
+                text = release(held)
+                held = ""
+                if text:
+                    yield text
+        except Exception as e:
+            logger.warning(f"Erro no streaming do insight: {str(e)}. Finalizando com o texto recebido.")
+        
+        # O que ainda estava segurado sai no último trecho, já validado
+        text = "".join(raw)
+        if not text.strip():
+            # Mesmo caminho de generate_insight quando o LLM não responde
+            text = _generate_fallback(self.classification, self.indicators_summary, self.news_list)
+        self.insight = _finalize_insight(text, self.classification, self.indicators_summary, self.news_list)
+        
+        shown = emitted.rstrip()
+        if self.insight.startswith(emitted):
+            tail = self.insight[len(emitted):]
+        elif shown and self.insight.startswith(shown):
+            tail = self.insight[len(shown):]
+        else:
+            if emitted:
+                logger.warning("Insight transmitido reprovado na validação final; enviando o fallback.")
+            tail = ("\n\n" if emitted else "") + self.insight
+        if tail.strip():
+            release(tail)
+            yield tail
+        
+        self.total_seconds = time.perf_counter() - started
+        logger.info(
+            f"Insight transmitido: primeiro trecho em {self.ttft:.2f}s, total em {self.total_seconds:.2f}s"
+        )
+
+
+def _finalize_insight(insight: str, classification: Dict, indicators_summary: Dict, news_list: List[Dict]) -> str:
+    """Valida o insight e recorre ao fallback se ele ficar curto demais."""
+    insight = _validate_insight(insight)
+    
+    if len(insight) < MIN_INSIGHT_LENGTH:
+        logger.warning(f"Insight final muito curto ({len(insight)} caracteres). Usando fallback.")
+        insight = _generate_fallback(classification, indicators_summary, news_list)
+    
+    logger.debug(f"Insight final validado: {len(insight)} caracteres")
+    return insight
+
+
 def _build_prompt(classification: Dict, indicators_summary: Dict, news_list: List[Dict]) -> str:
     """Constrói prompt estruturado para o LLM."""
     
@@ -120,116 +306,22 @@ def _generate_with_gemini(prompt: str) -> str:
         str: Insight gerado pelo Gemini
     """
     try:
-        from langchain_google_genai import ChatGoogleGenerativeAI
-        from langchain_core.prompts import ChatPromptTemplate
+        from src.agent.llm_clients import get_registry
         
         api_key = os.getenv("GOOGLE_API_KEY")
         if not api_key:
             raise ValueError("GOOGLE_API_KEY não encontrada. Configure a variável de ambiente GOOGLE_API_KEY no arquivo .env")
         
-        model_name = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
-        
-        system_instruction_text = "Você é um analista financeiro que fornece informações contextuais sobre câmbio, sem fazer recomendações de investimento."
+        # Clientes reutilizados entre chamadas; modelos que falharam recentemente são pulados
+        response, route = get_registry().invoke(
+            prompt,
+            system=SYSTEM_INSTRUCTION,
+            temperature=0.7,
+            max_output_tokens=2500,
+        )
+        logger.debug(f"Insight gerado pelo modelo {route}")
         
-        prompt_template = ChatPromptTemplate.from_messages([
-            ("system", system_instruction_text),
-            ("human", "{user_prompt}")
-        ])
-        
-        try:
-            llm = ChatGoogleGenerativeAI(
-                model=model_name,
-                google_api_key=api_key,
-                temperature=0.7,
-                max_output_tokens=2500,
-            )
-            
-            chain = prompt_template | llm
-            response = chain.invoke({"user_prompt": prompt})
-            
-        except Exception as e:
-            logger.warning(f"Modelo {model_name} não disponível: {str(e)}. Tentando fallback para gemini-1.5-flash.")
-            try:
-                llm = ChatGoogleGenerativeAI(
-                    model="gemini-1.5-flash",
-                    google_api_key=api_key,
-                    temperature=0.7,
-                    max_output_tokens=2500,
-                )
-                chain = prompt_template | llm
-                response = chain.invoke({"user_prompt": prompt})
-            except Exception:
-                logger.warning("gemini-1.5-flash não disponível. Usando fallback com prompt concatenado.")
-                full_prompt = f"{system_instruction_text}\n\n{prompt}"
-                simple_prompt = ChatPromptTemplate.from_messages([
-                    ("human", "{user_prompt}")
-                ])
-                llm = ChatGoogleGenerativeAI(
-                    model="gemini-1.5-flash",
-                    google_api_key=api_key,
-                    temperature=0.7,
-                    max_output_tokens=2500,
-                )
-                chain = simple_prompt | llm
-                response = chain.invoke({"user_prompt": full_prompt})
-        
-        content = None
-        try:
-            if hasattr(response, 'content'):
-                content = response.content
-                if isinstance(content, list) and len(content) > 0:
-                    if hasattr(content[0], 'text'):
-                        content = content[0].text
-                    elif isinstance(content[0], str):
-                        content = content[0]
-                    else:
-                        content = str(content[0])
-                elif not isinstance(content, str):
-                    content = str(content)
-            elif hasattr(response, 'text'):
-                content = response.text
-            elif isinstance(response, str):
-                content = response
-            else:
-                if hasattr(response, 'message') and hasattr(response.message, 'content'):
-                    content = response.message.content
-                elif hasattr(response, 'generations') and len(response.generations) > 0:
-                    gen = response.generations[0]
-                    if isinstance(gen, list) and len(gen) > 0:
-                        content = gen[0].text if hasattr(gen[0], 'text') else str(gen[0])
-                    else:
-                        content = gen.text if hasattr(gen, 'text') else str(gen)
-                elif hasattr(response, 'messages') and len(response.messages) > 0:
-                    msg = response.messages[0]
-                    if hasattr(msg, 'content'):
-                        content = msg.content
-                    else:
-                        content = str(msg)
-                else:
-                    content = str(response)
-        except Exception as e:
-            logger.warning(f"Erro ao extrair conteúdo da resposta: {str(e)}. Tentando str(response).")
-            content = str(response)
-        
-        if not isinstance(content, str):
-            content = str(content)
-        
-        if not content or len(content.strip()) == 0:
-            raise ValueError("Resposta do Gemini está vazia ou foi bloqueada")
-        
-        content = content.strip()
-        
-        if len(content) < 50:
-            logger.warning(f"Resposta do Gemini parece muito curta ({len(content)} caracteres): {content}")
-            logger.debug(f"Tipo da resposta original: {type(response)}, Atributos: {dir(response) if hasattr(response, '__dict__') else 'N/A'}")
-        
-        if content.endswith('...') or (len(content) > 0 and content[-1] not in '.!?' and len(content) < 100):
-            logger.warning(f"Resposta do Gemini pode estar truncada. Tamanho: {len(content)} caracteres. Conteúdo: {content}")
-        
-        if len(content) < 100:
-            logger.debug(f"Conteúdo completo da resposta: {repr(content)}")
-        
-        return content
+        return _response_text(response)
     
     except ImportError:
         logger.error("Biblioteca langchain-google-genai não instalada. Execute: pip install langchain-google-genai")
@@ -243,6 +335,75 @@ def _generate_with_gemini(prompt: str) -> str:
 
 
 
+def _response_text(response) -> str:
+    """
+    Extrai o texto da resposta do chat model.
+    
+    Args:
+        response: Resposta do LangChain (mensagem, geração ou texto)
+    
+    Returns:
+        str: Texto da resposta, sem espaços nas pontas
+    """
+    content = None
+    try:
+        if hasattr(response, 'content'):
+            content = response.content
+            if isinstance(content, list) and len(content) > 0:
+                if hasattr(content[0], 'text'):
+                    content = content[0].text
+                elif isinstance(content[0], str):
+                    content = content[0]
+                else:
+                    content = str(content[0])
+            elif not isinstance(content, str):
+                content = str(content)
+        elif hasattr(response, 'text'):
+            content = response.text
+        elif isinstance(response, str):
+            content = response
+        else:
+            if hasattr(response, 'message') and hasattr(response.message, 'content'):
+                content = response.message.content
+            elif hasattr(response, 'generations') and len(response.generations) > 0:
+                gen = response.generations[0]
+                if isinstance(gen, list) and len(gen) > 0:
+                    content = gen[0].text if hasattr(gen[0], 'text') else str(gen[0])
+                else:
+                    content = gen.text if hasattr(gen, 'text') else str(gen)
+            elif hasattr(response, 'messages') and len(response.messages) > 0:
+                msg = response.messages[0]
+                if hasattr(msg, 'content'):
+                    content = msg.content
+                else:
+                    content = str(msg)
+            else:
+                content = str(response)
+    except Exception as e:
+        logger.warning(f"Erro ao extrair conteúdo da resposta: {str(e)}. Tentando str(response).")
+        content = str(response)
+    
+    if not isinstance(content, str):
+        content = str(content)
+    
+    if not content or len(content.strip()) == 0:
+        raise ValueError("Resposta do Gemini está vazia ou foi bloqueada")
+    
+    content = content.strip()
+    
+    if len(content) < 50:
+        logger.warning(f"Resposta do Gemini parece muito curta ({len(content)} caracteres): {content}")
+        logger.debug(f"Tipo da resposta original: {type(response)}, Atributos: {dir(response) if hasattr(response, '__dict__') else 'N/A'}")
+    
+    if content.endswith('...') or (len(content) > 0 and content[-1] not in '.!?' and len(content) < 100):
+        logger.warning(f"Resposta do Gemini pode estar truncada. Tamanho: {len(content)} caracteres. Conteúdo: {content}")
+    
+    if len(content) < 100:
+        logger.debug(f"Conteúdo completo da resposta: {repr(content)}")
+    
+    return content
+
+
 def _generate_fallback(classification: Dict, indicators_summary: Dict, news_list: List[Dict]) -> str:
     """Gera insight de fallback quando LLM não está disponível."""
     classification_name = classification.get('classification', 'Neutro')
@@ -282,7 +443,6 @@ def _validate_insight(insight: str) -> str:
         return "O mercado apresenta condições que requerem monitoramento contínuo. Recomenda-se acompanhar indicadores técnicos e notícias relevantes para entender melhor o contexto atual."
     
     insight = insight.strip()
-    insight_lower = insight.lower()
     
     if len(insight) < 50:
         logger.warning(f"Insight muito curto ({len(insight)} caracteres). Pode estar truncado: {insight[:100]}")
@@ -296,22 +456,7 @@ def _validate_insight(insight: str) -> str:
         else:
             return "O mercado apresenta condições que requerem monitoramento contínuo. Recomenda-se acompanhar indicadores técnicos e notícias relevantes para entender melhor o contexto atual."
     
-    for forbidden in FORBIDDEN_WORDS:
-        if forbidden in insight_lower:
-            logger.warning(f"Insight contém palavra proibida: {forbidden}. Aplicando correção.")
-            pattern = re.compile(re.escape(forbidden), re.IGNORECASE)
-            insight = pattern.sub("[informação removida]", insight)
-    
-    recommendation_patterns = [
-        r'você (deve|precisa|pode) (comprar|vender|investir)',
-        r'(é|seria) (recomendável|aconselhável) (comprar|vender|investir)',
-        r'(sugiro|recomendo|aconselho) (que você )?(comprar|vender|investir)'
-    ]
-    
-    for pattern in recommendation_patterns:
-        if re.search(pattern, insight_lower):
-            logger.warning(f"Insight contém padrão de recomendação. Aplicando correção.")
-            insight = re.sub(pattern, "[informação contextual]", insight, flags=re.IGNORECASE)
+    insight = _filter_recommendations(insight)
     
     if not insight or len(insight.strip()) < 20:
         logger.warning("Insight muito curto após validação. Usando fallback.")
@@ -320,7 +465,24 @@ def _validate_insight(insight: str) -> str:
     return insight.strip()
 
 
+def _filter_recommendations(insight: str) -> str:
+    """Substitui palavras proibidas e padrões de recomendação no texto (uma passada)."""
+    from src.agent.compliance import get_engine
+    
+    insight, matches = get_engine().redact(insight)
+    if matches:
+        phrases = ", ".join(sorted({match['phrase'] for match in matches}))
+        logger.warning(f"Insight contém {len(matches)} trecho(s) proibido(s) ({phrases}). Aplicando correção.")
+    return insight
+
+
 if __name__ == "__main__":
+    import sys
+    
+    # Executado como script (python src/agent/agent.py), a raiz do projeto não está
+    # no sys.path e os imports src.agent.* falhariam (caindo no fallback em silêncio)
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    
     logging.basicConfig(level=logging.INFO)
     
     classification = {
@@ -0,0 +1,238 @@
+"""
+Motor de compliance dos insights.
+Compila uma única vez as frases proibidas e os padrões de recomendação de cada
+idioma em uma expressão regular combinada e varre cada texto em uma só passada,
+devolvendo os trechos encontrados (com posição, frase, categoria e idioma) para
+auditoria. Serve tanto à validação de um insight quanto à refiltragem em lote de
+textos já gerados quando as listas mudam, e ao filtro incremental do streaming.
+"""
+
+import re
+import logging
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Frases por idioma e categoria. 'forbidden' são frases literais; 'recommendation'
+# são padrões com grupos de alternativas (a|b) e grupos opcionais (...)?, sem
+# aninhamento, expandidos em frases literais na compilação.
+DEFAULT_PHRASES = {
+    'pt': {
+        'forbidden': [
+            'compre agora', 'venda agora', 'compre', 'venda', 'invista', 'não invista',
+            'é o momento de comprar', 'é o momento de vender', 'deve comprar', 'deve vender',
+            'recomendo comprar', 'recomendo vender', 'sugiro comprar', 'sugiro vender',
+        ],
+        'recommendation': [
+            r'você (deve|precisa|pode) (comprar|vender|investir)',
+            r'(é|seria) (recomendável|aconselhável) (comprar|vender|investir)',
+            r'(sugiro|recomendo|aconselho) (que você )?(comprar|vender|investir)',
+        ],
+    },
+    'en': {
+        'forbidden': ['buy now', 'sell now', 'you should buy', 'you should sell', 'invest now'],
+        'recommendation': [],
+    },
+}
+
+# Texto que substitui cada categoria
+REPLACEMENTS = {
+    'forbidden': "[informação removida]",
+    'recommendation': "[informação contextual]",
+}
+
+
+def expand_pattern(pattern: str) -> List[str]:
+    """Frases literais reconhecidas por um padrão com grupos (a|b) e (...)?."""
+    phrases = ['']
+    for literal, group, optional in re.findall(r'([^()]+)|\(([^()]*)\)(\?)?', pattern):
+        options = [literal] if literal else group.split('|') + ([''] if optional else [])
+        phrases = [phrase + option for phrase in phrases for option in options]
+    return phrases
+
+
+def _lower(text: str) -> str:
+    """Texto em minúsculas com o mesmo tamanho (posições válidas no texto original)."""
+    lower = text.lower()
+    if len(lower) == len(text):
+        return lower
+    return ''.join(char.lower() if len(char.lower()) == 1 else char for char in text)
+
+
+def _trie_pattern(phrases: List[str]) -> str:
+    """
+    Expressão regular em forma de trie: prefixos comuns aparecem uma só vez, e cada
+    posição do texto testa só o ramo do próximo caractere em vez de todas as frases.
+    Entre uma frase e sua continuação, a mais longa é tentada primeiro.
+
+    A expressão é aplicada ao texto em minúsculas, sem re.IGNORECASE: assim o módulo
+    re pula direto para as posições que começam com a primeira letra de alguma frase.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if '' not in node:
+            return body
+        return f"(?:{body})?" if len(branches) == 1 else f"{body}?"
+
+    return build(trie)
+
+
+class ComplianceEngine:
+    """
+    Varredura de compliance em uma passada, com todas as frases compiladas juntas.
+
+    As frases (em minúsculas) são compiladas em uma única expressão em forma de
+    trie, aplicada ao texto em minúsculas: em cada posição vale a frase mais longa
+    e a varredura segue da esquerda para a direita, sem sobreposição. Uma frase
+    presente em mais de uma lista fica com a primeira (idiomas na ordem dada,
+    'forbidden' antes de 'recommendation').
+    """
+
+    def __init__(self, phrases: Optional[Dict] = None, languages: Optional[List[str]] = None):
+        phrases = phrases or DEFAULT_PHRASES
+        self.languages = list(languages or phrases)
+        self._entries = {}
+        for language in self.languages:
+            for category in REPLACEMENTS:
+                for item in phrases.get(language, {}).get(category, []):
+                    literals = expand_pattern(item) if category == 'recommendation' else [item]
+                    for literal in literals:
+                        self._entries.setdefault(literal.lower(), (category, language))
+        if not self._entries:
+            raise ValueError(f"Nenhuma frase de compliance para os idiomas {self.languages}")
+
+        self.phrases = sorted(self._entries, key=lambda phrase: (-len(phrase), phrase))
+        self.max_length = len(self.phrases[0])
+        self._regex = re.compile(_trie_pattern(self.phrases))
+        # Inícios incompletos de frases, para o streaming saber o que segurar
+        self._prefixes = {phrase[:size] for phrase in self.phrases for size in range(1, len(phrase))}
+
+    def scan(self, text: str) -> List[Dict]:
+        """
+        Trechos do texto que violam as regras.
+
+        Returns:
+            List[Dict]: {'start', 'end', 'text', 'phrase', 'category', 'language'} por trecho
+        """
+        matches = []
+        for found in self._regex.finditer(_lower(text)):
+            category, language = self._entries[found.group()]
+            matches.append({
+                'start': found.start(),
+                'end': found.end(),
+                'text': text[found.start():found.end()],
+                'phrase': found.group(),
+                'category': category,
+                'language': language,
+            })
+        return matches
+
+    def redact(self, text: str):
+        """
+        Substitui os trechos encontrados pelo texto da categoria.
+
+        Returns:
+            tuple: (texto corrigido, lista de trechos de scan, com posições no texto original)
+        """
+        matches = self.scan(text)
+        if not matches:
+            return text, matches
+        parts, position = [], 0
+        for match in matches:
+            parts.append(text[position:match['start']])
+            parts.append(REPLACEMENTS[match['category']])
+            position = match['end']
+        parts.append(text[position:])
+        return "".join(parts), matches
+
+    def scan_batch(self, texts: List[str]) -> List[List[Dict]]:
+        """scan de vários textos (ex.: insights em cache após mudar as listas)."""
+        return [self.scan(text) for text in texts]
+
+    def redact_batch(self, texts: List[str]) -> List[tuple]:
+        """redact de vários textos."""
+        return [self.redact(text) for text in texts]
+
+    def safe_length(self, text: str) -> int:
+        """
+        Tamanho do maior prefixo de text que pode ser corrigido sem esperar o resto.
+
+        O corte recua até o menor sufixo que é início incompleto de uma frase e até
+        o começo de qualquer trecho que o cruze, então corrigir o prefixo e o resto
+        separadamente dá o mesmo resultado que corrigir o texto inteiro.
+        """
+        lower = _lower(text)
+        cut = len(lower)
+        for start in range(max(0, cut - self.max_length + 1), cut):
+            if lower[start:] in self._prefixes:
+                cut = start
+                break
+
+        moved = True
+        while moved:
+            moved = False
+            for start in range(max(0, cut - self.max_length + 1), cut):
+                found = self._regex.match(lower, start)
+                if found is not None and found.end() > cut:
+                    cut = start
+                    moved = True
+                    break
+        return cut
+
+
+class StreamingComplianceFilter:
+    """
+    Correção de um texto que chega em pedaços (streaming do insight).
+
+    Libera o texto corrigido assim que ele não pode mais fazer parte de um trecho
+    proibido incompleto (ComplianceEngine.safe_length). Os trechos liberados,
+    concatenados, são iguais a redact do texto inteiro.
+    """
+
+    def __init__(self, engine: Optional[ComplianceEngine] = None):
+        self.engine = engine or get_engine()
+        self.matches = []
+        self._buffer = ""
+        self._offset = 0
+
+    def _release(self, size):
+        released, self._buffer = self._buffer[:size], self._buffer[size:]
+        if not released:
+            return ""
+        clean, matches = self.engine.redact(released)
+        for match in matches:
+            match['start'] += self._offset
+            match['end'] += self._offset
+        self.matches.extend(matches)
+        self._offset += size
+        return clean
+
+    def feed(self, chunk: str) -> str:
+        """Recebe um pedaço e devolve o texto corrigido que já pode ser liberado."""
+        self._buffer += chunk
+        return self._release(self.engine.safe_length(self._buffer))
+
+    def flush(self) -> str:
+        """Fim do texto: devolve o que ainda estava segurado, corrigido."""
+        return self._release(len(self._buffer))
+
+
+_engine = None
+
+
+def get_engine() -> ComplianceEngine:
+    """Motor com as listas padrão de todos os idiomas (compilado na primeira chamada)."""
+    global _engine
+    if _engine is None:
+        _engine = ComplianceEngine()
+    return _engine
@@ -0,0 +1,663 @@
+"""
+Clientes LLM compartilhados com circuit breaker por modelo.
+Cada cliente Gemini é criado uma única vez por configuração (modelo, temperatura,
+limite de tokens) e reutilizado entre chamadas, mantendo as conexões HTTP abertas.
+Um modelo que falha fica bloqueado por um período de espera, durante o qual as
+chamadas vão direto para o próximo modelo da rota, sem pagar a falha de novo.
+Cada tentativa tem um prazo próprio e, com hedging, um modelo lento recebe uma
+tentativa paralela no modelo seguinte da rota. Para chamadas assíncronas há
+ainvoke, um token bucket para limitar a taxa de requisições e um chat model
+local (FakeChatModel) para testes sem rede.
+"""
+
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from queue import Queue, Empty
+from collections import deque
+from concurrent.futures import Future, wait, FIRST_COMPLETED
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_MODEL = "gemini-1.5-flash"
+
+# Falhas seguidas que tiram um modelo da rota e segundos até uma nova tentativa
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_COOLDOWN = 60.0
+
+# Prazo de cada tentativa, em segundos (0 = sem prazo). Desligado por padrão: um prazo
+# fixo cortaria gerações longas (2500 tokens podem levar mais de 30s)
+DEFAULT_ATTEMPT_TIMEOUT = 0.0
+
+
+def gemini_models():
+    """Rota padrão: GEMINI_MODEL seguido do modelo de fallback."""
+    primary = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+    return [primary] if primary == FALLBACK_MODEL else [primary, FALLBACK_MODEL]
+
+
+def _gemini_factory(model, temperature, max_output_tokens):
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise ValueError("GOOGLE_API_KEY não encontrada. Configure a variável de ambiente GOOGLE_API_KEY no arquivo .env")
+    return ChatGoogleGenerativeAI(
+        model=model,
+        google_api_key=api_key,
+        temperature=temperature,
+        max_output_tokens=max_output_tokens,
+    )
+
+
+def has_content(response):
+    """Resposta válida: conteúdo não vazio (respostas bloqueadas chegam vazias)."""
+    content = response.content if hasattr(response, 'content') else response
+    if isinstance(content, str):
+        return bool(content.strip())
+    return bool(content)
+
+
+def _start_attempt(client, messages):
+    """
+    Executa client.invoke em uma thread daemon e devolve o Future da resposta.
+
+    Uma tentativa que estoura o prazo é abandonada (a chamada HTTP não pode ser
+    interrompida); a thread daemon não impede o processo de terminar.
+    """
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(client.invoke(messages))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="llm-attempt", daemon=True).start()
+    return future
+
+
+def chunk_text(chunk):
+    """Texto de um pedaço do streaming (conteúdo em texto ou lista de partes)."""
+    content = chunk.content if hasattr(chunk, 'content') else chunk
+    if isinstance(content, list):
+        return "".join(part if isinstance(part, str) else part.get('text', '') if isinstance(part, dict)
+                       else getattr(part, 'text', '') for part in content)
+    return content if isinstance(content, str) else str(content)
+
+
+_STREAM_END = object()
+
+
+def _start_stream(client, messages):
+    """
+    Consome client.stream em uma thread daemon e devolve a fila dos pedaços.
+
+    A fila recebe ('chunk', pedaço), ('error', exceção) ou ('end', None), permitindo
+    esperar cada pedaço com prazo.
+    """
+    chunks = Queue()
+
+    def run():
+        try:
+            for chunk in client.stream(messages):
+                chunks.put(('chunk', chunk))
+            chunks.put(('end', None))
+        except BaseException as e:
+            chunks.put(('error', e))
+
+    threading.Thread(target=run, name="llm-stream", daemon=True).start()
+    return chunks
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker de uma rota (modelo e formato de prompt).
+
+    - fechado: as chamadas passam normalmente
+    - aberto: após failure_threshold falhas seguidas, a rota é pulada por cooldown segundos
+    - meio-aberto: vencida a espera, uma única chamada de teste passa; sucesso fecha
+      o circuito e falha o reabre por mais cooldown segundos
+    """
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, cooldown=DEFAULT_COOLDOWN, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def failures(self):
+        """Falhas seguidas desde o último sucesso."""
+        return self._failures
+
+    @property
+    def retry_in(self):
+        """Segundos até a chamada de teste (0 se o circuito não está aberto)."""
+        if self._opened_at is None:
+            return 0.0
+        return max(0.0, self.cooldown - (self._clock() - self._opened_at))
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return 'closed'
+        if self._clock() - self._opened_at < self.cooldown:
+            return 'open'
+        return 'half_open'
+
+    def allow(self):
+        """Indica se a chamada pode passar (em meio-aberto, só a primeira passa)."""
+        state = self.state
+        if state == 'closed':
+            return True
+        if state == 'half_open' and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release(self):
+        """Libera a chamada de teste sem registrar resultado (chamada abandonada ou não enviada)."""
+        self._probing = False
+
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self):
+        self._failures += 1
+        self._probing = False
+        if self._opened_at is not None or self._failures >= self.failure_threshold:
+            self._opened_at = self._clock()
+
+
+class LLMClientRegistry:
+    """
+    Registro de clientes LLM reutilizáveis com failover entre modelos.
+
+    invoke percorre a rota de modelos em ordem e usa o primeiro cujo circuito
+    permita a chamada. Com mensagem de sistema, a rota termina com o último modelo
+    recebendo o prompt concatenado (para modelos que rejeitam mensagens de sistema).
+
+    - attempt_timeout: prazo de cada tentativa (desligado por padrão); estourado, a
+      tentativa é abandonada, conta como falha do modelo e a rota segue para o próximo.
+      Deve ficar acima do tempo da maior resposta pedida (max_output_tokens)
+    - hedge_after: se a tentativa em andamento não responder nesse tempo, uma
+      tentativa de reserva vai para o próximo modelo da rota, em paralelo; vale a
+      primeira resposta válida (até duas tentativas simultâneas)
+
+    O factory recebe (modelo, temperatura, max_output_tokens) e devolve um chat
+    model do LangChain; o padrão cria ChatGoogleGenerativeAI.
+    """
+
+    def __init__(self, factory=None, cooldown=None, failure_threshold=None, attempt_timeout=None,
+                 hedge_after=None, clock=time.monotonic):
+        self.factory = factory or _gemini_factory
+        self.cooldown = float(cooldown if cooldown is not None else os.getenv("LLM_BREAKER_COOLDOWN", DEFAULT_COOLDOWN))
+        self.failure_threshold = max(1, int(failure_threshold if failure_threshold is not None
+                                            else os.getenv("LLM_BREAKER_THRESHOLD", DEFAULT_FAILURE_THRESHOLD)))
+        self.attempt_timeout = float(attempt_timeout if attempt_timeout is not None
+                                     else os.getenv("LLM_ATTEMPT_TIMEOUT", DEFAULT_ATTEMPT_TIMEOUT))
+        self.hedge_after = float(hedge_after if hedge_after is not None else os.getenv("LLM_HEDGE_AFTER", 0))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._breakers = {}
+        self.stats = {'clients_created': 0, 'hedges': 0, 'hedge_wins': 0, 'timeouts': 0, 'routes': {}}
+
+    def client(self, model, temperature=0.7, max_output_tokens=2500):
+        """Cliente do modelo com a configuração pedida, criado na primeira chamada."""
+        key = (model, temperature, max_output_tokens)
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self.factory(model, temperature, max_output_tokens)
+                self.stats['clients_created'] += 1
+            return self._clients[key]
+
+    def _breaker(self, route):
+        with self._lock:
+            if route not in self._breakers:
+                self._breakers[route] = CircuitBreaker(self.failure_threshold, self.cooldown, self._clock)
+                self.stats['routes'][route] = {'calls': 0, 'failures': 0, 'timeouts': 0, 'skipped': 0, 'wins': 0}
+            return self._breakers[route]
+
+    def _count(self, route, field):
+        with self._lock:
+            self.stats['routes'][route][field] += 1
+
+    def _routes(self, models, system):
+        routes = [(model, False) for model in models]
+        if system:
+            routes.append((models[-1], True))
+        return routes
+
+    def _next_route(self, queue, prompt, system, temperature, max_output_tokens):
+        """
+        Próximo modelo da fila cujo circuito permita a chamada.
+
+        Returns:
+            tuple: (cliente, mensagens, rota, breaker) ou None se a fila acabou
+        """
+        while queue:
+            model, concatenated = queue.popleft()
+            route = f"{model} (prompt concatenado)" if concatenated else model
+            breaker = self._breaker(route)
+            with self._lock:
+                allowed = breaker.allow()
+            if not allowed:
+                self._count(route, 'skipped')
+                logger.debug(f"Modelo {route} com circuito aberto; pulando")
+                continue
+
+            if concatenated:
+                messages = [("human", f"{system}\n\n{prompt}")]
+            else:
+                messages = ([("system", system)] if system else []) + [("human", prompt)]
+
+            # Erros de configuração (biblioteca ausente, chave não configurada) não abrem o circuito
+            try:
+                client = self.client(model, temperature, max_output_tokens)
+            except Exception:
+                with self._lock:
+                    breaker.release()
+                raise
+            self._count(route, 'calls')
+            return client, messages, route, breaker
+        return None
+
+    def _launch(self, queue, prompt, system, temperature, max_output_tokens):
+        """
+        Inicia uma tentativa no próximo modelo disponível da fila.
+
+        Returns:
+            tuple: (Future, rota, breaker) ou None se a fila acabou
+        """
+        attempt = self._next_route(queue, prompt, system, temperature, max_output_tokens)
+        if attempt is None:
+            return None
+        client, messages, route, breaker = attempt
+        return _start_attempt(client, messages), route, breaker
+
+    def _succeed(self, route, breaker, hedge=False):
+        with self._lock:
+            breaker.record_success()
+            self.stats['routes'][route]['wins'] += 1
+            if hedge:
+                self.stats['hedge_wins'] += 1
+
+    def _fail(self, route, breaker, error, timed_out=False):
+        with self._lock:
+            breaker.record_failure()
+            opened = breaker.state == 'open'
+            failures = breaker.failures
+            self.stats['routes'][route]['failures'] += 1
+            if timed_out:
+                self.stats['routes'][route]['timeouts'] += 1
+                self.stats['timeouts'] += 1
+        if opened:
+            circuit = f"Circuito aberto por {self.cooldown:.0f}s"
+        else:
+            circuit = f"Falha {failures} de {self.failure_threshold} antes de abrir o circuito"
+        logger.warning(f"Modelo {route} não disponível: {str(error)}. {circuit}; tentando o próximo modelo.")
+
+    def _abandon(self, pending):
+        """Libera os circuitos das tentativas abandonadas (não contam como falha)."""
+        with self._lock:
+            for _, breaker, _, _ in pending.values():
+                breaker.release()
+
+    def invoke(self, prompt, system=None, models=None, temperature=0.7, max_output_tokens=2500,
+               attempt_timeout=None, hedge_after=None, accept=has_content, deadline=None):
+        """
+        Envia o prompt ao primeiro modelo disponível da rota.
+
+        Args:
+            prompt (str): Prompt do usuário
+            system (str, optional): Instrução de sistema
+            models (list, optional): Modelos em ordem de preferência (padrão: gemini_models())
+            temperature (float): Temperatura do modelo
+            max_output_tokens (int): Limite de tokens da resposta
+            attempt_timeout (float, optional): Prazo de cada tentativa (padrão: o do registro; 0 = sem prazo)
+            hedge_after (float, optional): Espera antes da tentativa de reserva (padrão: o do
+                registro; 0 = sem hedging)
+            accept (callable): accept(resposta) -> bool; respostas recusadas contam como falha
+            deadline (float, optional): Instante (time.monotonic) em que a chamada desiste
+                da rota inteira; as tentativas em andamento são abandonadas sem contar
+                como falha dos modelos
+
+        Returns:
+            tuple: (resposta do chat model, nome da rota usada)
+
+        Raises:
+            RuntimeError: Se todos os modelos falharem ou estiverem com o circuito aberto
+            TimeoutError: Se deadline passar antes de uma resposta válida
+        """
+        attempt_timeout = self.attempt_timeout if attempt_timeout is None else attempt_timeout
+        hedge_after = self.hedge_after if hedge_after is None else hedge_after
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError("Prazo da chamada ao LLM esgotado antes do envio")
+        queue = deque(self._routes(models or gemini_models(), system))
+        pending = {}
+        last_error = None
+        last_launch = None
+
+        def launch(hedge):
+            nonlocal last_launch
+            attempt = self._launch(queue, prompt, system, temperature, max_output_tokens)
+            if attempt is None:
+                return
+            future, route, breaker = attempt
+            last_launch = time.monotonic()
+            pending[future] = (route, breaker, last_launch, hedge)
+            if hedge:
+                with self._lock:
+                    self.stats['hedges'] += 1
+                logger.info(f"Modelo sem resposta em {hedge_after:g}s; tentativa de reserva em {route}")
+
+        launch(hedge=False)
+        while pending:
+            now = time.monotonic()
+            moments = [started + attempt_timeout for _, _, started, _ in pending.values()] if attempt_timeout else []
+            if hedge_after and queue and len(pending) == 1:
+                moments.append(last_launch + hedge_after)
+            if deadline is not None:
+                moments.append(deadline)
+            timeout = max(0.0, min(moments) - now) if moments else None
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                route, breaker, _, hedge = pending.pop(future)
+                error = future.exception()
+                if error is None and not accept(future.result()):
+                    error = ValueError("resposta vazia ou bloqueada")
+                if error is not None:
+                    last_error = error
+                    self._fail(route, breaker, error)
+                    continue
+
+                self._succeed(route, breaker, hedge)
+                # Tentativas mais lentas são abandonadas sem contar como falha
+                self._abandon(pending)
+                return future.result(), route
+
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                self._abandon(pending)
+                raise TimeoutError(f"Prazo da chamada ao LLM esgotado: {last_error or 'sem resposta'}")
+            for future, (route, breaker, started, _) in list(pending.items()):
+                if attempt_timeout and now - started >= attempt_timeout:
+                    del pending[future]
+                    last_error = TimeoutError(f"sem resposta em {attempt_timeout:g}s")
+                    self._fail(route, breaker, last_error, timed_out=True)
+
+            if not pending:
+                launch(hedge=False)
+            elif hedge_after and queue and len(pending) == 1 and now - last_launch >= hedge_after:
+                launch(hedge=True)
+
+        raise RuntimeError(f"Nenhum modelo disponível na rota: {last_error or 'todos com circuito aberto'}")
+
+    async def ainvoke(self, prompt, system=None, models=None, temperature=0.7, max_output_tokens=2500,
+                      attempt_timeout=None, accept=has_content):
+        """
+        Versão assíncrona de invoke (client.ainvoke), com a mesma rota, circuit
+        breakers e prazo por tentativa; as tentativas são sequenciais (sem hedging).
+
+        Returns:
+            tuple: (resposta do chat model, nome da rota usada)
+
+        Raises:
+            RuntimeError: Se todos os modelos falharem ou estiverem com o circuito aberto
+        """
+        attempt_timeout = self.attempt_timeout if attempt_timeout is None else attempt_timeout
+        queue = deque(self._routes(models or gemini_models(), system))
+        last_error = None
+
+        while True:
+            attempt = self._next_route(queue, prompt, system, temperature, max_output_tokens)
+            if attempt is None:
+                break
+            client, messages, route, breaker = attempt
+            try:
+                response = await asyncio.wait_for(client.ainvoke(messages), attempt_timeout or None)
+            except asyncio.TimeoutError:
+                last_error = TimeoutError(f"sem resposta em {attempt_timeout:g}s")
+                self._fail(route, breaker, last_error, timed_out=True)
+                continue
+            except Exception as e:
+                last_error = e
+                self._fail(route, breaker, e)
+                continue
+            if not accept(response):
+                last_error = ValueError("resposta vazia ou bloqueada")
+                self._fail(route, breaker, last_error)
+                continue
+            self._succeed(route, breaker)
+            return response, route
+
+        raise RuntimeError(f"Nenhum modelo disponível na rota: {last_error or 'todos com circuito aberto'}")
+
+    def stream(self, prompt, system=None, models=None, temperature=0.7, max_output_tokens=2500,
+               attempt_timeout=None):
+        """
+        Transmite a resposta do primeiro modelo disponível da rota (client.stream).
+
+        O failover só acontece antes do primeiro trecho de texto: depois dele, uma
+        falha ou um intervalo maior que attempt_timeout entre trechos encerra o
+        streaming com RuntimeError (o texto já entregue não pode ser desfeito).
+
+        Yields:
+            str: Trechos de texto na ordem em que chegam
+
+        Raises:
+            RuntimeError: Se todos os modelos falharem ou o streaming for interrompido
+        """
+        attempt_timeout = self.attempt_timeout if attempt_timeout is None else attempt_timeout
+        queue = deque(self._routes(models or gemini_models(), system))
+        last_error = None
+
+        while True:
+            attempt = self._next_route(queue, prompt, system, temperature, max_output_tokens)
+            if attempt is None:
+                break
+            client, messages, route, breaker = attempt
+            chunks = _start_stream(client, messages)
+            started = False
+            error = None
+
+            while True:
+                try:
+                    kind, value = chunks.get(timeout=attempt_timeout or None)
+                except Empty:
+                    error = TimeoutError(f"sem resposta em {attempt_timeout:g}s")
+                    break
+                if kind == 'end':
+                    break
+                if kind == 'error':
+                    error = value
+                    break
+                text = chunk_text(value)
+                if text:
+                    started = True
+                    yield text
+
+            if error is None and not started:
+                error = ValueError("resposta vazia ou bloqueada")
+            if error is None:
+                self._succeed(route, breaker)
+                return
+
+            self._fail(route, breaker, error, timed_out=isinstance(error, TimeoutError))
+            if started:
+                raise RuntimeError(f"Streaming do modelo {route} interrompido: {error}")
+            last_error = error
+
+        raise RuntimeError(f"Nenhum modelo disponível na rota: {last_error or 'todos com circuito aberto'}")
+
+    def _breaker_state(self, route):
+        breaker = self._breakers[route]
+        return {'state': breaker.state, 'consecutive_failures': breaker.failures, 'retry_in': breaker.retry_in}
+
+    def breaker_state(self, route):
+        """
+        Circuito de uma rota: estado ('closed', 'open' ou 'half_open'), falhas
+        seguidas e segundos até a chamada de teste (None se a rota ainda não foi usada).
+        """
+        with self._lock:
+            return self._breaker_state(route) if route in self._breakers else None
+
+    def report(self):
+        """
+        Resumo do registro: clientes criados, tentativas de reserva disparadas e vencedoras,
+        prazos estourados e, por rota, chamadas, falhas, prazos estourados, chamadas
+        puladas, respostas aproveitadas e o circuito (ver breaker_state).
+        """
+        with self._lock:
+            routes = {
+                route: dict(counts, **self._breaker_state(route))
+                for route, counts in self.stats['routes'].items()
+            }
+            summary = {key: value for key, value in self.stats.items() if key != 'routes'}
+            summary['routes'] = routes
+            return summary
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Registro compartilhado pelo processo (criado na primeira chamada)."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = LLMClientRegistry()
+        return _registry
+
+
+class TokenBucket:
+    """
+    Limitador de taxa assíncrono: rate fichas por segundo, acumulando até capacity.
+
+    Cada chamada consome uma ficha; sem fichas, acquire aguarda a reposição. Os
+    pedidos são atendidos em ordem de chegada. clock e sleep permitem simular o
+    tempo em testes.
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=asyncio.sleep):
+        if rate <= 0:
+            raise ValueError("rate precisa ser positivo")
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, rate))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens=1):
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await self._sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+
+class _FakeMessage:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeChatModel:
+    """
+    Chat model local para testes, com invoke e ainvoke como os do LangChain.
+
+    Responde sem rede com os textos de responses (em ciclo), após latency segundos
+    e falhando com probabilidade failures; se responses for uma função, a resposta é
+    responses(mensagens), e uma exceção dela é a falha da chamada. Em stream, o texto sai em pedaços de
+    chunk_size caracteres, com chunk_latency segundos entre eles. Registra as
+    chamadas e o pico de chamadas simultâneas.
+    Uso: LLMClientRegistry(factory=lambda *args: FakeChatModel()).
+    """
+
+    DEFAULT_RESPONSE = (
+        "O par BRL/USD mostra um cenário técnico coerente com a classificação atual, "
+        "com médias móveis e RSI indicando o ritmo recente dos preços. O contexto de "
+        "notícias ajuda a explicar a volatilidade observada no período."
+    )
+
+    def __init__(self, responses=None, latency=0.0, failures=0.0, seed=None, chunk_size=16, chunk_latency=0.0):
+        self.responses = responses if callable(responses) else list(responses or [self.DEFAULT_RESPONSE])
+        self.latency = latency
+        self.failures = failures
+        self.chunk_size = chunk_size
+        self.chunk_latency = chunk_latency
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _begin(self, messages):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            failed = self._rng.random() < self.failures
+            if not callable(self.responses):
+                return failed, self.responses[(self.calls - 1) % len(self.responses)]
+        try:
+            return failed, self.responses(messages)
+        except BaseException:
+            self._end()
+            raise
+
+    def _end(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    @staticmethod
+    def _reply(failed, content):
+        if failed:
+            raise RuntimeError("Falha simulada do modelo")
+        return _FakeMessage(content)
+
+    def invoke(self, messages):
+        failed, content = self._begin(messages)
+        try:
+            time.sleep(self.latency)
+        finally:
+            self._end()
+        return self._reply(failed, content)
+
+    async def ainvoke(self, messages):
+        failed, content = self._begin(messages)
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self._end()
+        return self._reply(failed, content)
+
+    def stream(self, messages):
+        failed, content = self._begin(messages)
+        try:
+            time.sleep(self.latency)
+            self._reply(failed, content)
+            for start in range(0, len(content), self.chunk_size):
+                if start:
+                    time.sleep(self.chunk_latency)
+                yield _FakeMessage(content[start:start + self.chunk_size])
+        finally:
+            self._end()
@@ -8,13 +8,35 @@ import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.preprocessing import StandardScaler
 import logging
+import time
+
+try:
+    from src.analysis.kernels import (
+        rolling_moments, moments_to_mean, moments_to_std,
+        rolling_mean, rolling_std, rolling_min, rolling_max,
+    )
+except ImportError:  # execução direta: python src/analysis/analysis.py
+    from kernels import (
+        rolling_moments, moments_to_mean, moments_to_std,
+        rolling_mean, rolling_std, rolling_min, rolling_max,
+    )
 
 logger = logging.getLogger(__name__)
 
 
+def _like(template, values):
+    """Embala o resultado do kernel no mesmo tipo (Series/DataFrame/array) da entrada."""
+    if isinstance(template, pd.Series):
+        return pd.Series(values, index=template.index, name=template.name)
+    if isinstance(template, pd.DataFrame):
+        return pd.DataFrame(values, index=template.index, columns=template.columns)
+    return values
+
+
 def calculate_sma(df, period):
     """Calcula Simple Moving Average."""
-    return df['Close'].rolling(window=period).mean()
+    close = df['Close']
+    return _like(close, rolling_mean(close, period))
 
 
 def calculate_rsi(df, period=14):
@@ -30,8 +52,10 @@ def calculate_rsi(df, period=14):
 
 def calculate_bollinger_bands(df, period=20, num_std=2):
     """Calcula Bandas de Bollinger."""
-    sma = calculate_sma(df, period)
-    std = df['Close'].rolling(window=period).std()
+    close = df['Close']
+    moments = rolling_moments(close, [period], stats=('sum', 'sumsq'))
+    sma = _like(close, moments_to_mean(moments, period))
+    std = _like(close, moments_to_std(moments, period))
     
     upper_band = sma + (std * num_std)
     lower_band = sma - (std * num_std)
@@ -42,7 +66,7 @@ def calculate_bollinger_bands(df, period=20, num_std=2):
 def calculate_volatility(df, period=20):
     """Calcula volatilidade histórica (desvio padrão dos retornos)."""
     returns = df['Close'].pct_change()
-    volatility = returns.rolling(window=period).std() * np.sqrt(252) * 100  # Anualizada em %
+    volatility = _like(returns, rolling_std(returns, period)) * np.sqrt(252) * 100  # Anualizada em %
     return volatility
 
 
@@ -59,39 +83,60 @@ def calculate_macd(df, fast=12, slow=26, signal=9):
 
 def calculate_support_resistance(df, window=20):
     """Identifica níveis de suporte e resistência usando mínimos e máximos locais."""
-    support = df['Low'].rolling(window=window, center=True).min()
-    resistance = df['High'].rolling(window=window, center=True).max()
+    support = _like(df['Low'], rolling_min(df['Low'], window, center=True))
+    resistance = _like(df['High'], rolling_max(df['High'], window, center=True))
     
     return support, resistance
 
 
-def calculate_all_indicators(df):
+def calculate_all_indicators(df, chunk_size=None):
     """
     Calcula todos os indicadores técnicos.
     
     Args:
         df (pd.DataFrame): DataFrame com dados OHLC
+        chunk_size (int, optional): Quando informado, processa o histórico em blocos
+            desse tamanho (src/analysis/streaming.py), limitando os intermediários
+            ao tamanho do bloco
     
     Returns:
         pd.DataFrame: DataFrame com indicadores adicionados
     """
-    df = df.copy()
+    if chunk_size:
+        from src.analysis.streaming import iter_indicator_chunks
+        
+        chunks = (df.iloc[start:start + chunk_size] for start in range(0, len(df), chunk_size))
+        pieces = list(iter_indicator_chunks(chunks))
+        return pd.concat(pieces) if pieces else calculate_all_indicators(df)
+    
+    # Cópia rasa: só são acrescentadas colunas, e o OHLC de entrada (inclusive views
+    # somente leitura do HistoryStore) não é duplicado. calculate_panel_indicators
+    # passa um dicionário {campo: DataFrame}, copiado da mesma forma
+    df = df.copy(deep=False) if isinstance(df, pd.DataFrame) else dict(df)
+    close = df['Close']
+    
+    # Uma única passada do kernel cobre SMA 20/50/200 e o desvio das Bandas de Bollinger
+    moments = rolling_moments(close, [20, 50, 200], stats=('sum', 'sumsq'))
     
     # Médias Móveis
-    df['SMA_20'] = calculate_sma(df, 20)
-    df['SMA_50'] = calculate_sma(df, 50)
-    df['SMA_200'] = calculate_sma(df, 200)
+    df['SMA_20'] = _like(close, moments_to_mean(moments, 20))
+    df['SMA_50'] = _like(close, moments_to_mean(moments, 50))
+    df['SMA_200'] = _like(close, moments_to_mean(moments, 200))
     
     # RSI
     df['RSI'] = calculate_rsi(df, 14)
     
     # Bandas de Bollinger
-    df['BB_Upper'], df['BB_Middle'], df['BB_Lower'] = calculate_bollinger_bands(df, 20, 2)
+    std_20 = _like(close, moments_to_std(moments, 20))
+    df['BB_Upper'] = df['SMA_20'] + (std_20 * 2)
+    df['BB_Middle'] = df['SMA_20']
+    df['BB_Lower'] = df['SMA_20'] - (std_20 * 2)
     df['BB_Width'] = df['BB_Upper'] - df['BB_Lower']
     df['BB_Position'] = (df['Close'] - df['BB_Lower']) / (df['BB_Upper'] - df['BB_Lower'])
     
-    # Volatilidade
-    df['Volatility'] = calculate_volatility(df, 20)
+    # Retornos e Volatilidade
+    df['Returns'] = close.pct_change()
+    df['Volatility'] = _like(close, rolling_std(df['Returns'], 20)) * np.sqrt(252) * 100
     
     # MACD
     df['MACD'], df['MACD_Signal'], df['MACD_Histogram'] = calculate_macd(df)
@@ -99,9 +144,6 @@ def calculate_all_indicators(df):
     # Suporte e Resistência
     df['Support'], df['Resistance'] = calculate_support_resistance(df, 20)
     
-    # Retornos
-    df['Returns'] = df['Close'].pct_change()
-    
     # Tendência (direção da média móvel)
     df['Trend_20'] = df['SMA_20'].diff()
     df['Trend_50'] = df['SMA_50'].diff()
@@ -109,6 +151,73 @@ def calculate_all_indicators(df):
     return df
 
 
+# Indicadores de calculate_all_indicators, na mesma ordem
+ALL_INDICATORS = [
+    'SMA_20', 'SMA_50', 'SMA_200', 'RSI',
+    'BB_Upper', 'BB_Middle', 'BB_Lower', 'BB_Width', 'BB_Position',
+    'Returns', 'Volatility', 'MACD', 'MACD_Signal', 'MACD_Histogram',
+    'Support', 'Resistance', 'Trend_20', 'Trend_50'
+]
+
+# Colunas que cada etapa da análise consome
+HEURISTIC_INDICATORS = ['Close', 'SMA_20', 'SMA_50', 'RSI', 'BB_Width', 'BB_Position', 'Volatility', 'Trend_20']
+FEATURE_COLUMNS = [
+    'SMA_20', 'SMA_50', 'RSI', 'BB_Width', 'BB_Position',
+    'Volatility', 'MACD', 'MACD_Histogram', 'Returns'
+]
+SUMMARY_INDICATORS = ['Close', 'SMA_20', 'SMA_50', 'RSI', 'Volatility', 'BB_Width', 'BB_Position']
+
+COMPACT_COLUMNS = list(dict.fromkeys(HEURISTIC_INDICATORS + FEATURE_COLUMNS + SUMMARY_INDICATORS))
+
+
+def analysis_columns(explain_mode='model', indicators=None):
+    """
+    Colunas que a análise consome no modo de explicabilidade dado, mais as pedidas.
+
+    O modo 'rules' usa só as colunas da heurística; os modos com Random Forest
+    também usam as features de treino.
+    """
+    columns = HEURISTIC_INDICATORS + (FEATURE_COLUMNS if explain_mode != 'rules' else []) + SUMMARY_INDICATORS
+    return list(dict.fromkeys(columns + list(indicators or [])))
+
+
+def calculate_indicators(df, columns):
+    """
+    Calcula pelo registro de indicadores só as colunas pedidas, mantendo as colunas de df.
+
+    Args:
+        df (pd.DataFrame): DataFrame com dados OHLC
+        columns (list): Indicadores desejados (nomes de calculate_all_indicators)
+
+    Returns:
+        pd.DataFrame: Colunas originais de df seguidas dos indicadores pedidos
+    """
+    from src.analysis.registry import default_registry
+
+    source = [col for col in df.columns if col not in default_registry]
+    return default_registry.compute(df, list(dict.fromkeys(source + list(columns))))
+
+
+def calculate_indicators_compact(df, columns=None):
+    """
+    Calcula apenas os indicadores consumidos pela análise, em float32 e sem copiar df.
+    
+    As colunas vêm do registro de indicadores (src/analysis/registry.py), que avalia
+    só o subgrafo necessário, e são gravadas em um único array float32 pré-alocado
+    (uma coluna contígua por indicador), que serve de base para o DataFrame retornado.
+    
+    Args:
+        df (pd.DataFrame): DataFrame com dados OHLC
+        columns (list, optional): Colunas desejadas (padrão: COMPACT_COLUMNS)
+    
+    Returns:
+        pd.DataFrame: DataFrame float32 com as colunas pedidas
+    """
+    from src.analysis.registry import default_registry
+    
+    return default_registry.compute(df, columns or COMPACT_COLUMNS, dtype=np.float32)
+
+
 def classify_heuristic(df):
     """
     Classifica o cenário atual usando heurística baseada em regras.
@@ -214,75 +323,359 @@ def classify_heuristic(df):
     }
 
 
-def get_feature_importance(df):
+HEURISTIC_CLASSES = ['Tendência de Alta', 'Tendência de Baixa', 'Alta Volatilidade', 'Neutro']
+
+
+def _expanding_quantile(series, q):
     """
-    Treina um modelo auxiliar (Random Forest) para explicabilidade das features.
+    Quantil em janela expansiva com a mesma interpolação linear de Series.quantile.
+
+    Os vizinhos inferior e superior vêm das estruturas de ordem do pandas e a
+    interpolação replica a fórmula do numpy, garantindo igualdade bit a bit.
+    """
+    lower = series.expanding().quantile(q, interpolation='lower').to_numpy()
+    higher = series.expanding().quantile(q, interpolation='higher').to_numpy()
+    count = series.expanding().count().to_numpy()
+
+    virtual_index = count * q + (1 - q) - 1
+    gamma = virtual_index - np.floor(virtual_index)
+    diff = higher - lower
+    return np.where(gamma >= 0.5, higher - diff * (1 - gamma), lower + diff * gamma)
+
+
+def _heuristic_rule_points(df):
+    """
+    Avalia as regras de classify_heuristic para todas as linhas de uma vez.
+
+    Cada linha i é avaliada como se df.iloc[:i+1] fosse o histórico completo:
+    o percentil de volatilidade usa rank expansivo e o corte de BB_Width usa
+    quantil expansivo.
+
+    Returns:
+        tuple: (máscara de linhas válidas, lista de (classe, feature, pontos por linha))
+    """
+    required_indicators = ['SMA_20', 'SMA_50', 'RSI', 'BB_Width', 'Volatility']
+    valid = df[required_indicators].notna().all(axis=1).to_numpy()
+
+    price = df['Close'].to_numpy(dtype=float)
+    sma_20 = df['SMA_20'].to_numpy(dtype=float)
+    sma_50 = df['SMA_50'].to_numpy(dtype=float)
+    rsi = df['RSI'].to_numpy(dtype=float)
+    bb_width = df['BB_Width'].to_numpy(dtype=float)
+    bb_position = df['BB_Position'].to_numpy(dtype=float)
+    if 'Trend_20' in df.columns:
+        trend_20 = df['Trend_20'].to_numpy(dtype=float)
+    else:
+        trend_20 = np.zeros(len(df))
+
+    volatility = df['Volatility']
+    volatility_less = volatility.expanding().rank(method='min').to_numpy() - 1
+    volatility_count = volatility.expanding().count().to_numpy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        volatility_percentile = volatility_less / volatility_count * 100
+    bb_width_q75 = _expanding_quantile(df['BB_Width'], 0.75)
+
+    rules = _rule_points(price, sma_20, sma_50, rsi, trend_20, volatility_percentile,
+                         bb_width, bb_width_q75, bb_position)
+    return valid, rules
+
+
+def _rule_points(price, sma_fast, sma_slow, rsi, trend, volatility_percentile,
+                 bb_width, bb_width_cut, bb_position, volatility_cut=75, rsi_bands=(30, 50, 70)):
+    """
+    Pontos de cada regra da heurística a partir dos arrays de indicadores.
+
+    Os limiares padrão são os de classify_heuristic; o motor de varredura
+    (src/analysis/sweep.py) chama esta função com outros valores.
+
+    Returns:
+        list: Lista de (classe, feature, pontos por linha)
+    """
+    rsi_low, rsi_mid, rsi_high = rsi_bands
+    rules = [
+        ('Tendência de Alta', 'SMA_20', price > sma_fast),
+        ('Tendência de Alta', 'SMA_50', price > sma_slow),
+        ('Tendência de Alta', 'RSI', (rsi >= rsi_mid) & (rsi <= rsi_high)),
+        ('Tendência de Alta', 'Trend_20', trend > 0),
+        ('Tendência de Baixa', 'SMA_20', price < sma_fast),
+        ('Tendência de Baixa', 'SMA_50', price < sma_slow),
+        ('Tendência de Baixa', 'RSI', (rsi >= rsi_low) & (rsi <= rsi_mid)),
+        ('Tendência de Baixa', 'Trend_20', trend < 0),
+        ('Alta Volatilidade', 'Volatility', (volatility_percentile > volatility_cut) * 2),
+        ('Alta Volatilidade', 'BB_Width', bb_width > bb_width_cut),
+        ('Alta Volatilidade', 'BB_Position', (bb_position < 0.2) | (bb_position > 0.8)),
+    ]
+    return [(cls, feature, np.asarray(points, dtype=np.int64)) for cls, feature, points in rules]
+
+
+def classify_heuristic_series(df):
+    """
+    Classifica todas as linhas do histórico em uma única passada vetorizada.
+
+    Equivale a chamar classify_heuristic(df.iloc[:i+1]) para cada linha i,
+    sem o custo quadrático de recalcular percentis sobre cada prefixo.
+
+    Args:
+        df (pd.DataFrame): DataFrame com indicadores calculados
+
+    Returns:
+        pd.DataFrame: DataFrame com colunas 'classification' e 'confidence', alinhado ao índice de df
+    """
+    if len(df) == 0:
+        return pd.DataFrame({'classification': pd.Series(dtype=object),
+                             'confidence': pd.Series(dtype=float)}, index=df.index)
+
+    valid, rules = _heuristic_rule_points(df)
+    return _classify_from_rules(valid, rules, df.index)
+
+
+def _classify_from_rules(valid, rules, index):
+    """Converte os pontos das regras em classificação e confiança por linha."""
+    scores = np.zeros((len(index), 3), dtype=np.int64)
+    for cls, _, points in rules:
+        scores[:, HEURISTIC_CLASSES.index(cls)] += points
+
+    max_score = scores.max(axis=1)
+    winner = np.asarray(HEURISTIC_CLASSES[:3], dtype=object)[scores.argmax(axis=1)]
+
+    classification = np.where(max_score == 0, 'Neutro', winner)
+    confidence = np.where(max_score == 0, 0.5, np.minimum(max_score / 4.0, 1.0))
+
+    classification = np.where(valid, classification, 'Neutro')
+    confidence = np.where(valid, confidence, 0.0)
+
+    return pd.DataFrame({'classification': classification, 'confidence': confidence}, index=index)
+
+
+def rule_attribution_frame(df):
+    """
+    Registra, linha a linha, quantos pontos cada indicador deu a cada classe.
     
     Args:
         df (pd.DataFrame): DataFrame com indicadores calculados
     
     Returns:
-        dict: Dicionário com importância das features
+        pd.DataFrame: Colunas (classe, feature) com os pontos de cada regra,
+                      mais 'classification' e 'confidence' da heurística
+    """
+    valid, rules = _heuristic_rule_points(df)
+    attribution = pd.DataFrame(
+        {(cls, feature): np.where(valid, points, 0) for cls, feature, points in rules},
+        index=df.index
+    )
+    labels = _classify_from_rules(valid, rules, df.index)
+    attribution[('classification', '')] = labels['classification']
+    attribution[('confidence', '')] = labels['confidence']
+    return attribution
+
+
+def get_rule_contributions(df):
+    """
+    Explicabilidade exata da heurística, sem treinar modelo.
+    
+    Soma, ao longo do histórico, os pontos que cada indicador deu à classe
+    escolhida em cada linha e normaliza o total para 1.
+    
+    Args:
+        df (pd.DataFrame): DataFrame com indicadores calculados
+    
+    Returns:
+        dict: Dicionário com a contribuição de cada feature (mesmo formato de get_feature_importance)
     """
     try:
-        feature_cols = [
-            'SMA_20', 'SMA_50', 'RSI', 'BB_Width', 'BB_Position',
-            'Volatility', 'MACD', 'MACD_Histogram', 'Returns'
-        ]
+        valid, rules = _heuristic_rule_points(df)
+        labels = _classify_from_rules(valid, rules, df.index)['classification'].to_numpy()
         
-        available_features = [col for col in feature_cols if col in df.columns]
-        df_clean = df[available_features + ['Close']].dropna()
+        totals = {}
+        for cls, feature, points in rules:
+            decisive = valid & (labels == cls)
+            totals[feature] = totals.get(feature, 0) + int(points[decisive].sum())
         
-        if len(df_clean) < 50:
-            logger.warning("Dados insuficientes para treinar modelo de explicabilidade")
+        total_points = sum(totals.values())
+        if total_points == 0:
+            logger.warning("Nenhuma regra da heurística foi acionada no histórico")
             return {}
         
-        targets = []
-        for idx in range(len(df_clean)):
-            row_df = df_clean.iloc[:idx+1]
-            if len(row_df) > 0:
-                classification = classify_heuristic(row_df)['classification']
-                targets.append(classification)
-            else:
-                targets.append('Neutro')
+        contributions = {feature: points / total_points for feature, points in totals.items()}
+        return dict(sorted(contributions.items(), key=lambda x: x[1], reverse=True))
+    
+    except Exception as e:
+        logger.warning(f"Erro ao calcular contribuição das regras: {str(e)}")
+        return {}
+
+
+EXPLAIN_MODES = ('model', 'rules', 'budgeted')
+
+
+def prepare_training_data(df):
+    """
+    Monta a base de treino do modelo de explicabilidade.
+    
+    Args:
+        df (pd.DataFrame): DataFrame com indicadores calculados
+    
+    Returns:
+        tuple: (DataFrame com features, Close e coluna 'Target', lista de features),
+               ou (None, lista de features) se não houver dados suficientes
+    """
+    available_features = [col for col in FEATURE_COLUMNS if col in df.columns]
+    df_clean = df[available_features + ['Close']].dropna()
+    
+    if len(df_clean) < 50:
+        logger.warning("Dados insuficientes para treinar modelo de explicabilidade")
+        return None, available_features
+    
+    df_clean['Target'] = classify_heuristic_series(df_clean)['classification']
+    
+    return df_clean, available_features
+
+
+# Hiperparâmetros do Random Forest auxiliar (também identificam o modelo no cache)
+EXPLAINABILITY_MODEL_PARAMS = {'random_state': 42, 'max_depth': 10}
+
+
+def fit_explainability_model(X, y, n_estimators=100):
+    """
+    Ajusta o StandardScaler e o Random Forest auxiliar.
+    
+    Returns:
+        tuple: (scaler, modelo)
+    """
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    
+    rf = RandomForestClassifier(n_estimators=n_estimators, **EXPLAINABILITY_MODEL_PARAMS)
+    rf.fit(X_scaled, y)
+    
+    return scaler, rf
+
+
+def importances_to_dict(features, importances):
+    """Converte as importâncias do modelo em dicionário ordenado de forma decrescente."""
+    feature_importance = dict(zip(features, (float(value) for value in importances)))
+    return dict(sorted(feature_importance.items(), key=lambda x: x[1], reverse=True))
+
+
+def get_feature_importance(df, model_cache=None, pair=None):
+    """
+    Treina um modelo auxiliar (Random Forest) para explicabilidade das features.
+    
+    Args:
+        df (pd.DataFrame): DataFrame com indicadores calculados
+        model_cache (ExplainabilityModelCache, optional): Cache persistente de modelos;
+            quando informado, reaproveita ou estende o modelo já treinado
+        pair (str, optional): Par de moedas, que identifica o modelo no cache
+    
+    Returns:
+        dict: Dicionário com importância das features
+    """
+    try:
+        if model_cache is not None:
+            return model_cache.feature_importance(df, pair=pair)
         
-        df_clean['Target'] = targets
+        df_clean, available_features = prepare_training_data(df)
+        if df_clean is None:
+            return {}
         
         X = df_clean[available_features]
         y = df_clean['Target']
         
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
-        
-        rf = RandomForestClassifier(n_estimators=100, random_state=42, max_depth=10)
-        rf.fit(X_scaled, y)
+        scaler, rf = fit_explainability_model(X, y)
         
-        feature_importance = dict(zip(available_features, rf.feature_importances_))
-        
-        feature_importance = dict(sorted(feature_importance.items(), key=lambda x: x[1], reverse=True))
-        
-        return feature_importance
+        return importances_to_dict(available_features, rf.feature_importances_)
     
     except Exception as e:
         logger.warning(f"Erro ao calcular importância de features: {str(e)}")
         return {}
 
 
-def analyze_market(df):
+def get_feature_importance_budgeted(df, time_budget=2.0, budget_clock='wall', batch_trees=16,
+                                    max_trees=300, tolerance=0.005, n_jobs=-1):
     """
-    Função principal que executa análise completa do mercado.
+    Treina o Random Forest auxiliar dentro de um orçamento de tempo, em paralelo.
+    
+    As árvores são ajustadas em lotes (warm_start) usando todos os núcleos; a cada lote
+    as importâncias são comparadas com as do lote anterior. O treino para quando a maior
+    variação fica abaixo de tolerance (convergiu), quando o próximo lote estouraria o
+    orçamento ou quando max_trees é atingido.
     
     Args:
-        df (pd.DataFrame): DataFrame com dados OHLC
+        df (pd.DataFrame): DataFrame com indicadores calculados
+        time_budget (float): Orçamento em segundos
+        budget_clock (str): 'wall' (tempo de relógio) ou 'cpu' (tempo de CPU do processo, todas as threads)
+        batch_trees (int): Árvores adicionadas por lote
+        max_trees (int): Limite de árvores
+        tolerance (float): Variação máxima das importâncias entre lotes para considerar convergência
+        n_jobs (int): Núcleos usados no ajuste das árvores (-1 = todos)
     
     Returns:
-        dict: Dicionário completo com análise, classificação e explicabilidade
+        dict: Dicionário com 'feature_importance', 'n_estimators', 'converged',
+              'budget_exhausted' e 'elapsed_seconds'
     """
-    df_with_indicators = calculate_all_indicators(df)
+    clock = time.process_time if budget_clock == 'cpu' else time.perf_counter
+    start = clock()
+    report = {
+        'feature_importance': {},
+        'n_estimators': 0,
+        'converged': False,
+        'budget_exhausted': False,
+        'elapsed_seconds': 0.0,
+    }
+    
+    try:
+        df_clean, available_features = prepare_training_data(df)
+        if df_clean is None:
+            return report
+        
+        X_scaled = StandardScaler().fit_transform(df_clean[available_features])
+        y = df_clean['Target']
+        
+        rf = RandomForestClassifier(n_estimators=0, warm_start=True, n_jobs=n_jobs,
+                                    **EXPLAINABILITY_MODEL_PARAMS)
+        previous = None
+        while rf.n_estimators < max_trees:
+            batch_start = clock()
+            rf.set_params(n_estimators=min(rf.n_estimators + batch_trees, max_trees))
+            rf.fit(X_scaled, y)
+            batch_elapsed = clock() - batch_start
+            
+            importances = rf.feature_importances_
+            if previous is not None and np.max(np.abs(importances - previous)) < tolerance:
+                report['converged'] = True
+                break
+            previous = importances
+            
+            if clock() - start + batch_elapsed > time_budget:
+                report['budget_exhausted'] = True
+                break
+        
+        report['feature_importance'] = importances_to_dict(available_features, rf.feature_importances_)
+        report['n_estimators'] = rf.n_estimators
     
+    except Exception as e:
+        logger.warning(f"Erro ao calcular importância de features com orçamento: {str(e)}")
+    
+    report['elapsed_seconds'] = clock() - start
+    logger.info(
+        f"Explicabilidade com orçamento: {report['n_estimators']} árvores em "
+        f"{report['elapsed_seconds']:.3f}s ({budget_clock}); convergiu={report['converged']}"
+    )
+    return report
+
+
+def _build_analysis(df_with_indicators, model_cache=None, explain_mode='model', time_budget=2.0, pair=None):
+    """Classifica, explica e resume um DataFrame que já contém os indicadores."""
     classification = classify_heuristic(df_with_indicators)
     
-    feature_importance = get_feature_importance(df_with_indicators)
+    explainability = {'mode': explain_mode}
+    if explain_mode == 'rules':
+        feature_importance = get_rule_contributions(df_with_indicators)
+    elif explain_mode == 'budgeted':
+        report = get_feature_importance_budgeted(df_with_indicators, time_budget=time_budget)
+        feature_importance = report.pop('feature_importance')
+        explainability.update(report, budget_seconds=time_budget)
+    else:
+        feature_importance = get_feature_importance(df_with_indicators, model_cache=model_cache, pair=pair)
     
     latest = df_with_indicators.iloc[-1]
     indicators_summary = {
@@ -300,11 +693,133 @@ def analyze_market(df):
         'confidence': classification['confidence'],
         'explanation': classification['explanation'],
         'feature_contributions': feature_importance,
+        'explainability': explainability,
         'indicators_summary': indicators_summary,
         'latest_data': latest.to_dict()
     }
 
 
+def analyze_market(df, model_cache=None, explain_mode='model', time_budget=2.0, compact=False, pair=None,
+                   indicators=None):
+    """
+    Função principal que executa análise completa do mercado.
+    
+    Os indicadores são calculados pelo registro de indicadores. Por padrão são
+    todos os de calculate_all_indicators (latest_data completo, como em
+    analyze_markets); com indicators, só os que a classificação, a explicabilidade
+    do modo escolhido e o resumo consomem, mais os pedidos (indicators=[] calcula
+    o mínimo).
+    
+    Args:
+        df (pd.DataFrame): DataFrame com dados OHLC
+        model_cache (ExplainabilityModelCache, optional): Cache persistente do modelo de explicabilidade
+        explain_mode (str): 'model' (Random Forest auxiliar), 'rules' (atribuição exata das regras)
+            ou 'budgeted' (Random Forest paralelo limitado por time_budget)
+        time_budget (float): Orçamento em segundos do modo 'budgeted'
+        compact (bool): Calcula as colunas em float32, sem as colunas originais de df
+            (latest_data passa a conter só os indicadores)
+        pair (str, optional): Par de moedas, que identifica o modelo no model_cache
+        indicators (list, optional): Reduz o cálculo ao que a análise consome mais estes
+            indicadores em latest_data (ex.: ['SMA_200', 'Support']; [] = só o necessário)
+    
+    Returns:
+        dict: Dicionário completo com análise, classificação e explicabilidade
+    """
+    if explain_mode not in EXPLAIN_MODES:
+        raise ValueError(f"Modo de explicabilidade inválido: {explain_mode}. Use um de {EXPLAIN_MODES}")
+    
+    columns = ['Close'] + ALL_INDICATORS if indicators is None else analysis_columns(explain_mode, indicators)
+    if compact:
+        df_with_indicators = calculate_indicators_compact(df, columns)
+    else:
+        df_with_indicators = calculate_indicators(df, columns)
+    
+    return _build_analysis(df_with_indicators, model_cache=model_cache,
+                           explain_mode=explain_mode, time_budget=time_budget, pair=pair)
+
+
+def _align_panel(panel):
+    """
+    Monta uma matriz (candles × pares) por campo OHLC, alinhada pelo candle mais recente.
+    
+    Cada par ocupa as últimas len(df) linhas da sua coluna; o início é preenchido com NaN.
+    Assim nenhum par recebe lacunas vindas do calendário dos outros.
+    """
+    n_rows = max(len(df) for df in panel.values())
+    fields = {}
+    for col in ['Open', 'High', 'Low', 'Close']:
+        data = np.full((n_rows, len(panel)), np.nan)
+        for j, df in enumerate(panel.values()):
+            data[n_rows - len(df):, j] = df[col].to_numpy(dtype=float)
+        fields[col] = pd.DataFrame(data, columns=list(panel.keys()))
+    return fields
+
+
+def calculate_panel_indicators(panel):
+    """
+    Calcula os indicadores de calculate_all_indicators para vários pares de uma vez.
+    
+    Args:
+        panel (dict): Dicionário {par: DataFrame OHLC}
+    
+    Returns:
+        dict: Dicionário {coluna: DataFrame (candles × pares)} com campos OHLC e indicadores
+    """
+    fields = _align_panel(panel)
+    
+    # As funções de indicadores operam coluna a coluna, então recebem as matrizes inteiras
+    wide = calculate_all_indicators(fields)
+    
+    # delta.where(delta > 0, 0) transforma o preenchimento inicial em zeros;
+    # o RSI só é válido quando a janela de 14 contém apenas candles reais
+    real_bars = fields['Close'].notna().astype(float).rolling(window=14).sum()
+    wide['RSI'] = wide['RSI'].where(real_bars >= 14)
+    
+    return wide
+
+
+def analyze_markets(panel, model_cache=None, explain_mode='model', time_budget=2.0):
+    """
+    Executa a análise completa de vários pares com indicadores calculados em lote.
+    
+    Args:
+        panel (dict): Dicionário {par: DataFrame OHLC}, como retornado por fetch_forex_data
+        model_cache (ExplainabilityModelCache, optional): Cache persistente do modelo de explicabilidade
+        explain_mode (str): 'model' (Random Forest auxiliar), 'rules' (atribuição exata das regras)
+            ou 'budgeted' (Random Forest paralelo limitado por time_budget)
+        time_budget (float): Orçamento em segundos do modo 'budgeted'
+    
+    Returns:
+        dict: Dicionário {par: resultado no mesmo formato de analyze_market}
+    """
+    if explain_mode not in EXPLAIN_MODES:
+        raise ValueError(f"Modo de explicabilidade inválido: {explain_mode}. Use um de {EXPLAIN_MODES}")
+    
+    panel = {pair: df for pair, df in panel.items() if len(df) > 0}
+    if not panel:
+        return {}
+    
+    wide = calculate_panel_indicators(panel)
+    indicator_cols = [col for col in wide if col not in panel[next(iter(panel))].columns]
+    n_rows = len(wide['Close'])
+    
+    results = {}
+    for pair, df in panel.items():
+        rows = slice(n_rows - len(df), n_rows)
+        indicators = pd.DataFrame({col: wide[col][pair].to_numpy()[rows] for col in indicator_cols})
+        df_with_indicators = pd.concat([df.reset_index(drop=True), indicators], axis=1)
+        
+        try:
+            results[pair] = _build_analysis(df_with_indicators, model_cache=model_cache,
+                                            explain_mode=explain_mode, time_budget=time_budget,
+                                            pair=pair)
+        except Exception as e:
+            logger.error(f"Erro ao analisar {pair}: {str(e)}")
+    
+    logger.info(f"Análise em lote concluída para {len(results)}/{len(panel)} pares")
+    return results
+
+
 def display_dataframe_structure(df_raw, df_with_indicators):
     """
     Exibe a estrutura do DataFrame em formato tabular.
@@ -0,0 +1,227 @@
+"""
+Backtest vetorizado da heurística de classificação.
+Rotula todas as linhas do histórico de uma vez (classify_heuristic_series), junta
+os rótulos aos retornos futuros em horizontes configuráveis e resume, por classe,
+a taxa de acerto e a distribuição dos retornos.
+"""
+
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.analysis import (
+    HEURISTIC_CLASSES,
+    HEURISTIC_INDICATORS,
+    _heuristic_rule_points,
+    _classify_from_rules,
+    calculate_panel_indicators,
+)
+
+logger = logging.getLogger(__name__)
+
+# Horizontes padrão em candles (1 dia, 1 semana e 1 mês de pregão em dados diários)
+DEFAULT_HORIZONS = (1, 5, 20)
+
+RETURN_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def forward_returns(close, horizons=DEFAULT_HORIZONS):
+    """
+    Calcula o retorno de cada candle até h candles à frente, para cada horizonte.
+
+    Args:
+        close (pd.Series): Série de preços de fechamento
+        horizons (iterable): Horizontes em candles
+
+    Returns:
+        pd.DataFrame: Colunas 'Forward_Return_{h}' (NaN nas últimas h linhas)
+    """
+    prices = close.to_numpy(dtype=float)
+    n = len(prices)
+    returns = {}
+    for h in horizons:
+        values = np.full(n, np.nan)
+        if h < n:
+            values[:n - h] = prices[h:] / prices[:n - h] - 1
+        returns[f'Forward_Return_{h}'] = values
+    return pd.DataFrame(returns, index=close.index)
+
+
+def label_history(df, horizons=DEFAULT_HORIZONS):
+    """
+    Rotula todo o histórico e junta os retornos futuros.
+
+    Os indicadores usados pela heurística são calculados só quando ausentes em df
+    (pelo registro de indicadores, sem as colunas que a heurística não consome).
+
+    Args:
+        df (pd.DataFrame): DataFrame com dados OHLC, com ou sem indicadores
+        horizons (iterable): Horizontes em candles
+
+    Returns:
+        pd.DataFrame: Colunas 'classification', 'confidence', 'valid' e
+                      'Forward_Return_{h}', alinhadas ao índice de df
+    """
+    if not all(col in df.columns for col in HEURISTIC_INDICATORS):
+        from src.analysis.registry import default_registry
+        df = default_registry.compute(df, HEURISTIC_INDICATORS)
+
+    valid, rules = _heuristic_rule_points(df)
+    labels = _classify_from_rules(valid, rules, df.index)
+    labels['valid'] = valid
+    return pd.concat([labels, forward_returns(df['Close'], horizons)], axis=1)
+
+
+def _hits(classification, returns, typical_move):
+    """
+    Marca os acertos de cada rótulo para um horizonte.
+
+    - Tendência de Alta: retorno futuro positivo
+    - Tendência de Baixa: retorno futuro negativo
+    - Alta Volatilidade: movimento absoluto acima da mediana de todo o período
+    - Neutro: movimento absoluto até essa mediana
+    """
+    moves = np.abs(returns)
+    return np.select(
+        [classification == 'Tendência de Alta',
+         classification == 'Tendência de Baixa',
+         classification == 'Alta Volatilidade'],
+        [returns > 0, returns < 0, moves > typical_move],
+        default=moves <= typical_move,
+    )
+
+
+def _distribution(returns):
+    """Estatísticas de uma amostra de retornos (NaN quando vazia)."""
+    if len(returns) == 0:
+        stats = {'mean_return': np.nan, 'std_return': np.nan}
+        stats.update({f'p{int(q * 100):02d}': np.nan for q in RETURN_QUANTILES})
+        return stats
+    stats = {
+        'mean_return': float(returns.mean()),
+        'std_return': float(returns.std(ddof=1)) if len(returns) > 1 else np.nan,
+    }
+    quantiles = np.quantile(returns, RETURN_QUANTILES)
+    stats.update({f'p{int(q * 100):02d}': float(v) for q, v in zip(RETURN_QUANTILES, quantiles)})
+    return stats
+
+
+def summarize_backtest(labels, horizons=DEFAULT_HORIZONS):
+    """
+    Resume o backtest por classe e horizonte.
+
+    Args:
+        labels (pd.DataFrame): Saída de label_history (ou a concatenação de várias)
+        horizons (iterable): Horizontes em candles
+
+    Returns:
+        dict: {horizonte: {classe: {'count', 'share', 'hit_rate', 'mean_return',
+               'std_return', 'p05', 'p25', 'p50', 'p75', 'p95'}}}, incluindo a
+               chave 'Todos' com a distribuição incondicional do período
+    """
+    valid = labels['valid'].to_numpy(dtype=bool)
+    classification = labels['classification'].to_numpy()
+
+    summary = {}
+    for h in horizons:
+        returns = labels[f'Forward_Return_{h}'].to_numpy(dtype=float)
+        usable = valid & ~np.isnan(returns)
+        returns = returns[usable]
+        classes = classification[usable]
+        typical_move = float(np.median(np.abs(returns))) if len(returns) else np.nan
+        hits = _hits(classes, returns, typical_move)
+
+        by_class = {}
+        for cls in HEURISTIC_CLASSES:
+            mask = classes == cls
+            count = int(mask.sum())
+            stats = {
+                'count': count,
+                'share': count / len(returns) if len(returns) else np.nan,
+                'hit_rate': float(hits[mask].mean()) if count else np.nan,
+            }
+            stats.update(_distribution(returns[mask]))
+            by_class[cls] = stats
+
+        overall = {'count': int(len(returns)), 'share': 1.0 if len(returns) else np.nan,
+                   'hit_rate': np.nan, 'typical_move': typical_move}
+        overall.update(_distribution(returns))
+        by_class['Todos'] = overall
+        summary[h] = by_class
+    return summary
+
+
+def backtest_heuristic(df, horizons=DEFAULT_HORIZONS):
+    """
+    Executa o backtest da heurística sobre um histórico.
+
+    Args:
+        df (pd.DataFrame): DataFrame com dados OHLC, com ou sem indicadores
+        horizons (iterable): Horizontes em candles
+
+    Returns:
+        dict: {'labels': DataFrame de label_history, 'summary': saída de summarize_backtest}
+    """
+    horizons = tuple(horizons)
+    labels = label_history(df, horizons)
+    summary = summarize_backtest(labels, horizons)
+    logger.info(f"Backtest concluído: {int(labels['valid'].sum())} candles rotulados, horizontes {horizons}")
+    return {'labels': labels, 'summary': summary}
+
+
+def _label_pair(indicators, horizons):
+    """Rotula um par e resume o resultado (executado nos processos de backtest_markets)."""
+    labels = label_history(indicators, horizons)
+    return {'labels': labels, 'summary': summarize_backtest(labels, horizons)}
+
+
+def backtest_markets(panel, horizons=DEFAULT_HORIZONS, max_workers=None):
+    """
+    Executa o backtest de vários pares com indicadores calculados em lote.
+
+    Os indicadores saem de uma única chamada de calculate_panel_indicators; a rotulação
+    (dominada pelo rank e pelo quantil expansivos) é independente por par e roda em
+    processos separados.
+
+    Args:
+        panel (dict): Dicionário {par: DataFrame OHLC}
+        horizons (iterable): Horizontes em candles
+        max_workers (int, optional): Processos usados na rotulação (padrão: núcleos
+            disponíveis, limitado ao número de pares; 1 executa no processo atual)
+
+    Returns:
+        dict: {'pairs': {par: resultado de backtest_heuristic},
+               'overall': summarize_backtest de todos os pares juntos}
+    """
+    horizons = tuple(horizons)
+    panel = {pair: df for pair, df in panel.items() if len(df) > 0}
+    if not panel:
+        return {'pairs': {}, 'overall': {}}
+
+    wide = calculate_panel_indicators(panel)
+    n_rows = len(wide['Close'])
+
+    jobs = {}
+    for pair, df in panel.items():
+        rows = slice(n_rows - len(df), n_rows)
+        jobs[pair] = pd.DataFrame(
+            {col: wide[col][pair].to_numpy()[rows] for col in HEURISTIC_INDICATORS},
+            index=df.index
+        )
+    del wide
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    if max_workers == 1:
+        pairs = {pair: _label_pair(indicators, horizons) for pair, indicators in jobs.items()}
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = {pair: executor.submit(_label_pair, indicators, horizons)
+                       for pair, indicators in jobs.items()}
+            pairs = {pair: future.result() for pair, future in futures.items()}
+
+    combined = pd.concat([result['labels'] for result in pairs.values()], ignore_index=True)
+    logger.info(f"Backtest em lote concluído para {len(pairs)} pares ({max_workers} processos)")
+    return {'pairs': pairs, 'overall': summarize_backtest(combined, horizons)}
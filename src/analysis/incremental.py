@@ -0,0 +1,269 @@
+"""
+Motor incremental de indicadores técnicos.
+Atualiza todos os indicadores de calculate_all_indicators a cada novo candle em O(1),
+usando somas móveis e estado de EMA em vez de recalcular o histórico inteiro.
+"""
+
+import math
+from collections import deque
+import logging
+
+import numpy as np
+
+from src.analysis.analysis import calculate_macd
+
+logger = logging.getLogger(__name__)
+
+INDICATOR_COLUMNS = [
+    'SMA_20', 'SMA_50', 'SMA_200', 'RSI',
+    'BB_Upper', 'BB_Middle', 'BB_Lower', 'BB_Width', 'BB_Position',
+    'Volatility', 'MACD', 'MACD_Signal', 'MACD_Histogram',
+    'Support', 'Resistance', 'Returns', 'Trend_20', 'Trend_50'
+]
+
+# Maior janela usada pelos indicadores (SMA_200) + 1 candle para o diff/retorno
+WARMUP_BARS = 201
+
+
+class _RollingStats:
+    """
+    Média e variância de uma janela fixa, com inclusão e remoção em O(1).
+
+    Como o rolling do pandas, conta os valores iguais seguidos: com a janela inteira
+    num mesmo valor, a média é esse valor e o desvio é zero, exatos (as remoções do
+    Welford deixariam um resíduo, e o RSI de um preço parado viraria um número).
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.nobs = 0
+        self.mean = 0.0
+        self.ssqdm = 0.0
+        self._last = None
+        self._same = 0
+
+    def push(self, value):
+        self.values.append(value)
+        if not math.isnan(value):
+            self._add(value)
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if not math.isnan(old):
+                self._remove(old)
+
+    def _add(self, value):
+        self._same = self._same + 1 if value == self._last else 1
+        self._last = value
+        self.nobs += 1
+        delta = value - self.mean
+        self.mean += delta / self.nobs
+        self.ssqdm += ((self.nobs - 1) * delta ** 2) / self.nobs
+
+    def _remove(self, value):
+        self.nobs -= 1
+        if self.nobs == 0:
+            self.mean = 0.0
+            self.ssqdm = 0.0
+            return
+        delta = value - self.mean
+        self.mean -= delta / self.nobs
+        self.ssqdm -= ((self.nobs + 1) * delta ** 2) / self.nobs
+
+    def get_mean(self):
+        """Média da janela (NaN enquanto a janela não estiver completa)."""
+        if self.nobs < self.window:
+            return np.nan
+        if self._same >= self.nobs:
+            return self._last
+        return self.mean
+
+    def get_std(self):
+        """Desvio padrão amostral da janela (NaN enquanto a janela não estiver completa)."""
+        if self.nobs < self.window or self.nobs < 2:
+            return np.nan
+        if self._same >= self.nobs:
+            return 0.0
+        return math.sqrt(max(self.ssqdm, 0.0) / (self.nobs - 1))
+
+
+class _RollingExtreme:
+    """Mínimo ou máximo de uma janela fixa via deque monotônico (O(1) amortizado)."""
+
+    def __init__(self, window, mode='min'):
+        self.window = window
+        self.mode = mode
+        self.candidates = deque()
+        self.position = 0
+
+    def push(self, value):
+        if self.mode == 'min':
+            while self.candidates and self.candidates[-1][1] >= value:
+                self.candidates.pop()
+        else:
+            while self.candidates and self.candidates[-1][1] <= value:
+                self.candidates.pop()
+        self.candidates.append((self.position, value))
+        self.position += 1
+        while self.candidates[0][0] <= self.position - 1 - self.window:
+            self.candidates.popleft()
+
+    def get(self):
+        """Extremo da janela (NaN enquanto a janela não estiver completa)."""
+        if self.position < self.window:
+            return np.nan
+        return self.candidates[0][1]
+
+
+def _ewm_step(previous, value, span):
+    """Um passo de ewm(span, adjust=False).mean(), na mesma aritmética do pandas."""
+    if previous is None:
+        return value
+    alpha = 2.0 / (span + 1.0)
+    if previous == value:
+        return previous
+    return ((1 - alpha) * previous + alpha * value) / ((1 - alpha) + alpha)
+
+
+class IncrementalIndicators:
+    """
+    Mantém o estado dos indicadores e os atualiza candle a candle.
+
+    Os resultados de update() equivalem à última linha de calculate_all_indicators
+    aplicada ao histórico completo (até a tolerância de ponto flutuante).
+    Suporte e Resistência usam janela centralizada: na última linha são sempre NaN,
+    como no cálculo em lote; o último nível já fechado fica em centered_levels.
+    """
+
+    def __init__(self):
+        self._sma = {20: _RollingStats(20), 50: _RollingStats(50), 200: _RollingStats(200)}
+        self._gain = _RollingStats(14)
+        self._loss = _RollingStats(14)
+        self._returns = _RollingStats(20)
+        self._support = _RollingExtreme(20, 'min')
+        self._resistance = _RollingExtreme(20, 'max')
+
+        self._ema_fast = None
+        self._ema_slow = None
+        self._macd_signal = None
+        self._prev_close = None
+        self._prev_sma_20 = np.nan
+        self._prev_sma_50 = np.nan
+
+        self.n_bars = 0
+        self.latest = None
+        self.centered_levels = None
+
+    @classmethod
+    def from_history(cls, df):
+        """
+        Aquece o motor a partir de um histórico OHLC.
+
+        As EMAs do MACD são calculadas em lote sobre o início do histórico e apenas
+        os últimos WARMUP_BARS candles são reproduzidos candle a candle.
+
+        Args:
+            df (pd.DataFrame): DataFrame com dados OHLC
+
+        Returns:
+            IncrementalIndicators: Motor pronto para receber novos candles
+        """
+        engine = cls()
+        start = max(len(df) - WARMUP_BARS, 0)
+
+        if start > 0:
+            head = df.iloc[:start]
+            close = head['Close']
+            engine._ema_fast = float(close.ewm(span=12, adjust=False).mean().iloc[-1])
+            engine._ema_slow = float(close.ewm(span=26, adjust=False).mean().iloc[-1])
+            engine._macd_signal = float(calculate_macd(head)[1].iloc[-1])
+            engine._prev_close = float(close.iloc[-1])
+            engine.n_bars = start
+
+        for bar in df.iloc[start:].to_dict('records'):
+            engine.update(bar)
+
+        logger.debug(f"Motor incremental aquecido com {len(df)} candles")
+        return engine
+
+    def update(self, bar):
+        """
+        Incorpora um novo candle e retorna os indicadores da linha mais recente.
+
+        Args:
+            bar (dict): Candle com Close, High e Low (demais campos são repassados)
+
+        Returns:
+            dict: Campos do candle acrescidos das colunas de calculate_all_indicators
+        """
+        close = float(bar['Close'])
+
+        if self._prev_close is None:
+            delta = np.nan
+            returns = np.nan
+        else:
+            delta = close - self._prev_close
+            returns = close / self._prev_close - 1
+
+        # delta.where(delta > 0, 0): o primeiro delta (NaN) entra como zero
+        self._gain.push(delta if delta > 0 else 0.0)
+        self._loss.push(-delta if delta < 0 else 0.0)
+        self._returns.push(returns)
+        for stats in self._sma.values():
+            stats.push(close)
+        self._support.push(float(bar['Low']))
+        self._resistance.push(float(bar['High']))
+
+        self._ema_fast = _ewm_step(self._ema_fast, close, 12)
+        self._ema_slow = _ewm_step(self._ema_slow, close, 26)
+        macd = self._ema_fast - self._ema_slow
+        self._macd_signal = _ewm_step(self._macd_signal, macd, 9)
+
+        sma_20 = self._sma[20].get_mean()
+        sma_50 = self._sma[50].get_mean()
+        std_20 = self._sma[20].get_std()
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = np.float64(self._gain.get_mean()) / np.float64(self._loss.get_mean())
+            rsi = 100 - (100 / (1 + rs))
+            bb_upper = sma_20 + (std_20 * 2)
+            bb_lower = sma_20 - (std_20 * 2)
+            bb_position = np.float64(close - bb_lower) / np.float64(bb_upper - bb_lower)
+
+        row = dict(bar)
+        row.update({
+            'SMA_20': sma_20,
+            'SMA_50': sma_50,
+            'SMA_200': self._sma[200].get_mean(),
+            'RSI': float(rsi),
+            'BB_Upper': bb_upper,
+            'BB_Middle': sma_20,
+            'BB_Lower': bb_lower,
+            'BB_Width': bb_upper - bb_lower,
+            'BB_Position': float(bb_position),
+            'Volatility': self._returns.get_std() * np.sqrt(252) * 100,
+            'MACD': macd,
+            'MACD_Signal': self._macd_signal,
+            'MACD_Histogram': macd - self._macd_signal,
+            'Support': np.nan,
+            'Resistance': np.nan,
+            'Returns': returns,
+            'Trend_20': sma_20 - self._prev_sma_20,
+            'Trend_50': sma_50 - self._prev_sma_50,
+        })
+
+        # Janela centralizada de 20: o nível da linha n-10 fecha quando chega a linha n
+        if not math.isnan(self._support.get()):
+            self.centered_levels = {
+                'index': self.n_bars - 9,
+                'Support': self._support.get(),
+                'Resistance': self._resistance.get(),
+            }
+
+        self._prev_close = close
+        self._prev_sma_20 = sma_20
+        self._prev_sma_50 = sma_50
+        self.n_bars += 1
+        self.latest = row
+
+        return row
@@ -0,0 +1,324 @@
+"""
+Kernel de momentos móveis sobre arrays NumPy contíguos.
+Calcula soma, soma dos quadrados, mínimo e máximo em janelas fixas para vários
+tamanhos de janela de uma só vez, servindo de base para SMA, Bollinger,
+volatilidade e suporte/resistência.
+"""
+
+import numpy as np
+
+ROLLING_STATS = ('sum', 'sumsq', 'min', 'max')
+
+_IDENTITY = {np.add: 0.0, np.minimum: np.inf, np.maximum: -np.inf}
+
+# Tamanho mínimo dos blocos das somas: linhas longas mantêm as operações vetorizadas
+# eficientes, e o erro de arredondamento continua limitado a poucas centenas de termos
+MIN_SUM_BLOCK = 256
+
+
+def _pad_blocks(values, block, fill):
+    """
+    Preenche o início do array até um múltiplo de block e o divide em blocos.
+
+    Os blocos são ancorados no fim do array: séries alinhadas pelo candle mais recente
+    (como no painel de analyze_markets) recebem exatamente as mesmas somas parciais
+    que receberiam isoladas.
+    """
+    n = values.shape[0]
+    n_blocks = -(-n // block)
+    padding = n_blocks * block - n
+    padded = np.empty((n_blocks * block,) + values.shape[1:])
+    padded[:padding] = fill
+    padded[padding:] = values
+    return padded.reshape((n_blocks, block) + values.shape[1:]), padding
+
+
+class _BlockPrefix:
+    """
+    Somas de prefixo reiniciadas a cada bloco, compartilhadas por todas as janelas.
+
+    Com blocos do tamanho da maior janela, toda janela fica dentro de um bloco ou
+    atravessa dois blocos vizinhos: a soma sai de uma subtração de prefixos ou, quando
+    atravessa, do prefixo do bloco atual mais um sufixo do anterior (ver _suffix_sums).
+    Cada termo acumula no máximo block valores, o que limita o erro de arredondamento
+    ao tamanho do bloco.
+    """
+
+    def __init__(self, padded, padding, block):
+        blocks = padded.reshape((-1, block) + padded.shape[1:])
+        self.block = block
+        self.padding = padding
+        self.n = padded.shape[0] - padding
+        self.prefix = np.add.accumulate(blocks, axis=1, out=blocks)
+
+    def window_sum(self, window, tails):
+        """
+        Soma de cada janela de tamanho window terminando em cada posição
+        (NaN antes da primeira); tails são os sufixos de _suffix_sums, com window - 1
+        colunas ou mais.
+        """
+        prefix, block = self.prefix, self.block
+        if window > self.n:
+            return np.full((self.n,) + prefix.shape[2:], np.nan)
+
+        result = np.empty_like(prefix)
+        # Janela dentro do bloco: termina na posição r >= window - 1
+        result[:, window - 1] = prefix[:, window - 1]
+        np.subtract(prefix[:, window:], prefix[:, :block - window], out=result[:, window:])
+        # Janela que atravessa: sufixo do bloco anterior + prefixo do atual
+        if window > 1:
+            np.add(tails[:, tails.shape[1] - window + 1:], prefix[1:, :window - 1], out=result[1:, :window - 1])
+
+        result = result.reshape((-1,) + prefix.shape[2:])
+        result[:self.padding + window - 1] = np.nan
+        return result[self.padding:]
+
+
+def _count_prefix(indicator):
+    """Contagem acumulada exata (inteira) de um indicador booleano, com zero inicial."""
+    counts = np.zeros((indicator.shape[0] + 1,) + indicator.shape[1:], dtype=np.int64)
+    np.cumsum(indicator, axis=0, out=counts[1:])
+    return counts
+
+
+def _flat_runs(values):
+    """
+    Trechos de valores repetidos (2 ou mais iguais seguidos) de cada coluna.
+
+    Parte só das posições com repetição, então custa pouco em séries de preço comuns.
+
+    Returns:
+        list: Um par (inícios, fins) de arrays com índices inclusivos por coluna
+    """
+    if values.shape[0] < 2:
+        empty = np.empty(0, dtype=np.intp)
+        return [(empty, empty)] * int(np.prod(values.shape[1:], dtype=np.intp))
+
+    repeats = values[1:] == values[:-1]
+    runs = []
+    for column in repeats.reshape(repeats.shape[0], -1).T:
+        positions = np.flatnonzero(column)
+        breaks = np.flatnonzero(np.diff(positions) != 1)
+        starts = positions[np.concatenate(([0], breaks + 1))] if positions.size else positions
+        ends = positions[np.concatenate((breaks, [positions.size - 1]))] + 1 if positions.size else positions
+        runs.append((starts, ends))
+    return runs
+
+
+def _constant_windows(runs, shape, window):
+    """Marca as janelas de tamanho window contidas em um único trecho de valores repetidos."""
+    if window == 1:
+        return np.ones(shape, dtype=bool)
+    constant = np.zeros((shape[0], len(runs)), dtype=bool)
+    for j, (starts, ends) in enumerate(runs):
+        long_runs = (ends - starts + 1) >= window
+        if not long_runs.any():
+            continue
+        marks = np.zeros(shape[0] + 1, dtype=np.int8)
+        # Trechos são disjuntos: a contagem acumulada só assume 0 ou 1
+        marks[starts[long_runs] + window - 1] = 1
+        marks[ends[long_runs] + 1] = -1
+        constant[:, j] = np.cumsum(marks[:-1], dtype=np.int8).astype(bool)
+    return constant.reshape(shape)
+
+
+def _block_scan(values, window, ufunc):
+    """
+    Aplica mínimo ou máximo a todas as janelas de tamanho window.
+
+    O array é dividido em blocos de tamanho window; cada janela cobre o sufixo de um
+    bloco e o prefixo do seguinte, então bastam um accumulate para frente e outro
+    para trás (algoritmo de van Herk/Gil-Werman), em O(n) para qualquer janela.
+    NaN dentro da janela propaga para o resultado (equivale a min_periods=window).
+    """
+    n = values.shape[0]
+    if window > n:
+        return np.full(values.shape, np.nan)
+
+    blocks, padding = _pad_blocks(values, window, _IDENTITY[ufunc])
+    prefix = ufunc.accumulate(blocks, axis=1)
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1]
+
+    # A janela que termina na posição r-1 do bloco b+1 começa na posição r do bloco b;
+    # a que termina na última posição de um bloco é o próprio bloco
+    result = np.empty_like(blocks)
+    ufunc(suffix[:-1, 1:], prefix[1:, :-1], out=result[1:, :-1])
+    result[:, -1] = suffix[:, 0]
+
+    result = result.reshape((-1,) + values.shape[1:])
+    result[:padding + window - 1] = np.nan
+    return result[padding:]
+
+
+def _block_shifts(values, missing, padding, block):
+    """Primeiro valor não-NaN de cada bloco de somas, por coluna (0 se não houver)."""
+    valid = np.zeros((values.shape[0] + padding,) + values.shape[1:], dtype=bool)
+    valid[padding:] = ~missing
+    valid = valid.reshape((-1, block) + values.shape[1:])
+    blocks = np.arange(valid.shape[0]).reshape((-1,) + (1,) * (values.ndim - 1))
+    rows = np.clip(blocks * block + np.argmax(valid, axis=1) - padding, 0, max(values.shape[0] - 1, 0))
+    return np.where(valid.any(axis=1), np.take_along_axis(values, rows, axis=0), 0.0)
+
+
+def _suffix_sums(edges):
+    """Somas de cada posição até o fim do bloco, para blocos no formato (blocos, posições, ...)."""
+    return np.add.accumulate(edges[:, ::-1], axis=1)[:, ::-1]
+
+
+def rolling_moments(values, windows, stats=ROLLING_STATS):
+    """
+    Calcula estatísticas móveis para vários tamanhos de janela em uma chamada.
+
+    'sum' e 'sumsq' de todas as janelas saem de um único accumulate por estatística
+    (ver _BlockPrefix). Antes das somas, os valores de cada bloco são deslocados pelo
+    primeiro valor válido do bloco, o que reduz o cancelamento numérico no cálculo da
+    variância: mesmo em séries com tendência forte os valores ficam perto do
+    deslocamento, e as janelas que atravessam blocos são corrigidas para o
+    deslocamento do bloco em que terminam. O deslocamento não depende de NaN de
+    preenchimento no início, então é o mesmo para uma série isolada e dentro de um painel.
+
+    ±inf é tratado como NaN (como no rolling do pandas): a janela que o contém é NaN
+    e as demais não são afetadas.
+
+    Args:
+        values (array-like): Série 1D ou matriz 2D (candles × séries)
+        windows (iterable): Tamanhos de janela
+        stats (iterable): Subconjunto de ROLLING_STATS a calcular
+
+    Returns:
+        dict: {'shift': deslocamento aplicado em cada linha, 'values': valores (±inf como NaN),
+               janela: {estatística: array}}. 'sum' e 'sumsq' referem-se aos valores
+               deslocados; junto com elas vem 'constant', que marca as janelas
+               com todos os valores iguais. Janelas incompletas ou com NaN são NaN
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    infinite = np.isinf(values)
+    if infinite.any():
+        values = np.where(infinite, np.nan, values)
+    windows = list(windows)
+    stats = set(stats)
+    n = values.shape[0]
+
+    output = {'shift': 0.0, 'values': values}
+
+    sums = {}
+    if stats & {'sum', 'sumsq'} and windows:
+        missing = np.isnan(values)
+        nan_counts = _count_prefix(missing) if missing.any() else None
+        block = max(max(windows), MIN_SUM_BLOCK)
+        padding = -n % block
+        shifts = _block_shifts(values, missing, padding, block)
+        output['shift'] = np.repeat(shifts, block, axis=0)[padding:]
+
+        def padded_buffer():
+            buffer = np.empty((n + padding,) + values.shape[1:])
+            buffer[:padding] = 0.0
+            return buffer
+
+        # Valores deslocados escritos direto no buffer em blocos (sem cópia extra)
+        centered = padded_buffer()
+        np.subtract(values, output['shift'], out=centered[padding:])
+        if nan_counts is not None:
+            centered[padding:][missing] = 0.0
+
+        # Fim de cada bloco no deslocamento do bloco seguinte: a janela que atravessa
+        # soma esse sufixo ao prefixo do bloco em que termina, tudo no mesmo deslocamento.
+        # Posições NaN (zeradas) e de preenchimento também ganham o passo entre os
+        # deslocamentos, mas as janelas que as contêm saem NaN de qualquer forma
+        span = max([window - 1 for window in windows if window <= n], default=0)
+        steps = shifts[:-1] - shifts[1:]
+        edges = centered.reshape((-1, block) + values.shape[1:])[:-1, block - span:] + steps[:, None]
+        tails = {'sum': _suffix_sums(edges)} if 'sum' in stats else {}
+        if 'sumsq' in stats:
+            edges *= edges
+            tails['sumsq'] = _suffix_sums(edges)
+        del edges
+        if 'sumsq' in stats:
+            squared = padded_buffer()
+            np.multiply(centered, centered, out=squared)
+            sums['sumsq'] = _BlockPrefix(squared, padding, block)
+        if 'sum' in stats:
+            sums['sum'] = _BlockPrefix(centered, padding, block)
+        del centered
+        runs = _flat_runs(values)
+
+    for window in windows:
+        moments = {}
+        if sums:
+            for stat, prefix in sums.items():
+                moments[stat] = prefix.window_sum(window, tails[stat])
+
+            constant = _constant_windows(runs, values.shape, window)
+            if nan_counts is not None and window <= n:
+                has_nan = np.zeros(values.shape, dtype=bool)
+                has_nan[window - 1:] = nan_counts[window:] != nan_counts[:n - window + 1]
+                for stat in sums:
+                    moments[stat][has_nan] = np.nan
+                constant &= ~has_nan
+            moments['constant'] = constant
+
+        if 'min' in stats:
+            moments['min'] = _block_scan(values, window, np.minimum)
+        if 'max' in stats:
+            moments['max'] = _block_scan(values, window, np.maximum)
+        output[window] = moments
+    return output
+
+
+def moments_to_mean(result, window):
+    """Média móvel a partir de 'sum' (janelas constantes retornam o próprio valor, como no pandas)."""
+    moments = result[window]
+    mean = moments['sum'] / window
+    mean += result['shift']
+    constant = moments['constant']
+    if constant.any():
+        mean[constant] = result['values'][constant]
+    return mean
+
+
+def moments_to_std(result, window):
+    """Desvio padrão amostral móvel a partir de 'sum' e 'sumsq' (zero em janelas constantes)."""
+    moments = result[window]
+    if window < 2:
+        return np.full(moments['sum'].shape, np.nan)
+    with np.errstate(invalid='ignore'):
+        variance = moments['sum'] * moments['sum']
+        variance /= -window
+        variance += moments['sumsq']
+        variance /= window - 1
+        np.maximum(variance, 0.0, out=variance)
+        std = np.sqrt(variance, out=variance)
+    if moments['constant'].any():
+        std[moments['constant']] = 0.0
+    return std
+
+
+def rolling_mean(values, window):
+    """Média móvel de values (NaN até a janela estar completa)."""
+    return moments_to_mean(rolling_moments(values, [window], stats=('sum',)), window)
+
+
+def rolling_std(values, window):
+    """Desvio padrão amostral móvel de values (NaN até a janela estar completa)."""
+    return moments_to_std(rolling_moments(values, [window], stats=('sum', 'sumsq')), window)
+
+
+def rolling_min(values, window, center=False):
+    """Mínimo móvel; com center=True segue o alinhamento de rolling(center=True) do pandas."""
+    result = rolling_moments(values, [window], stats=('min',))[window]['min']
+    return _center(result, window) if center else result
+
+
+def rolling_max(values, window, center=False):
+    """Máximo móvel; com center=True segue o alinhamento de rolling(center=True) do pandas."""
+    result = rolling_moments(values, [window], stats=('max',))[window]['max']
+    return _center(result, window) if center else result
+
+
+def _center(trailing, window):
+    """Converte um resultado de janela à direita em janela centralizada."""
+    offset = (window - 1) // 2
+    centered = np.full(trailing.shape, np.nan)
+    if offset < trailing.shape[0]:
+        centered[:trailing.shape[0] - offset] = trailing[offset:]
+    return centered
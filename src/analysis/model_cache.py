@@ -0,0 +1,207 @@
+"""
+Cache persistente do modelo de explicabilidade.
+Guarda em disco o scaler, o Random Forest e as importâncias das features,
+evitando retreinar do zero quando o histórico não mudou ou só ganhou novos candles.
+"""
+
+import os
+import re
+import time
+import pickle
+import hashlib
+import logging
+
+import numpy as np
+
+from src.analysis.analysis import (
+    EXPLAINABILITY_MODEL_PARAMS,
+    prepare_training_data,
+    fit_explainability_model,
+    importances_to_dict,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "explainability")
+
+
+def _fingerprint(data, features):
+    """Hash SHA-256 das linhas de treino e da lista de features."""
+    digest = hashlib.sha256()
+    digest.update("|".join(features).encode("utf-8"))
+    digest.update(np.ascontiguousarray(data).tobytes())
+    return digest.hexdigest()
+
+
+class ExplainabilityModelCache:
+    """
+    Cache em disco de modelos de explicabilidade, uma entrada por par de moedas.
+
+    A entrada é identificada pelo par, pelas features e pelos hiperparâmetros do
+    modelo (não pelos dados, que mudam a cada execução); os dados decidem o que
+    fazer com ela. O último candle ainda está em formação (o preço ao vivo muda
+    entre execuções) e fica fora da comparação:
+
+    - Candles fechados idênticos aos do modelo salvo: reutiliza as importâncias
+      sem treinar.
+    - Candles fechados salvos formam um bloco contínuo dos novos, que podem ter
+      perdido candles no início (janela móvel de main.py) e ganhado no fim: warm
+      start, adicionando warm_trees árvores ao modelo existente (warm_start=True).
+      O bloco é comparado pelo Close: os indicadores das primeiras linhas variam
+      com o início da janela (aquecimento das EMAs) sem que o mercado tenha mudado.
+    - Qualquer outra mudança (histórico revisado, bloco em comum menor que metade
+      do salvo) ou modelo acima de max_estimators árvores: treino do zero.
+
+    As árvores antigas foram ajustadas quase nas mesmas linhas; as novas usam a
+    janela atual. Cada novo treino substitui a entrada do par, e entradas do mesmo
+    par com outras features ou hiperparâmetros são removidas.
+    """
+
+    def __init__(self, cache_dir=None, warm_trees=20, max_estimators=300):
+        self.cache_dir = cache_dir or os.getenv("FOREX_MODEL_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.warm_trees = warm_trees
+        self.max_estimators = max_estimators
+        self.stats = {
+            'hits': 0,
+            'warm_starts': 0,
+            'cold_fits': 0,
+            'evictions': 0,
+            'last_mode': None,
+            'last_fit_seconds': None,
+            'cold_fit_seconds': None,
+            'warm_fit_seconds': None,
+        }
+
+    def _entry_prefix(self, pair):
+        return re.sub(r'[^A-Za-z0-9]+', '_', pair or 'default').strip('_') + '_'
+
+    def _entry_path(self, pair, features):
+        params = sorted(EXPLAINABILITY_MODEL_PARAMS.items())
+        lineage = hashlib.sha256(f"{features}|{params}".encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{self._entry_prefix(pair)}{lineage}.pkl")
+
+    def _evict_superseded(self, pair, path):
+        """Remove as entradas do par gravadas com outras features ou hiperparâmetros."""
+        prefix = self._entry_prefix(pair)
+        for name in os.listdir(self.cache_dir):
+            stale = os.path.join(self.cache_dir, name)
+            if name.startswith(prefix) and name.endswith('.pkl') and stale != path:
+                try:
+                    os.remove(stale)
+                    self.stats['evictions'] += 1
+                except OSError as e:
+                    logger.warning(f"Falha ao remover entrada antiga do cache de modelo ({stale}): {str(e)}")
+
+    def _load(self, path):
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Entrada de cache de modelo ilegível ({path}): {str(e)}. Ignorando.")
+            return None
+
+    def _save(self, path, entry):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def _can_warm_start(self, entry, closes, features, y):
+        cached = entry.get('closes')
+        if cached is None or entry['features'] != features:
+            return False
+        if entry['model'].n_estimators + self.warm_trees > self.max_estimators:
+            return False
+        if set(np.unique(y)) != set(entry['model'].classes_):
+            return False
+        # Bloco salvo = cached[start:], que precisa reaparecer no início dos novos candles
+        for start in np.flatnonzero(cached == closes[0]):
+            overlap = len(cached) - start
+            if 2 * overlap < len(cached):
+                break
+            if overlap <= len(closes) and np.array_equal(cached[start:], closes[:overlap]):
+                return True
+        return False
+
+    def _record(self, mode, elapsed):
+        self.stats['last_mode'] = mode
+        self.stats['last_fit_seconds'] = elapsed
+        if mode == 'cold':
+            self.stats['cold_fits'] += 1
+            self.stats['cold_fit_seconds'] = elapsed
+        elif mode == 'warm':
+            self.stats['warm_starts'] += 1
+            self.stats['warm_fit_seconds'] = elapsed
+        else:
+            self.stats['hits'] += 1
+
+    def feature_importance(self, df, pair=None):
+        """
+        Retorna a importância das features, reutilizando o modelo salvo sempre que possível.
+
+        Args:
+            df (pd.DataFrame): DataFrame com indicadores calculados
+            pair (str, optional): Par de moedas dos dados (identifica a entrada)
+
+        Returns:
+            dict: Dicionário com importância das features
+        """
+        df_clean, features = prepare_training_data(df)
+        if df_clean is None:
+            return {}
+
+        # Só os candles fechados identificam os dados; o último ainda está em formação
+        closed = df_clean[features + ['Close']].to_numpy(dtype=np.float64)[:-1]
+        fingerprint = _fingerprint(closed, features)
+        path = self._entry_path(pair, features)
+        entry = self._load(path)
+
+        if entry is not None and entry['fingerprint'] == fingerprint:
+            self._record('hit', 0.0)
+            logger.info("Modelo de explicabilidade reutilizado do cache (candles fechados inalterados)")
+            return dict(entry['feature_importance'])
+
+        X = df_clean[features]
+        y = df_clean['Target']
+        start = time.perf_counter()
+
+        if entry is not None and self._can_warm_start(entry, closed[:, -1], features, y):
+            scaler, rf = entry['scaler'], entry['model']
+            # O scaler é mantido: as árvores antigas foram ajustadas nessa escala
+            rf.set_params(warm_start=True, n_estimators=rf.n_estimators + self.warm_trees)
+            rf.fit(scaler.transform(X), y)
+            mode = 'warm'
+        else:
+            scaler, rf = fit_explainability_model(X, y)
+            mode = 'cold'
+
+        elapsed = time.perf_counter() - start
+        self._record(mode, elapsed)
+
+        feature_importance = importances_to_dict(features, rf.feature_importances_)
+        self._save(path, {
+            'fingerprint': fingerprint,
+            'n_rows': len(df_clean),
+            'closes': closed[:, -1].copy(),
+            'features': features,
+            'scaler': scaler,
+            'model': rf,
+            'feature_importance': feature_importance,
+        })
+        self._evict_superseded(pair, path)
+
+        cold = self.stats['cold_fit_seconds']
+        logger.info(
+            f"Modelo de explicabilidade: ajuste {'incremental' if mode == 'warm' else 'do zero'} "
+            f"em {elapsed:.3f}s ({rf.n_estimators} árvores"
+            + (f"; último ajuste do zero: {cold:.3f}s" if mode == 'warm' and cold is not None else "")
+            + ")"
+        )
+        return feature_importance
+
+    def report(self):
+        """Resumo das métricas do cache (acertos, warm starts, treinos do zero, remoções e tempos)."""
+        return dict(self.stats)
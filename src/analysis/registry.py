@@ -0,0 +1,271 @@
+"""
+Registro de indicadores técnicos com dependências declaradas.
+Cada indicador informa de quais colunas depende; ao pedir um conjunto de colunas,
+apenas o subgrafo necessário é calculado e resultados intermediários
+(como a média e o desvio móveis de 20 períodos) são compartilhados.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.analysis import calculate_rsi
+from src.analysis.kernels import (
+    rolling_moments, moments_to_mean, moments_to_std,
+    rolling_std, rolling_min, rolling_max,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class IndicatorRegistry:
+    """
+    Grafo de indicadores avaliado sob demanda.
+
+    Colunas que não estão registradas são lidas diretamente do DataFrame de entrada
+    (Close, High, Low etc.). Intermediários são descartados assim que o último
+    indicador que depende deles é calculado.
+
+    Um indicador pode declarar o que pede de uma dependência (demand, ex.: a janela
+    de 50 do kernel de momentos); a dependência recebe em demand só o que os
+    indicadores do subgrafo pedido declararam.
+    """
+
+    def __init__(self):
+        self._specs = {}
+
+    def register(self, name, inputs, func, demand=None):
+        """
+        Registra um indicador calculado por func(*inputs).
+
+        demand ({dependência: valor}) declara o que o indicador pede de cada
+        dependência; quem recebe pedidos é chamado como func(*inputs, demand=[valores]).
+        """
+        self._specs[name] = (tuple(inputs), func, dict(demand or {}))
+
+    def indicator(self, name, inputs, demand=None):
+        """Decorador equivalente a register(name, inputs, func, demand)."""
+        def decorator(func):
+            self.register(name, inputs, func, demand)
+            return func
+        return decorator
+
+    def __contains__(self, name):
+        return name in self._specs
+
+    def dependencies(self, name):
+        """Entradas declaradas de um indicador (vazio para colunas de origem)."""
+        return self._specs[name][0] if name in self._specs else ()
+
+    def resolve(self, names):
+        """
+        Ordena topologicamente o subgrafo necessário para calcular names.
+
+        Returns:
+            list: Nós registrados na ordem de cálculo
+        """
+        order = []
+        state = {}
+
+        def visit(name, path):
+            if state.get(name) == 'done' or name not in self._specs:
+                return
+            if state.get(name) == 'visiting':
+                raise ValueError(f"Dependência circular entre indicadores: {' -> '.join(path + [name])}")
+            state[name] = 'visiting'
+            for dependency in self.dependencies(name):
+                visit(dependency, path + [name])
+            state[name] = 'done'
+            order.append(name)
+
+        for name in names:
+            visit(name, [])
+        return order
+
+    def compute(self, df, names, dtype=None):
+        """
+        Calcula somente as colunas pedidas e suas dependências.
+
+        Args:
+            df (pd.DataFrame): DataFrame com dados OHLC
+            names (list): Colunas desejadas (indicadores registrados ou colunas de df)
+            dtype (np.dtype, optional): Quando informado, o resultado é gravado em um
+                único array pré-alocado desse tipo em vez de colunas float64 separadas
+
+        Returns:
+            pd.DataFrame: DataFrame com as colunas de names, na mesma ordem
+        """
+        names = list(names)
+        order = self.resolve(names)
+
+        pending_consumers = {}
+        demands = {}
+        for node in order:
+            for dependency in self.dependencies(node):
+                pending_consumers[dependency] = pending_consumers.get(dependency, 0) + 1
+            for dependency, value in self._specs[node][2].items():
+                demands.setdefault(dependency, set()).add(value)
+
+        if dtype is not None:
+            output = np.empty((len(df), len(names)), dtype=dtype, order='F')
+        else:
+            output = {}
+
+        def store(name, values):
+            if name not in names:
+                return
+            if dtype is not None:
+                output[:, names.index(name)] = np.asarray(values)
+            else:
+                output[name] = values
+
+        values = {}
+
+        def get(name):
+            if name in values:
+                return values[name]
+            return df[name]
+
+        for name in names:
+            if name not in self._specs:
+                store(name, df[name])
+
+        for node in order:
+            inputs, func, _ = self._specs[node]
+            args = [get(dependency) for dependency in inputs]
+            if node in demands:
+                values[node] = func(*args, demand=sorted(demands[node]))
+            else:
+                values[node] = func(*args)
+            store(node, values[node])
+
+            for dependency in inputs:
+                pending_consumers[dependency] -= 1
+                if pending_consumers[dependency] == 0 and dependency in values:
+                    del values[dependency]
+
+        logger.debug(f"Indicadores calculados: {order}")
+
+        if dtype is not None:
+            return pd.DataFrame(output, index=df.index, columns=names, copy=False)
+        return pd.DataFrame(output, index=df.index)[names]
+
+
+default_registry = IndicatorRegistry()
+
+
+@default_registry.indicator('Close_Moments', ['Close'])
+def _close_moments(close, demand=(20, 50, 200)):
+    # Uma passada do kernel compartilhada pelas janelas pedidas (médias e desvio de 20)
+    return rolling_moments(close, demand, stats=('sum', 'sumsq'))
+
+
+@default_registry.indicator('Rolling_Mean_20', ['Close', 'Close_Moments'], demand={'Close_Moments': 20})
+def _rolling_mean_20(close, moments):
+    return pd.Series(moments_to_mean(moments, 20), index=close.index)
+
+
+@default_registry.indicator('Rolling_Std_20', ['Close', 'Close_Moments'], demand={'Close_Moments': 20})
+def _rolling_std_20(close, moments):
+    return pd.Series(moments_to_std(moments, 20), index=close.index)
+
+
+@default_registry.indicator('SMA_20', ['Rolling_Mean_20'])
+def _sma_20(rolling_mean):
+    return rolling_mean
+
+
+@default_registry.indicator('SMA_50', ['Close', 'Close_Moments'], demand={'Close_Moments': 50})
+def _sma_50(close, moments):
+    return pd.Series(moments_to_mean(moments, 50), index=close.index)
+
+
+@default_registry.indicator('SMA_200', ['Close', 'Close_Moments'], demand={'Close_Moments': 200})
+def _sma_200(close, moments):
+    return pd.Series(moments_to_mean(moments, 200), index=close.index)
+
+
+@default_registry.indicator('RSI', ['Close'])
+def _rsi(close):
+    return calculate_rsi({'Close': close}, 14)
+
+
+@default_registry.indicator('BB_Middle', ['Rolling_Mean_20'])
+def _bb_middle(rolling_mean):
+    return rolling_mean
+
+
+@default_registry.indicator('BB_Upper', ['Rolling_Mean_20', 'Rolling_Std_20'])
+def _bb_upper(rolling_mean, rolling_std):
+    return rolling_mean + (rolling_std * 2)
+
+
+@default_registry.indicator('BB_Lower', ['Rolling_Mean_20', 'Rolling_Std_20'])
+def _bb_lower(rolling_mean, rolling_std):
+    return rolling_mean - (rolling_std * 2)
+
+
+@default_registry.indicator('BB_Width', ['BB_Upper', 'BB_Lower'])
+def _bb_width(upper, lower):
+    return upper - lower
+
+
+@default_registry.indicator('BB_Position', ['Close', 'BB_Upper', 'BB_Lower'])
+def _bb_position(close, upper, lower):
+    return (close - lower) / (upper - lower)
+
+
+@default_registry.indicator('Returns', ['Close'])
+def _returns(close):
+    return close.pct_change()
+
+
+@default_registry.indicator('Volatility', ['Returns'])
+def _volatility(returns):
+    return pd.Series(rolling_std(returns, 20), index=returns.index) * np.sqrt(252) * 100
+
+
+@default_registry.indicator('EMA_12', ['Close'])
+def _ema_12(close):
+    return close.ewm(span=12, adjust=False).mean()
+
+
+@default_registry.indicator('EMA_26', ['Close'])
+def _ema_26(close):
+    return close.ewm(span=26, adjust=False).mean()
+
+
+@default_registry.indicator('MACD', ['EMA_12', 'EMA_26'])
+def _macd(ema_fast, ema_slow):
+    return ema_fast - ema_slow
+
+
+@default_registry.indicator('MACD_Signal', ['MACD'])
+def _macd_signal(macd_line):
+    return macd_line.ewm(span=9, adjust=False).mean()
+
+
+@default_registry.indicator('MACD_Histogram', ['MACD', 'MACD_Signal'])
+def _macd_histogram(macd_line, signal_line):
+    return macd_line - signal_line
+
+
+@default_registry.indicator('Support', ['Low'])
+def _support(low):
+    return pd.Series(rolling_min(low, 20, center=True), index=low.index)
+
+
+@default_registry.indicator('Resistance', ['High'])
+def _resistance(high):
+    return pd.Series(rolling_max(high, 20, center=True), index=high.index)
+
+
+@default_registry.indicator('Trend_20', ['SMA_20'])
+def _trend_20(sma_20):
+    return sma_20.diff()
+
+
+@default_registry.indicator('Trend_50', ['SMA_50'])
+def _trend_50(sma_50):
+    return sma_50.diff()
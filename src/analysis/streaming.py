@@ -0,0 +1,128 @@
+"""
+Cálculo de indicadores técnicos em blocos (out-of-core).
+Processa o histórico bloco a bloco, levando entre os blocos apenas o contexto
+necessário (últimos candles brutos e o estado das EMAs do MACD), de modo que o
+resultado coincide com calculate_all_indicators sobre o histórico inteiro e a
+memória fica limitada pelo tamanho do bloco.
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.analysis import calculate_all_indicators
+from src.analysis.incremental import WARMUP_BARS
+
+logger = logging.getLogger(__name__)
+
+# Suporte/Resistência usam janela centralizada de 20: cada linha depende de 9 candles à frente
+SR_LOOKAHEAD = 9
+
+
+def _seeded_ewm(values, span, seed):
+    """ewm(span, adjust=False).mean() continuando do valor seed da linha anterior."""
+    if seed is None:
+        return values.ewm(span=span, adjust=False).mean()
+    # Com adjust=False o estado da EMA é só o último valor: prefixá-lo reproduz a recorrência
+    seeded = pd.Series(np.concatenate(([seed], values.to_numpy(dtype=float))))
+    return pd.Series(seeded.ewm(span=span, adjust=False).mean().to_numpy()[1:], index=values.index)
+
+
+class ChunkedIndicators:
+    """
+    Calcula os indicadores de calculate_all_indicators sobre blocos consecutivos do histórico.
+
+    A cada bloco, os indicadores de janela móvel são recalculados sobre o bloco precedido
+    dos últimos WARMUP_BARS candles, e as EMAs do MACD continuam do estado da última
+    linha emitida. As últimas SR_LOOKAHEAD linhas de cada bloco ficam retidas até o
+    bloco seguinte, quando a janela centralizada de Suporte/Resistência se completa.
+    """
+
+    def __init__(self):
+        self._context = None
+        self._pending = 0
+        self._ema_state = (None, None, None)
+        self.n_bars = 0
+
+    def _emit(self, frame, start, end):
+        """Indicadores das linhas [start, end) de frame, com o MACD continuado do estado anterior."""
+        result = calculate_all_indicators(frame).iloc[start:end].copy()
+        if len(result) == 0:
+            return result
+
+        fast_seed, slow_seed, signal_seed = self._ema_state
+        ema_fast = _seeded_ewm(result['Close'], 12, fast_seed)
+        ema_slow = _seeded_ewm(result['Close'], 26, slow_seed)
+        macd_line = ema_fast - ema_slow
+        signal_line = _seeded_ewm(macd_line, 9, signal_seed)
+
+        result['MACD'] = macd_line
+        result['MACD_Signal'] = signal_line
+        result['MACD_Histogram'] = macd_line - signal_line
+
+        self._ema_state = (ema_fast.iloc[-1], ema_slow.iloc[-1], signal_line.iloc[-1])
+        self.n_bars += len(result)
+        return result
+
+    def process(self, chunk):
+        """
+        Recebe o próximo bloco de candles OHLC.
+
+        Args:
+            chunk (pd.DataFrame): Candles seguintes aos dos blocos anteriores
+
+        Returns:
+            pd.DataFrame: Linhas já completas (pode incluir linhas retidas do bloco anterior
+                          e omitir as últimas SR_LOOKAHEAD linhas deste bloco)
+        """
+        if self._context is None:
+            frame = chunk
+            start = 0
+        else:
+            frame = pd.concat([self._context, chunk])
+            start = len(self._context) - self._pending
+
+        end = max(start, len(frame) - SR_LOOKAHEAD)
+        result = self._emit(frame, start, end)
+
+        self._pending = len(frame) - end
+        self._context = frame.iloc[-(WARMUP_BARS + SR_LOOKAHEAD):]
+        return result
+
+    def finish(self):
+        """
+        Emite as linhas retidas no fim do histórico.
+
+        Returns:
+            pd.DataFrame: Últimas linhas (Suporte/Resistência NaN onde faltam candles futuros,
+                          como no cálculo em memória)
+        """
+        if self._context is None or self._pending == 0:
+            return self._context.iloc[:0] if self._context is not None else pd.DataFrame()
+        frame = self._context
+        result = self._emit(frame, len(frame) - self._pending, len(frame))
+        self._pending = 0
+        return result
+
+
+def iter_indicator_chunks(chunks):
+    """
+    Calcula indicadores sobre uma sequência de blocos OHLC, emitindo um bloco por vez.
+
+    Args:
+        chunks (iterable): Blocos consecutivos do histórico (ex.: iter_forex_data,
+            pd.read_csv(..., chunksize=N) ou fatias de um DataFrame)
+
+    Yields:
+        pd.DataFrame: Blocos com os indicadores de calculate_all_indicators
+    """
+    engine = ChunkedIndicators()
+    for chunk in chunks:
+        result = engine.process(chunk)
+        if len(result) > 0:
+            yield result
+    result = engine.finish()
+    if len(result) > 0:
+        yield result
+    logger.debug(f"Indicadores calculados em blocos para {engine.n_bars} candles")
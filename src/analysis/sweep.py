@@ -0,0 +1,244 @@
+"""
+Varredura de parâmetros dos indicadores e dos limiares da heurística.
+Avalia uma grade de configurações (períodos de SMA, RSI e Bandas de Bollinger,
+corte de volatilidade e faixas de RSI) sobre o mesmo histórico, reaproveitando
+os indicadores de cada período entre as configurações, e ordena o resultado por
+métricas de backtest.
+"""
+
+import os
+import logging
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.analysis import _expanding_quantile, _rule_points, _classify_from_rules
+from src.analysis.backtest import forward_returns, _hits
+from src.analysis.kernels import rolling_moments, moments_to_mean, moments_to_std, rolling_std
+
+logger = logging.getLogger(__name__)
+
+# Configuração usada por calculate_all_indicators e classify_heuristic
+DEFAULT_CONFIG = {
+    'sma_fast': 20,
+    'sma_slow': 50,
+    'rsi_period': 14,
+    'bb_period': 20,
+    'bb_std': 2.0,
+    'volatility_cut': 75,
+    'rsi_bands': (30, 50, 70),
+}
+
+DEFAULT_GRID = {
+    'sma_fast': [10, 20, 30],
+    'sma_slow': [50, 100, 200],
+    'rsi_period': [7, 14, 21],
+    'bb_period': [20],
+    'bb_std': [2.0],
+    'volatility_cut': [70, 75, 80],
+    'rsi_bands': [(30, 50, 70), (25, 50, 75)],
+}
+
+SWEEP_METRICS = ('directional_hit_rate', 'edge', 'hit_rate')
+
+# Janela fixa da volatilidade (desvio padrão dos retornos), como em calculate_all_indicators
+VOLATILITY_WINDOW = 20
+
+
+def expand_grid(grid=None):
+    """
+    Expande a grade em uma lista de configurações completas.
+
+    Chaves ausentes usam o valor de DEFAULT_CONFIG; combinações com SMA rápida
+    maior ou igual à lenta são descartadas.
+
+    Args:
+        grid (dict, optional): {parâmetro: lista de valores} (padrão: DEFAULT_GRID)
+
+    Returns:
+        list: Lista de dicionários de configuração
+    """
+    grid = {**{key: [value] for key, value in DEFAULT_CONFIG.items()}, **(grid or DEFAULT_GRID)}
+    unknown = set(grid) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError(f"Parâmetros desconhecidos na grade: {sorted(unknown)}")
+
+    keys = list(DEFAULT_CONFIG)
+    configs = [dict(zip(keys, values)) for values in itertools.product(*(grid[key] for key in keys))]
+    return [config for config in configs if config['sma_fast'] < config['sma_slow']]
+
+
+class _SweepFeatures:
+    """
+    Indicadores compartilhados pelas configurações de uma varredura.
+
+    As médias de todos os períodos de SMA/Bollinger saem de uma única chamada do
+    kernel de momentos móveis, assim como as médias de ganhos e perdas de todos os
+    períodos de RSI. O percentil expansivo da volatilidade não depende da
+    configuração e é calculado uma vez; o quantil expansivo da largura das bandas
+    é calculado uma vez por (período, desvios).
+    """
+
+    def __init__(self, close, configs):
+        self.close = np.asarray(close, dtype=float)
+        n = len(self.close)
+
+        sma_windows = {c['sma_fast'] for c in configs} | {c['sma_slow'] for c in configs}
+        bb_windows = {c['bb_period'] for c in configs}
+        moments = rolling_moments(self.close, sorted(sma_windows | bb_windows), stats=('sum', 'sumsq'))
+        self.means = {w: moments_to_mean(moments, w) for w in sma_windows | bb_windows}
+        self.stds = {w: moments_to_std(moments, w) for w in bb_windows}
+
+        # delta.where(delta > 0, 0): o primeiro delta (NaN) entra como zero, como em calculate_rsi
+        delta = np.diff(self.close, prepend=np.nan)
+        gain = np.where(delta > 0, delta, 0.0)
+        loss = np.where(delta < 0, -delta, 0.0)
+        periods = sorted({c['rsi_period'] for c in configs})
+        gains = rolling_moments(gain, periods, stats=('sum',))
+        losses = rolling_moments(loss, periods, stats=('sum',))
+        self.rsi = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for period in periods:
+                rs = moments_to_mean(gains, period) / moments_to_mean(losses, period)
+                self.rsi[period] = 100 - (100 / (1 + rs))
+
+        returns = np.full(n, np.nan)
+        returns[1:] = self.close[1:] / self.close[:-1] - 1
+        self.volatility = rolling_std(returns, VOLATILITY_WINDOW) * np.sqrt(252) * 100
+        volatility = pd.Series(self.volatility)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.volatility_percentile = (
+                (volatility.expanding().rank(method='min').to_numpy() - 1)
+                / volatility.expanding().count().to_numpy() * 100
+            )
+
+        self._bands = {}
+
+    def bands(self, period, num_std):
+        """(largura, corte expansivo do 75º percentil da largura, posição) das Bandas de Bollinger."""
+        key = (period, num_std)
+        if key not in self._bands:
+            sma, std = self.means[period], self.stds[period]
+            upper = sma + (std * num_std)
+            lower = sma - (std * num_std)
+            width = upper - lower
+            with np.errstate(invalid='ignore', divide='ignore'):
+                position = (self.close - lower) / (upper - lower)
+            self._bands[key] = (width, _expanding_quantile(pd.Series(width), 0.75), position)
+        return self._bands[key]
+
+    def rules(self, config):
+        """Máscara de linhas válidas e pontos das regras para uma configuração."""
+        sma_fast = self.means[config['sma_fast']]
+        sma_slow = self.means[config['sma_slow']]
+        rsi = self.rsi[config['rsi_period']]
+        width, width_cut, position = self.bands(config['bb_period'], config['bb_std'])
+
+        trend = np.full(len(self.close), np.nan)
+        trend[1:] = np.diff(sma_fast)
+
+        valid = ~(np.isnan(sma_fast) | np.isnan(sma_slow) | np.isnan(rsi)
+                  | np.isnan(width) | np.isnan(self.volatility))
+        rules = _rule_points(self.close, sma_fast, sma_slow, rsi, trend, self.volatility_percentile,
+                             width, width_cut, position,
+                             volatility_cut=config['volatility_cut'],
+                             rsi_bands=tuple(config['rsi_bands']))
+        return valid, rules
+
+
+def _config_metrics(classification, valid, forward, typical_move):
+    """Métricas de backtest de uma configuração para um horizonte."""
+    usable = valid & ~np.isnan(forward)
+    classes = classification[usable]
+    returns = forward[usable]
+
+    up = classes == 'Tendência de Alta'
+    down = classes == 'Tendência de Baixa'
+    trend = up | down
+    # Retorno na direção do rótulo: positivo quando a tendência prevista se confirmou
+    trend_returns = np.where(up, returns, -returns)[trend]
+
+    return {
+        'n_labeled': int(usable.sum()),
+        'n_trend': int(trend.sum()),
+        'trend_share': float(trend.mean()) if len(classes) else np.nan,
+        'directional_hit_rate': float((trend_returns > 0).mean()) if trend.any() else np.nan,
+        'edge': float(trend_returns.mean()) if trend.any() else np.nan,
+        'hit_rate': float(_hits(classes, returns, typical_move).mean()) if len(classes) else np.nan,
+    }
+
+
+def _evaluate_configs(close, configs, horizon):
+    """Avalia uma lista de configurações sobre a série de fechamento (executado nos processos)."""
+    features = _SweepFeatures(close, configs)
+    forward = forward_returns(pd.Series(close), (horizon,)).iloc[:, 0].to_numpy()
+    finite = forward[~np.isnan(forward)]
+    typical_move = float(np.median(np.abs(finite))) if len(finite) else np.nan
+    index = pd.RangeIndex(len(close))
+
+    rows = []
+    for config in configs:
+        valid, rules = features.rules(config)
+        classification = _classify_from_rules(valid, rules, index)['classification'].to_numpy()
+        rows.append({**config, **_config_metrics(classification, valid, forward, typical_move)})
+    return rows
+
+
+def run_sweep(df, grid=None, horizon=5, metric='directional_hit_rate', min_trend_labels=30,
+              max_workers=None):
+    """
+    Avalia uma grade de configurações e as ordena por uma métrica de backtest.
+
+    Métricas (horizonte de horizon candles):
+        - directional_hit_rate: fração dos rótulos de tendência confirmados pelo retorno futuro
+        - edge: retorno futuro médio na direção dos rótulos de tendência
+        - hit_rate: taxa de acerto de todos os rótulos (critérios de src/analysis/backtest.py)
+
+    Args:
+        df (pd.DataFrame): DataFrame com dados OHLC
+        grid (dict, optional): {parâmetro: lista de valores} (padrão: DEFAULT_GRID)
+        horizon (int): Horizonte do retorno futuro, em candles
+        metric (str): Métrica de ordenação (uma de SWEEP_METRICS)
+        min_trend_labels (int): Configurações com menos rótulos de tendência ficam no fim
+        max_workers (int, optional): Processos usados (padrão: núcleos disponíveis;
+            1 executa no processo atual)
+
+    Returns:
+        pd.DataFrame: Uma linha por configuração, com parâmetros, métricas, 'is_default'
+                      e 'rank' (1 = melhor)
+    """
+    if metric not in SWEEP_METRICS:
+        raise ValueError(f"Métrica inválida: {metric}. Use uma de {SWEEP_METRICS}")
+
+    configs = expand_grid(grid)
+    if not configs:
+        raise ValueError("A grade não gerou nenhuma configuração válida")
+
+    # Configurações com as mesmas bandas ficam juntas, evitando repetir o quantil expansivo
+    configs.sort(key=lambda c: (c['bb_period'], c['bb_std']))
+    close = df['Close'].to_numpy(dtype=float)
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(configs))
+    if max_workers == 1:
+        rows = _evaluate_configs(close, configs, horizon)
+    else:
+        chunks = [list(chunk) for chunk in np.array_split(np.array(configs, dtype=object), max_workers)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_evaluate_configs, close, chunk, horizon) for chunk in chunks]
+            rows = [row for future in futures for row in future.result()]
+
+    results = pd.DataFrame(rows)
+    results['is_default'] = [all(row[key] == value for key, value in DEFAULT_CONFIG.items()) for row in rows]
+
+    ranked_metric = results[metric].where(results['n_trend'] >= min_trend_labels)
+    results = results.assign(_order=ranked_metric).sort_values('_order', ascending=False, na_position='last')
+    results = results.drop(columns='_order').reset_index(drop=True)
+    results['rank'] = np.arange(1, len(results) + 1)
+
+    logger.info(
+        f"Varredura concluída: {len(results)} configurações em {max_workers} processo(s); "
+        f"melhor {metric} = {results[metric].iloc[0]:.4f}"
+    )
+    return results
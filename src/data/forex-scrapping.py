@@ -1,52 +1,184 @@
 """
 Módulo de coleta de dados OHLC para o par BRL/USD.
-Busca dados históricos dos últimos 5 anos usando yfinance.
+Busca dados históricos dos últimos 5 anos usando yfinance (diários por padrão,
+ou intradiários via o parâmetro interval).
 """
 
 import yfinance as yf
+import numpy as np
 import pandas as pd
+from scipy.ndimage import median_filter
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
+import threading
 import logging
+import random
+import time
 
 logger = logging.getLogger(__name__)
 
 
-def fetch_forex_data(years=5):
+# Limites do Yahoo Finance para candles intradiários:
+# (dias por requisição, dias de histórico disponíveis a partir de hoje)
+INTERVAL_LIMITS = {
+    '1m': (7, 30),
+    '2m': (60, 60),
+    '5m': (60, 60),
+    '15m': (60, 60),
+    '30m': (60, 60),
+    '90m': (60, 60),
+    '60m': (730, 730),
+    '1h': (730, 730),
+}
+
+DAILY_INTERVALS = ('1d', '5d', '1wk', '1mo', '3mo')
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+# Outliers: cada preço é comparado, em retorno logarítmico, à mediana dos
+# REFERENCE_WINDOW fechamentos anteriores; o escore robusto desse retorno usa
+# mediana e MAD dos OUTLIER_WINDOW candles anteriores e, acima de
+# OUTLIER_THRESHOLD, o preço é marcado
+REFERENCE_WINDOW = 5
+OUTLIER_WINDOW = 50
+OUTLIER_THRESHOLD = 8.0
+
+# Piso da escala robusta, em retorno logarítmico (1 bp), para janelas de preço constante
+MIN_SCALE = 1e-4
+
+
+def _request_windows(start_date, end_date, interval):
+    """
+    Divide o período em janelas aceitas pelo Yahoo Finance para o intervalo.
+    
+    Returns:
+        list: Pares (início, fim) consecutivos, com fim exclusivo
+    """
+    if interval in DAILY_INTERVALS:
+        return [(start_date, end_date)]
+    if interval not in INTERVAL_LIMITS:
+        raise ValueError(f"Intervalo não suportado: {interval}. Use um de {DAILY_INTERVALS + tuple(INTERVAL_LIMITS)}")
+    
+    max_span_days, max_history_days = INTERVAL_LIMITS[interval]
+    earliest = end_date - timedelta(days=max_history_days)
+    if start_date < earliest:
+        logger.warning(
+            f"O Yahoo Finance só disponibiliza {max_history_days} dias de candles de {interval}; "
+            f"período ajustado para começar em {earliest.date()}"
+        )
+        start_date = earliest
+    
+    windows = []
+    window_start = start_date
+    while window_start < end_date:
+        window_end = min(window_start + timedelta(days=max_span_days), end_date)
+        windows.append((window_start, window_end))
+        window_start = window_end
+    return windows
+
+
+def _normalize_history(df):
+    """Confere as colunas OHLC e traz a data do índice para a coluna Date."""
+    required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    
+    if missing_columns:
+        raise ValueError(f"Colunas faltando no DataFrame: {missing_columns}")
+    
+    df = df.reset_index()
+    if 'Date' not in df.columns and 'Datetime' in df.columns:
+        df = df.rename(columns={'Datetime': 'Date'})
+    return df
+
+
+def _download(ticker, start_date, end_date, interval):
+    """Busca os candles do período (sem validar), uma janela aceita pelo Yahoo Finance por vez."""
+    forex_ticker = yf.Ticker(ticker)
+    for window_start, window_end in _request_windows(start_date, end_date, interval):
+        df = forex_ticker.history(start=window_start, end=window_end, interval=interval)
+        if df.empty:
+            logger.debug(f"Nenhum candle entre {window_start} e {window_end}")
+            continue
+        yield _normalize_history(df)
+
+
+def _concat_pieces(pieces):
+    """Junta as janelas buscadas, sem candles repetidos nas fronteiras."""
+    if not pieces:
+        return pd.DataFrame(columns=['Date', 'Open', 'High', 'Low', 'Close', 'Volume'])
+    if len(pieces) == 1:
+        return pieces[0]
+    df = pd.concat(pieces, ignore_index=True)
+    return df.drop_duplicates(subset='Date', keep='last').sort_values('Date').reset_index(drop=True)
+
+
+def iter_forex_data(years=5, interval='1d', ticker="BRL=X"):
+    """
+    Busca dados OHLC do par BRL/USD em janelas consecutivas, uma requisição por vez.
+    
+    Intervalos intradiários são limitados pelo Yahoo Finance a poucos dias por
+    requisição; cada janela é validada e entregue separadamente, o que permite
+    processar históricos longos em blocos (ver src/analysis/streaming.py).
+    
+    Args:
+        years (int): Número de anos de dados históricos a buscar (padrão: 5)
+        interval (str): Intervalo dos candles ('1d', '1h', '5m', '1m'...)
+        ticker (str): Ticker do Yahoo Finance (padrão: 'BRL=X')
+    
+    Yields:
+        pd.DataFrame: Candles de cada janela, com colunas Date, Open, High, Low, Close, Volume
+    """
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=years * 365)
+    windows = _request_windows(start_date, end_date, interval)
+    
+    logger.info(
+        f"Buscando dados de {ticker} ({interval}) de {windows[0][0].date()} até {end_date.date()} "
+        f"em {len(windows)} requisição(ões)"
+    )
+    
+    # Cada janela é validada com o fim da anterior como contexto da mediana/MAD
+    history = None
+    for df in _download(ticker, start_date, end_date, interval):
+        history = validate_data(df, history=history)
+        yield history
+
+
+def fetch_forex_data(years=5, interval='1d', ticker="BRL=X", cache=None, force_refresh=False):
     """
     Busca dados OHLC históricos do par BRL/USD.
     
     Args:
         years (int): Número de anos de dados históricos a buscar (padrão: 5)
+        interval (str): Intervalo dos candles (padrão: '1d'). Intervalos intradiários
+            ('1h', '5m', '1m'...) são buscados em várias requisições e limitados ao
+            histórico que o Yahoo Finance disponibiliza
+        ticker (str): Ticker do Yahoo Finance (padrão: 'BRL=X')
+        cache (OHLCCache, optional): Cache local (src/data/ohlc_cache.py); quando
+            informado, só os candles posteriores ao último salvo são buscados e validados
+            (com o fim do histórico salvo como contexto da detecção de outliers)
+        force_refresh (bool): Com cache, ignora o arquivo salvo e busca o período inteiro
     
     Returns:
         pd.DataFrame: DataFrame com colunas Date, Open, High, Low, Close, Volume
     """
     try:
-        ticker = "BRL=X"
-        
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=years * 365)
-        
-        logger.info(f"Buscando dados de {ticker} de {start_date.date()} até {end_date.date()}")
+        if cache is not None:
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=years * 365)
+            df = cache.load(
+                ticker, interval, start_date, end_date,
+                fetch=lambda start, end: _concat_pieces(list(_download(ticker, start, end, interval))),
+                validate=validate_data,
+                force_refresh=force_refresh,
+                history_limit=timedelta(days=INTERVAL_LIMITS[interval][1]) if interval in INTERVAL_LIMITS else None,
+            )
+        else:
+            df = _concat_pieces(list(iter_forex_data(years=years, interval=interval, ticker=ticker)))
         
-        forex_ticker = yf.Ticker(ticker)
-        df = forex_ticker.history(start=start_date, end=end_date)
-        
-        if df.empty:
+        if len(df) == 0:
             raise ValueError(f"Nenhum dado encontrado para {ticker}")
         
-        required_columns = ['Open', 'High', 'Low', 'Close', 'Volume']
-        missing_columns = [col for col in required_columns if col not in df.columns]
-        
-        if missing_columns:
-            raise ValueError(f"Colunas faltando no DataFrame: {missing_columns}")
-        
-        df = df.reset_index()
-        if 'Date' not in df.columns and 'Datetime' in df.columns:
-            df = df.rename(columns={'Datetime': 'Date'})
-        
-        df = validate_data(df)
-        
         logger.info(f"Dados coletados com sucesso: {len(df)} registros")
         return df
     
@@ -55,49 +187,305 @@ def fetch_forex_data(years=5):
         raise
 
 
-def validate_data(df):
+class YahooSource:
+    """Fonte de dados do Yahoo Finance: vários tickers por requisição (yf.download)."""
+    
+    def download(self, tickers, start, end, interval='1d'):
+        """
+        Candles de vários tickers em uma única requisição.
+        
+        Returns:
+            dict: {ticker: DataFrame indexado pela data, com Open, High, Low, Close, Volume}
+        """
+        data = yf.download(list(tickers), start=start, end=end, interval=interval,
+                           group_by='ticker', auto_adjust=False, progress=False, threads=False)
+        if data is None or data.empty:
+            return {}
+        if not isinstance(data.columns, pd.MultiIndex):
+            return {tickers[0]: data}
+        return {
+            ticker: data[ticker].dropna(how='all')
+            for ticker in tickers if ticker in data.columns.get_level_values(0)
+        }
+
+
+class RequestCoalescer:
     """
-    Valida e limpa os dados OHLC.
+    Registro das buscas em andamento, compartilhado pelas threads do processo.
+    
+    Quem pede uma chave que já está sendo buscada recebe o mesmo Future, em vez
+    de disparar outro download.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self.stats = {'requests': 0, 'coalesced': 0}
+    
+    def claim(self, keys):
+        """
+        Returns:
+            tuple: ({chave: Future} de todas as chaves, lista das chaves que o chamador deve buscar)
+        """
+        futures, owned = {}, []
+        with self._lock:
+            for key in keys:
+                self.stats['requests'] += 1
+                if key in self._inflight:
+                    self.stats['coalesced'] += 1
+                    futures[key] = self._inflight[key]
+                else:
+                    futures[key] = self._inflight[key] = Future()
+                    owned.append(key)
+        return futures, owned
+    
+    def release(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+
+_coalescer = RequestCoalescer()
+
+
+def _with_retries(func, retries, backoff, description):
+    """Executa func, repetindo após falhas com espera exponencial e jitter completo."""
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = random.uniform(0, backoff * 2 ** attempt)
+            logger.warning(f"Falha em {description} (tentativa {attempt + 1}/{retries + 1}): {str(e)}. "
+                           f"Nova tentativa em {delay:.2f}s")
+            time.sleep(delay)
+
+
+def _fetch_batch(source, batch, start_date, end_date, interval, retries, backoff):
+    """Busca um lote de tickers em todas as janelas do período e valida cada série."""
+    pieces = {ticker: [] for ticker in batch}
+    for window_start, window_end in _request_windows(start_date, end_date, interval):
+        frames = _with_retries(
+            lambda: source.download(batch, window_start, window_end, interval),
+            retries, backoff, f"download de {', '.join(batch)} ({interval})"
+        )
+        for ticker, df in frames.items():
+            if ticker in pieces and not df.empty:
+                pieces[ticker].append(_normalize_history(df))
+    
+    results = {}
+    for ticker, frames in pieces.items():
+        if frames:
+            results[ticker] = validate_data(_concat_pieces(frames))
+    return results
+
+
+def fetch_many(tickers, years=5, interval='1d', batch_size=5, max_workers=4,
+               retries=3, backoff=0.5, source=None):
+    """
+    Busca dados OHLC de vários tickers em lotes concorrentes.
+    
+    Os tickers são agrupados em lotes de batch_size (uma requisição por lote e
+    janela) e os lotes rodam em até max_workers threads. Pedidos simultâneos do
+    mesmo ticker, intervalo e período (de outras threads) aguardam o download já
+    em andamento em vez de repeti-lo. Falhas são repetidas até retries vezes com
+    espera exponencial e jitter.
     
     Args:
-        df (pd.DataFrame): DataFrame com dados OHLC
+        tickers (list): Tickers do Yahoo Finance (ex.: ['BRL=X', 'EURBRL=X'])
+        years (int): Número de anos de dados históricos a buscar (padrão: 5)
+        interval (str): Intervalo dos candles (padrão: '1d')
+        batch_size (int): Tickers por requisição
+        max_workers (int): Máximo de requisições simultâneas
+        retries (int): Novas tentativas por requisição após falha
+        backoff (float): Espera base em segundos (dobra a cada tentativa)
+        source (object, optional): Fonte com download(tickers, início, fim, intervalo)
+            (padrão: YahooSource; SyntheticSource de src/data/synthetic.py roda sem rede)
     
     Returns:
-        pd.DataFrame: DataFrame validado e limpo
+        dict: {ticker: DataFrame com colunas Date, Open, High, Low, Close, Volume};
+              tickers sem dados ou com falha ficam de fora (registrado no log)
     """
-    initial_len = len(df)
-    df = df.dropna(subset=['Open', 'High', 'Low', 'Close'])
+    source = source or YahooSource()
+    tickers = list(dict.fromkeys(tickers))
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=years * 365)
     
-    if len(df) < initial_len:
-        logger.warning(f"Removidas {initial_len - len(df)} linhas com valores NaN")
+    keys = {ticker: (id(source), ticker, interval, years) for ticker in tickers}
+    futures, owned = _coalescer.claim(keys.values())
+    owned_tickers = [ticker for ticker in tickers if keys[ticker] in owned]
+    batches = [owned_tickers[i:i + batch_size] for i in range(0, len(owned_tickers), batch_size)]
     
-    invalid_rows = (
-        (df['High'] < df['Low']) |
-        (df['High'] < df['Open']) |
-        (df['High'] < df['Close']) |
-        (df['Low'] > df['Open']) |
-        (df['Low'] > df['Close'])
+    logger.info(
+        f"Buscando {len(tickers)} ticker(s) ({interval}) em {len(batches)} lote(s); "
+        f"{len(tickers) - len(owned_tickers)} já em andamento"
     )
     
+    def run_batch(batch):
+        try:
+            results = _fetch_batch(source, batch, start_date, end_date, interval, retries, backoff)
+        except Exception as e:
+            results = e
+        for ticker in batch:
+            future = futures[keys[ticker]]
+            if isinstance(results, Exception):
+                future.set_exception(results)
+            elif ticker in results:
+                future.set_result(results[ticker])
+            else:
+                future.set_exception(ValueError(f"Nenhum dado encontrado para {ticker}"))
+            _coalescer.release(keys[ticker])
+    
+    if batches:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(batches))) as executor:
+            list(executor.map(run_batch, batches))
+    
+    data = {}
+    for ticker in tickers:
+        try:
+            data[ticker] = futures[keys[ticker]].result()
+        except Exception as e:
+            logger.error(f"Erro ao buscar dados de {ticker}: {str(e)}")
+    
+    logger.info(f"Dados coletados para {len(data)}/{len(tickers)} ticker(s)")
+    return data
+
+
+def _trailing_median(values, window, offset=0):
+    """
+    Mediana, por coluna, dos window valores anteriores a cada linha.
+    
+    As primeiras offset linhas são ignoradas (ainda sem valor definido); o resultado
+    é NaN até haver window valores anteriores.
+    """
+    result = np.full(values.shape, np.nan)
+    n = len(values)
+    if n > offset + window:
+        # median_filter centra a janela; o centro (window + 1) // 2 linhas atrás cobre [t - window, t - 1]
+        lag = (window + 1) // 2
+        for col in range(values.shape[1]):
+            centered = median_filter(values[offset:, col], size=window, mode='nearest')
+            result[offset + window:, col] = centered[window - lag:n - offset - lag]
+    return result
+
+
+def _robust_scores(prices, window):
+    """Preço esperado e escore robusto de cada preço em relação aos candles anteriores."""
+    reference = _trailing_median(prices[:, 3:], REFERENCE_WINDOW)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        moves = np.log(prices / reference)
+    
+    median = _trailing_median(moves, window, offset=REFERENCE_WINDOW)
+    deviation = np.abs(moves - median)
+    mad = _trailing_median(deviation, window, offset=REFERENCE_WINDOW + window)
+    
+    scale = np.maximum(1.4826 * mad, MIN_SCALE)
+    with np.errstate(invalid='ignore'):
+        return reference * np.exp(median), deviation / scale
+
+
+def validate_ohlc(df, history=None, window=OUTLIER_WINDOW, threshold=OUTLIER_THRESHOLD):
+    """
+    Valida candles OHLC em uma passada vetorizada sobre as quatro colunas de preço.
+    
+    - Linhas com preço NaN ou lógica OHLC inválida (High abaixo de Open/Close/Low,
+      Low acima de Open/Close) são removidas
+    - Preços cujo retorno logarítmico em relação à mediana dos últimos fechamentos
+      fica a mais de threshold desvios robustos (1,4826 * MAD) da mediana dos window
+      candles anteriores são marcados como outliers (não removidos)
+    
+    Com history (candles já validados que precedem df), só as linhas de df são
+    validadas, usando o fim de history como contexto da mediana/MAD: o resultado
+    é o mesmo de validar history e df juntos.
+    
+    Args:
+        df (pd.DataFrame): Candles com colunas Date, Open, High, Low, Close
+        history (pd.DataFrame, optional): Candles validados anteriores a df
+        window (int): Janela da mediana e da MAD, em candles
+        threshold (float): Limite do escore robusto para marcar outliers
+    
+    Returns:
+        tuple: (DataFrame validado e ordenado por Date, relatório) onde o relatório é
+               {'n_rows', 'n_valid', 'counts': {'nan', 'invalid_ohlc', 'outliers'},
+                'dropped': DataFrame (Date, reason),
+                'outliers': DataFrame (Date, column, value, expected, score)}
+    """
+    if not df['Date'].is_monotonic_increasing:
+        df = df.sort_values('Date', kind='stable')
+    
+    values = df[PRICE_COLUMNS].to_numpy(dtype=float)
+    open_, high, low, close = values.T
+    nan_rows = np.isnan(values).any(axis=1)
+    with np.errstate(invalid='ignore'):
+        invalid_rows = ~nan_rows & (
+            (high < np.maximum(np.maximum(open_, close), low)) |
+            (low > np.minimum(open_, close))
+        )
+    keep = ~(nan_rows | invalid_rows)
+    
+    clean = df[keep].reset_index(drop=True) if not keep.all() else df.reset_index(drop=True)
+    prices = values[keep]
+    
+    context_rows = REFERENCE_WINDOW + 2 * window
+    if history is not None and len(history) > 0:
+        context = history[PRICE_COLUMNS].to_numpy(dtype=float)[-context_rows:]
+        prices = np.vstack([context, prices])
+    else:
+        context = prices[:0]
+    
+    expected, scores = _robust_scores(prices, window)
+    expected, scores = expected[len(context):], scores[len(context):]
+    with np.errstate(invalid='ignore'):
+        rows, cols = np.nonzero(scores > threshold)
+    
+    report = {
+        'n_rows': len(df),
+        'n_valid': len(clean),
+        'counts': {
+            'nan': int(nan_rows.sum()),
+            'invalid_ohlc': int(invalid_rows.sum()),
+            'outliers': len(rows),
+        },
+        'dropped': pd.DataFrame({
+            'Date': df['Date'][~keep].reset_index(drop=True),
+            'reason': np.where(nan_rows[~keep], 'nan', 'invalid_ohlc'),
+        }),
+        'outliers': pd.DataFrame({
+            'Date': clean['Date'].take(rows).reset_index(drop=True),
+            'column': pd.Categorical.from_codes(cols, PRICE_COLUMNS),
+            'value': prices[len(context):][rows, cols],
+            'expected': expected[rows, cols],
+            'score': scores[rows, cols],
+        }),
+    }
+    
+    if nan_rows.any():
+        logger.warning(f"Removidas {report['counts']['nan']} linhas com valores NaN")
     if invalid_rows.any():
-        num_invalid = invalid_rows.sum()
-        logger.warning(f"Encontradas {num_invalid} linhas com lógica OHLC inválida. Removendo...")
-        df = df[~invalid_rows]
-    
-    for col in ['Open', 'High', 'Low', 'Close']:
-        Q1 = df[col].quantile(0.25)
-        Q3 = df[col].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = Q1 - 3 * IQR
-        upper_bound = Q3 + 3 * IQR
-        
-        outliers = (df[col] < lower_bound) | (df[col] > upper_bound)
-        if outliers.any():
-            logger.warning(f"Encontrados {outliers.sum()} outliers em {col} (não removidos, apenas logados)")
+        logger.warning(f"Encontradas {report['counts']['invalid_ohlc']} linhas com lógica OHLC inválida. Removendo...")
+    if len(rows):
+        by_column = report['outliers']['column'].value_counts()
+        logger.warning(
+            "Encontrados outliers (não removidos, apenas marcados): "
+            + ", ".join(f"{count} em {col}" for col, count in by_column.items() if count)
+        )
     
-    df = df.sort_values('Date').reset_index(drop=True)
+    return clean, report
+
+
+def validate_data(df, history=None):
+    """
+    Valida e limpa os dados OHLC.
     
-    return df
+    Args:
+        df (pd.DataFrame): DataFrame com dados OHLC
+        history (pd.DataFrame, optional): Candles já validados anteriores a df,
+            usados como contexto da detecção de outliers (ver validate_ohlc)
+    
+    Returns:
+        pd.DataFrame: DataFrame validado e limpo
+    """
+    return validate_ohlc(df, history=history)[0]
 
 
 def get_latest_data(df, days=1):
@@ -0,0 +1,244 @@
+"""
+Armazenamento colunar de históricos OHLC em arquivos mapeados em memória.
+Cada par tem um diretório com um arquivo binário contíguo por campo (Date em
+nanossegundos UTC, Open, High, Low, Close, Volume) e um meta.json com o número
+de candles publicados. Vários processos podem abrir o mesmo histórico só para
+leitura e passar views NumPy diretamente às funções de src/analysis, sem
+parsing nem cópia dos preços.
+"""
+
+import os
+import re
+import json
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = os.path.join(".cache", "history")
+
+FIELDS = {
+    'Date': np.dtype('int64'),
+    'Open': np.dtype('float64'),
+    'High': np.dtype('float64'),
+    'Low': np.dtype('float64'),
+    'Close': np.dtype('float64'),
+    'Volume': np.dtype('int64'),
+}
+
+# Capacidade mínima (em candles) de um arquivo novo; depois ela dobra a cada crescimento
+MIN_CAPACITY = 1024
+
+
+def _fsync_dir(path):
+    """Garante que renomeações dentro do diretório sobrevivem a uma queda (POSIX)."""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_atomic(path, data):
+    """Grava bytes em um arquivo temporário e o renomeia sobre path."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class HistoryStore:
+    """
+    Histórico OHLC de vários pares em arquivos colunares mapeados em memória.
+
+    Publicação atômica: append grava os candles novos além do último candle
+    publicado (região que nenhum leitor acessa), sincroniza os arquivos com o
+    disco e só então substitui meta.json (os.replace) com o novo total. Um
+    leitor lê meta.json primeiro e mapeia apenas os candles publicados, então
+    nunca vê um candle pela metade. Quando a capacidade acaba, cada campo é
+    copiado para um arquivo maior que substitui o anterior; leitores que já
+    tinham o arquivo antigo aberto continuam com um mapeamento válido.
+
+    Suporta um único processo escritor por par e quantos leitores forem necessários.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or os.getenv("FOREX_HISTORY_DIR", DEFAULT_STORE_DIR)
+
+    def _pair_dir(self, pair):
+        return os.path.join(self.root, re.sub(r'[^A-Za-z0-9]+', '_', pair).strip('_'))
+
+    def _field_path(self, pair, field):
+        return os.path.join(self._pair_dir(pair), f"{field}.bin")
+
+    def _read_meta(self, pair):
+        path = os.path.join(self._pair_dir(pair), "meta.json")
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_meta(self, pair, meta):
+        _write_atomic(os.path.join(self._pair_dir(pair), "meta.json"),
+                      json.dumps(meta, indent=2).encode('utf-8'))
+        _fsync_dir(self._pair_dir(pair))
+
+    def pairs(self):
+        """Pares com histórico publicado."""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            meta['pair'] for meta in
+            (self._read_meta(name) for name in os.listdir(self.root))
+            if meta is not None
+        )
+
+    def n_rows(self, pair):
+        """Número de candles publicados do par (0 se não existir)."""
+        meta = self._read_meta(pair)
+        return meta['n_rows'] if meta else 0
+
+    def _grow(self, pair, meta, capacity):
+        """Copia cada campo para um arquivo com a nova capacidade e o põe no lugar do antigo."""
+        n_rows = meta['n_rows']
+        for field, dtype in FIELDS.items():
+            path = self._field_path(pair, field)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            grown = np.memmap(tmp_path, dtype=dtype, mode='w+', shape=(capacity,))
+            if n_rows:
+                grown[:n_rows] = np.memmap(path, dtype=dtype, mode='r', shape=(n_rows,))
+            grown.flush()
+            del grown
+            with open(tmp_path, 'rb') as f:
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        logger.debug(f"Histórico de {pair}: capacidade ampliada para {capacity} candles")
+        return capacity
+
+    def append(self, pair, df):
+        """
+        Acrescenta candles ao fim do histórico do par.
+
+        Candles com Date igual ou anterior ao último publicado são ignorados: o
+        histórico só cresce no fim, e os candles já publicados nunca são reescritos.
+
+        Args:
+            pair (str): Identificador do par (ex.: 'BRL=X')
+            df (pd.DataFrame): Candles com colunas Date, Open, High, Low, Close, Volume
+
+        Returns:
+            int: Número de candles acrescentados
+        """
+        dates = pd.DatetimeIndex(df['Date'])
+        tz = str(dates.tz) if dates.tz is not None else ''
+        if dates.tz is not None:
+            dates = dates.tz_convert('UTC')
+        stamps = dates.as_unit('ns').asi8
+        if len(stamps) > 1 and not (np.diff(stamps) > 0).all():
+            raise ValueError("As datas dos candles precisam ser estritamente crescentes")
+
+        meta = self._read_meta(pair)
+        if meta is None:
+            os.makedirs(self._pair_dir(pair), exist_ok=True)
+            meta = {'pair': pair, 'n_rows': 0, 'capacity': 0, 'tz': tz, 'last_date': None}
+        elif meta['tz'] != tz:
+            raise ValueError(f"Fuso horário dos candles ({tz or 'sem fuso'}) difere do histórico ({meta['tz'] or 'sem fuso'})")
+
+        new = stamps > meta['last_date'] if meta['last_date'] is not None else np.ones(len(stamps), dtype=bool)
+        if not new.any():
+            return 0
+        skipped = int((~new).sum())
+        if skipped:
+            logger.info(f"Histórico de {pair}: {skipped} candles já publicados ignorados")
+
+        n_rows, n_new = meta['n_rows'], int(new.sum())
+        end = n_rows + n_new
+        if end > meta['capacity']:
+            meta['capacity'] = self._grow(pair, meta, max(MIN_CAPACITY, meta['capacity'] * 2, end))
+
+        values = {'Date': stamps[new]}
+        values.update({field: df[field].to_numpy()[new] for field in FIELDS if field != 'Date'})
+        for field, dtype in FIELDS.items():
+            column = np.memmap(self._field_path(pair, field), dtype=dtype, mode='r+', shape=(meta['capacity'],))
+            column[n_rows:end] = values[field]
+            column.flush()
+            del column
+
+        meta.update(n_rows=end, last_date=int(values['Date'][-1]))
+        self._write_meta(pair, meta)
+        return n_new
+
+    def arrays(self, pair, start=None, end=None):
+        """
+        Views somente leitura dos campos do par, sem cópia.
+
+        Args:
+            pair (str): Identificador do par
+            start, end (datetime/str, optional): Intervalo de datas [start, end)
+
+        Returns:
+            dict: {campo: np.ndarray somente leitura sobre o arquivo mapeado}, com os
+                  candles publicados no intervalo
+        """
+        meta = self._read_meta(pair)
+        if meta is None:
+            raise KeyError(f"Par sem histórico: {pair}")
+
+        n_rows = meta['n_rows']
+        columns = {
+            # np.asarray: ndarray comum sobre o mapeamento (sem a subclasse memmap nos resultados)
+            field: np.asarray(np.memmap(self._field_path(pair, field), dtype=dtype, mode='r', shape=(n_rows,)))
+            if n_rows else np.empty(0, dtype=dtype)
+            for field, dtype in FIELDS.items()
+        }
+
+        dates = columns['Date']
+        lo = 0 if start is None else int(np.searchsorted(dates, self._stamp(start, meta['tz']), side='left'))
+        hi = n_rows if end is None else int(np.searchsorted(dates, self._stamp(end, meta['tz']), side='left'))
+        return {field: column[lo:hi] for field, column in columns.items()}
+
+    @staticmethod
+    def _stamp(moment, tz):
+        moment = pd.Timestamp(moment)
+        if moment.tzinfo is None:
+            moment = moment.tz_localize(tz or 'UTC')
+        return moment.tz_convert('UTC').as_unit('ns').value
+
+    def read(self, pair, start=None, end=None):
+        """
+        DataFrame do histórico do par no formato de fetch_forex_data.
+
+        As colunas OHLC e Volume são views dos arquivos mapeados (somente leitura);
+        só a coluna Date é materializada ao receber o fuso horário original.
+
+        Args:
+            pair (str): Identificador do par
+            start, end (datetime/str, optional): Intervalo de datas [start, end)
+
+        Returns:
+            pd.DataFrame: DataFrame com colunas Date, Open, High, Low, Close, Volume
+        """
+        meta = self._read_meta(pair)
+        if meta is None:
+            raise KeyError(f"Par sem histórico: {pair}")
+        columns = self.arrays(pair, start, end)
+
+        dates = pd.DatetimeIndex(np.asarray(columns.pop('Date')).view('M8[ns]'), copy=False)
+        if meta['tz']:
+            dates = dates.tz_localize('UTC').tz_convert(meta['tz'])
+        return pd.DataFrame({'Date': dates, **columns}, copy=False)
+
+    def read_panel(self, pairs=None, start=None, end=None):
+        """
+        Históricos de vários pares (ex.: para calculate_panel_indicators ou backtest_markets).
+
+        Returns:
+            dict: {par: DataFrame de read}
+        """
+        return {pair: self.read(pair, start, end) for pair in (pairs or self.pairs())}
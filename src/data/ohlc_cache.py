@@ -0,0 +1,231 @@
+"""
+Cache local de candles OHLC.
+Guarda o histórico de cada ticker e intervalo em um arquivo .npz colunar, de modo
+que as execuções seguintes só buscam na fonte os candles posteriores ao último
+timestamp salvo.
+"""
+
+import os
+import re
+import time
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "ohlc")
+
+OHLC_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def _utc_ns(moment):
+    """
+    Timestamp em nanossegundos UTC.
+
+    Datas sem fuso são hora local, como as de datetime.now() passadas pelos chamadores
+    e como o yfinance as interpreta.
+    """
+    moment = pd.Timestamp(moment)
+    if moment.tzinfo is None:
+        moment = pd.Timestamp(moment.to_pydatetime().astimezone())
+    return moment.tz_convert('UTC').as_unit('ns').value
+
+
+def _bound_like(moment, reference):
+    """Data com fuso na convenção de reference: mesmo fuso ou, se reference não tem fuso, hora local sem fuso."""
+    if reference.tzinfo is not None:
+        return moment.tz_convert(reference.tzinfo).to_pydatetime()
+    return datetime.fromtimestamp(moment.timestamp())
+
+
+def _utc_ns_array(dates):
+    """Coluna de datas como int64 em nanossegundos UTC (a resolução do pandas varia)."""
+    dates = pd.DatetimeIndex(dates)
+    if dates.tz is not None:
+        dates = dates.tz_convert('UTC')
+    return dates.as_unit('ns').asi8
+
+
+class OHLCCache:
+    """
+    Cache em disco de históricos OHLC, um arquivo por (ticker, intervalo).
+
+    - Sem arquivo, arquivo ilegível, período pedido anterior ao salvo ou
+      force_refresh: busca o período inteiro (miss).
+    - Último candle salvo mais antigo que o histórico que a fonte ainda serve
+      (history_limit, ex.: 60 dias de candles de 5m no Yahoo Finance): a busca
+      incremental deixaria um buraco entre o cache e os candles novos, então o
+      arquivo é descartado e o período inteiro é buscado de novo (miss, com aviso
+      e contado em stats['gaps']). O histórico anterior ao limite deixa de existir
+      no cache, mas a série devolvida continua sem lacunas.
+    - Caso contrário: busca só a partir do último candle salvo (que é substituído,
+      pois pode ter sido gravado ainda em formação) e junta ao histórico (hit).
+    - Se a busca incremental falhar, devolve o histórico salvo (stale).
+
+    O arquivo guarda só o histórico que algum pedido ainda cobre: a maior distância
+    entre início e fim já pedida (lookback) contada a partir do fim mais recente. Com
+    uma janela móvel (ex.: últimos 5 anos), os candles que saem da janela deixam de
+    ser regravados a cada execução.
+
+    A função de busca recebe (início, fim) e devolve os candles do período; o início
+    incremental segue a convenção de end_date (mesmo fuso ou hora local sem fuso). Com
+    validate, só as linhas novas passam pela validação, recebendo o histórico
+    salvo anterior a elas como contexto; sem validate, fetch já deve devolvê-las validadas.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or os.getenv("FOREX_DATA_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'stale': 0,
+            'gaps': 0,
+            'rows_from_cache': 0,
+            'rows_fetched': 0,
+            'last_mode': None,
+            'last_fetch_seconds': None,
+        }
+
+    def _path(self, ticker, interval):
+        name = re.sub(r'[^A-Za-z0-9]+', '_', ticker).strip('_')
+        return os.path.join(self.cache_dir, f"{name}_{interval}.npz")
+
+    def _load(self, path):
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                tz = str(data['tz'])
+                dates = pd.to_datetime(data['Date'], unit='ns', utc=True)
+                df = pd.DataFrame({'Date': dates.tz_convert(tz) if tz else dates})
+                for col in OHLC_COLUMNS:
+                    df[col] = data[col]
+                # Arquivos anteriores ao lookback: sem corte do histórico
+                lookback = int(data['lookback']) if 'lookback' in data.files else None
+                return {'start': int(data['start']), 'lookback': lookback, 'df': df}
+        except Exception as e:
+            logger.warning(f"Arquivo de cache OHLC ilegível ({path}): {str(e)}. Ignorando.")
+            return None
+
+    def _save(self, path, df, start, lookback):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        dates = pd.DatetimeIndex(df['Date'])
+        tz = str(dates.tz) if dates.tz is not None else ''
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                Date=_utc_ns_array(dates),
+                start=np.int64(start),
+                lookback=np.int64(lookback),
+                tz=np.array(tz),
+                **{col: df[col].to_numpy() for col in OHLC_COLUMNS},
+            )
+        os.replace(tmp_path, path)
+
+    def _record(self, mode, elapsed, cached_rows, fetched_rows):
+        self.stats['last_mode'] = mode
+        self.stats['last_fetch_seconds'] = elapsed
+        self.stats['rows_from_cache'] += cached_rows
+        self.stats['rows_fetched'] += fetched_rows
+        if mode == 'hit':
+            self.stats['hits'] += 1
+        elif mode == 'stale':
+            self.stats['stale'] += 1
+        else:
+            self.stats['misses'] += 1
+
+    def load(self, ticker, interval, start_date, end_date, fetch, validate=None, force_refresh=False,
+             history_limit=None):
+        """
+        Retorna o histórico de start_date até end_date, buscando na fonte só o que falta.
+
+        Args:
+            ticker (str): Ticker da fonte (ex.: 'BRL=X')
+            interval (str): Intervalo dos candles
+            start_date (datetime): Início do período (sem fuso: hora local)
+            end_date (datetime): Fim do período (sem fuso: hora local)
+            fetch (callable): fetch(início, fim) -> DataFrame com Date e OHLC
+            validate (callable, optional): validate(candles, histórico anterior ou None)
+                -> candles validados
+            force_refresh (bool): Ignora o arquivo salvo e busca o período inteiro
+            history_limit (timedelta, optional): Histórico que a fonte ainda serve,
+                contado a partir de end_date (None: sem limite)
+
+        Returns:
+            pd.DataFrame: DataFrame com colunas Date, Open, High, Low, Close, Volume
+        """
+        path = self._path(ticker, interval)
+        requested_start = _utc_ns(start_date)
+        requested_end = _utc_ns(end_date)
+        lookback = requested_end - requested_start
+        entry = None if force_refresh else self._load(path)
+        if entry is not None and (entry['start'] > requested_start or len(entry['df']) == 0):
+            logger.info(f"Cache OHLC de {ticker} ({interval}) não cobre o período pedido; buscando tudo")
+            entry = None
+        if entry is not None and history_limit is not None:
+            earliest = _utc_ns(end_date - history_limit)
+            last_saved = _utc_ns(entry['df']['Date'].iloc[-1])
+            if last_saved < earliest:
+                self.stats['gaps'] += 1
+                logger.warning(
+                    f"Cache OHLC de {ticker} ({interval}) termina em {entry['df']['Date'].iloc[-1]}, antes do "
+                    f"histórico que a fonte ainda serve ({history_limit.days} dias); a busca incremental "
+                    f"deixaria uma lacuna. Descartando o cache e buscando o período inteiro"
+                )
+                entry = None
+
+        started = time.perf_counter()
+        if entry is None:
+            df = fetch(start_date, end_date)
+            if validate is not None:
+                df = validate(df, None)
+            elapsed = time.perf_counter() - started
+            self._record('miss', elapsed, 0, len(df))
+            stored_start = requested_start
+            logger.info(f"Cache OHLC de {ticker} ({interval}): miss, {len(df)} candles buscados em {elapsed:.2f}s")
+        else:
+            cached = entry['df']
+            last_date = cached['Date'].iloc[-1]
+            try:
+                new_rows = fetch(_bound_like(last_date, end_date), end_date)
+            except Exception as e:
+                self._record('stale', time.perf_counter() - started, len(cached), 0)
+                logger.warning(f"Falha na busca incremental de {ticker} ({interval}): {str(e)}. Usando o cache.")
+                return self._trim(cached, requested_start)
+
+            if len(new_rows) > 0:
+                first_new = _utc_ns(new_rows['Date'].min())
+                kept = cached[_utc_ns_array(cached['Date']) < first_new]
+                if validate is not None:
+                    new_rows = validate(new_rows, kept)
+            if len(new_rows) > 0:
+                df = pd.concat([kept, new_rows[['Date'] + OHLC_COLUMNS]], ignore_index=True)
+            else:
+                kept = cached
+                df = cached
+            elapsed = time.perf_counter() - started
+            self._record('hit', elapsed, len(kept), len(new_rows))
+            lookback = max(lookback, entry['lookback'] or requested_end - entry['start'])
+            stored_start = max(entry['start'], requested_end - lookback)
+            logger.info(
+                f"Cache OHLC de {ticker} ({interval}): hit, {len(kept)} candles do cache e "
+                f"{len(new_rows)} novos em {elapsed:.2f}s"
+            )
+
+        stored = self._trim(df, stored_start)
+        if len(stored) > 0:
+            self._save(path, stored, stored_start, lookback)
+        return self._trim(stored, requested_start)
+
+    @staticmethod
+    def _trim(df, requested_start):
+        """Descarta candles anteriores ao início pedido."""
+        return df[_utc_ns_array(df['Date']) >= requested_start].reset_index(drop=True)
+
+    def report(self):
+        """Resumo das métricas do cache (hits, misses, respostas do cache após falha, lacunas e candles)."""
+        return dict(self.stats)
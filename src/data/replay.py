@@ -0,0 +1,280 @@
+"""
+Feed de candles gravados para testes de carga sem rede.
+Reproduz históricos OHLC locais (CSV, pickle, arquivo do cache OHLC, diretório do
+HistoryStore ou séries sintéticas) emitindo os candles no ritmo original
+multiplicado por um fator de velocidade, com um ou vários pares intercalados e
+chegadas em rajadas opcionais. Alimenta run_load_test, que mede vazão e latência
+do pipeline a cada candle, em main.py (FOREX_DATA_SOURCE=replay) e em
+benchmarks/bench_replay.py.
+"""
+
+import os
+import time
+import logging
+
+import numpy as np
+import pandas as pd
+
+from src.data.synthetic import generate_ohlc, INTERVAL_FREQS
+
+logger = logging.getLogger(__name__)
+
+REPLAY_MODES = ('steady', 'bursty')
+
+# Candles entregues de uma vez em fetch_forex_data antes do primeiro candle reproduzido
+# (suficientes para todos os indicadores, inclusive a SMA de 200)
+DEFAULT_WARMUP_BARS = 300
+
+
+def load_recording(path):
+    """
+    Carrega históricos gravados em disco.
+
+    Formatos: .csv (coluna Date), .pkl (DataFrame salvo com to_pickle), .npz do
+    cache OHLC (src/data/ohlc_cache.py) ou diretório do HistoryStore (um par por
+    subdiretório). Em arquivos de um único par, o nome do par é o nome do arquivo.
+
+    Returns:
+        dict: {par: DataFrame com colunas Date, Open, High, Low, Close, Volume}
+    """
+    if os.path.isdir(path):
+        from src.data.history_store import HistoryStore
+        panel = HistoryStore(path).read_panel()
+        if not panel:
+            raise ValueError(f"Nenhum histórico encontrado em {path}")
+        return panel
+
+    pair, ext = os.path.splitext(os.path.basename(path))
+    if ext == '.csv':
+        df = pd.read_csv(path)
+        df['Date'] = pd.to_datetime(df['Date'], utc=True)
+    elif ext == '.pkl':
+        df = pd.read_pickle(path)
+    elif ext == '.npz':
+        from src.data.ohlc_cache import OHLCCache
+        entry = OHLCCache(os.path.dirname(path))._load(path)
+        if entry is None:
+            raise ValueError(f"Arquivo do cache OHLC ilegível: {path}")
+        df = entry['df']
+    else:
+        raise ValueError(f"Formato não suportado: {ext}. Use .csv, .pkl, .npz ou um diretório do HistoryStore")
+    return {pair: df.sort_values('Date').reset_index(drop=True)}
+
+
+def synthetic_recording(pairs=('BRL=X',), n_bars=2000, interval='1d', seed=42):
+    """
+    Históricos sintéticos (generate_ohlc) para vários pares, com as mesmas datas.
+
+    Returns:
+        dict: {par: DataFrame com colunas Date, Open, High, Low, Close, Volume}
+    """
+    return {
+        pair: generate_ohlc(n_bars, seed=seed + i, freq=INTERVAL_FREQS[interval])
+        for i, pair in enumerate(pairs)
+    }
+
+
+class ReplayFeed:
+    """
+    Reproduz históricos de um ou vários pares como uma sequência de candles no tempo.
+
+    Os primeiros warmup_bars candles de cada par formam o histórico inicial; os
+    demais são emitidos em ordem de data (pares intercalados), com o intervalo
+    original entre candles dividido por speed (speed=None emite sem esperar).
+
+    - steady: cada candle é emitido no seu horário
+    - bursty: os candles chegam em rajadas de burst_size, todas no horário do
+      último candle da rajada (mesma vazão média, chegadas concentradas)
+
+    clock (público, usado também por run_load_test) e sleep podem ser trocados por
+    versões simuladas nos testes.
+    """
+
+    def __init__(self, recordings, speed=60.0, mode='steady', burst_size=10,
+                 warmup_bars=DEFAULT_WARMUP_BARS, clock=time.monotonic, sleep=time.sleep):
+        if mode not in REPLAY_MODES:
+            raise ValueError(f"Modo inválido: {mode}. Use um de {REPLAY_MODES}")
+        if not recordings:
+            raise ValueError("Nenhum histórico para reproduzir")
+
+        self.recordings = {pair: df.reset_index(drop=True) for pair, df in recordings.items()}
+        self.speed = speed
+        self.mode = mode
+        self.burst_size = max(1, int(burst_size))
+        self.warmup_bars = warmup_bars
+        self.clock = clock
+        self._sleep = sleep
+        self._position = {pair: min(warmup_bars, len(df)) for pair, df in self.recordings.items()}
+        self._stream = None
+
+        # Tabela de eventos (data, par, linha) ordenada por data, estável entre pares
+        pairs = list(self.recordings)
+        stamps, pair_ids, rows = [], [], []
+        for pair_id, pair in enumerate(pairs):
+            df = self.recordings[pair]
+            replayed = np.arange(self._position[pair], len(df))
+            dates = pd.DatetimeIndex(df['Date'])
+            dates = dates.tz_convert('UTC') if dates.tz is not None else dates
+            stamps.append(dates.as_unit('ns').asi8[replayed])
+            pair_ids.append(np.full(len(replayed), pair_id))
+            rows.append(replayed)
+        stamps = np.concatenate(stamps)
+        order = np.argsort(stamps, kind='stable')
+        self._pairs = pairs
+        self._stamps = stamps[order]
+        self._pair_ids = np.concatenate(pair_ids)[order]
+        self._rows = np.concatenate(rows)[order]
+        self._release = self._release_offsets()
+
+    def __len__(self):
+        return len(self._stamps)
+
+    @property
+    def pairs(self):
+        """Pares reproduzidos, na ordem da gravação."""
+        return list(self._pairs)
+
+    def _release_offsets(self):
+        """Segundos, a partir do início da reprodução, em que cada candle é emitido."""
+        if len(self._stamps) == 0 or not self.speed:
+            return np.zeros(len(self._stamps))
+        offsets = (self._stamps - self._stamps[0]) / 1e9 / self.speed
+        if self.mode == 'bursty':
+            last_in_burst = np.minimum(
+                (np.arange(len(offsets)) // self.burst_size + 1) * self.burst_size, len(offsets)
+            ) - 1
+            offsets = offsets[last_in_burst]
+        return offsets
+
+    def history(self, pair=None):
+        """Histórico do par até o último candle emitido (view, sem cópia)."""
+        pair = pair or self._pairs[0]
+        return self.recordings[pair].iloc[:self._position[pair]]
+
+    def events(self):
+        """
+        Emite os candles no ritmo configurado.
+
+        Yields:
+            dict: {'pair', 'date', 'sequence', 'released' (horário previsto no clock),
+                   'emitted' (horário efetivo)}
+        """
+        start = self.clock()
+        for sequence in range(len(self._stamps)):
+            released = start + float(self._release[sequence])
+            delay = released - self.clock()
+            if delay > 0:
+                self._sleep(delay)
+
+            pair = self._pairs[self._pair_ids[sequence]]
+            row = self._rows[sequence]
+            self._position[pair] = row + 1
+            yield {
+                'pair': pair,
+                'date': self.recordings[pair]['Date'].iloc[row],
+                'sequence': sequence,
+                'released': released,
+                'emitted': self.clock(),
+            }
+
+    def fetch_forex_data(self, years=5, interval='1d', ticker=None, **kwargs):
+        """
+        Substituto de fetch_forex_data: avança um candle e devolve o histórico até ele.
+
+        years, interval e os demais argumentos de fetch_forex_data são ignorados
+        (o período e o intervalo são os da gravação).
+
+        Returns:
+            pd.DataFrame: DataFrame com colunas Date, Open, High, Low, Close, Volume
+        """
+        if self._stream is None:
+            self._stream = self.events()
+        event = next(self._stream, None)
+        if event is None:
+            logger.info("Reprodução concluída; devolvendo o histórico completo")
+        return self.history(ticker)
+
+    @classmethod
+    def from_env(cls):
+        """
+        Cria o feed a partir das variáveis de ambiente.
+
+        - FOREX_REPLAY_PATH: arquivo ou diretório gravado (padrão: 'synthetic')
+        - FOREX_REPLAY_SPEED: multiplicador de velocidade (padrão: 60; 0 = sem espera)
+        - FOREX_REPLAY_MODE: steady ou bursty (padrão: steady)
+        - FOREX_REPLAY_BURST_SIZE: candles por rajada no modo bursty (padrão: 10)
+        - FOREX_REPLAY_PAIRS: pares sintéticos separados por vírgula (padrão: BRL=X)
+        - FOREX_REPLAY_INTERVAL: intervalo dos candles sintéticos (padrão: 1m)
+        """
+        path = os.getenv("FOREX_REPLAY_PATH", "synthetic")
+        if path == "synthetic":
+            pairs = [p.strip() for p in os.getenv("FOREX_REPLAY_PAIRS", "BRL=X").split(",") if p.strip()]
+            recordings = synthetic_recording(pairs, interval=os.getenv("FOREX_REPLAY_INTERVAL", "1m"))
+        else:
+            recordings = load_recording(path)
+        return cls(
+            recordings,
+            speed=float(os.getenv("FOREX_REPLAY_SPEED", "60")),
+            mode=os.getenv("FOREX_REPLAY_MODE", "steady"),
+            burst_size=int(os.getenv("FOREX_REPLAY_BURST_SIZE", "10")),
+        )
+
+
+def _percentiles(values):
+    values = np.asarray(values, dtype=float)
+    if len(values) == 0:
+        return {'mean': None, 'p50': None, 'p95': None, 'p99': None, 'max': None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {'mean': float(values.mean()), 'p50': float(p50), 'p95': float(p95),
+            'p99': float(p99), 'max': float(values.max())}
+
+
+def run_load_test(feed, handler, max_events=None):
+    """
+    Processa cada candle do feed com handler e mede vazão e latência.
+
+    A latência de um candle vai do horário previsto de chegada até o fim do
+    processamento, incluindo a espera na fila quando o handler é mais lento que
+    a chegada dos candles.
+
+    Args:
+        feed (ReplayFeed): Feed de candles
+        handler (callable): handler(par, histórico) -> dict opcional {etapa: segundos}
+        max_events (int, optional): Para após esse número de candles
+
+    Returns:
+        dict: {'events', 'elapsed_seconds', 'throughput' (candles/s), 'arrival_rate',
+               'latency': {mean, p50, p95, p99, max}, 'stages': {etapa: {...}}}
+    """
+    latencies, stages = [], {}
+    start = time.perf_counter()
+    first_release = last_release = None
+
+    for event in feed.events():
+        stage_times = handler(event['pair'], feed.history(event['pair'])) or {}
+        done = feed.clock()
+        latencies.append(done - event['released'])
+        for stage, seconds in stage_times.items():
+            stages.setdefault(stage, []).append(seconds)
+
+        first_release = event['released'] if first_release is None else first_release
+        last_release = event['released']
+        if max_events and len(latencies) >= max_events:
+            break
+
+    elapsed = time.perf_counter() - start
+    span = (last_release - first_release) if latencies else 0.0
+    result = {
+        'events': len(latencies),
+        'elapsed_seconds': elapsed,
+        'throughput': len(latencies) / elapsed if elapsed > 0 else None,
+        'arrival_rate': (len(latencies) - 1) / span if span > 0 else None,
+        'latency': _percentiles(latencies),
+        'stages': {stage: _percentiles(values) for stage, values in stages.items()},
+    }
+    if latencies:
+        logger.info(
+            f"Teste de carga: {result['events']} candles em {elapsed:.2f}s "
+            f"({result['events'] / elapsed:.1f}/s); latência p95 {result['latency']['p95']:.3f}s"
+        )
+    return result
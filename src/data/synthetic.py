@@ -0,0 +1,109 @@
+"""
+Gerador de dados OHLC sintéticos.
+Produz séries reprodutíveis (por semente) com relações High/Low/Open/Close válidas,
+no mesmo formato de fetch_forex_data, para benchmarks e execuções sem acesso à rede.
+Inclui uma fonte de dados local (SyntheticSource) que substitui o Yahoo Finance em fetch_many.
+"""
+
+import time
+import zlib
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Frequência do pandas equivalente a cada intervalo do Yahoo Finance
+INTERVAL_FREQS = {
+    '1m': 'min', '2m': '2min', '5m': '5min', '15m': '15min', '30m': '30min',
+    '60m': 'h', '90m': '90min', '1h': 'h',
+    '1d': 'D', '5d': '5D', '1wk': 'W', '1mo': 'MS', '3mo': 'QS',
+}
+
+
+def generate_ohlc(n_bars, seed=42, start_price=5.0, volatility=0.008, drift=0.0,
+                  freq='D', start='2020-01-01'):
+    """
+    Gera candles OHLC por passeio aleatório geométrico.
+
+    O Close segue retornos log-normais; o Open parte do Close anterior com um pequeno
+    gap; High e Low envolvem Open e Close com uma sombra aleatória, garantindo
+    Low <= min(Open, Close) <= max(Open, Close) <= High em todas as linhas.
+
+    Args:
+        n_bars (int): Número de candles
+        seed (int): Semente do gerador (mesma semente, mesma série)
+        start_price (float): Preço inicial
+        volatility (float): Desvio padrão do retorno logarítmico por candle
+        drift (float): Retorno logarítmico médio por candle
+        freq (str): Frequência das datas (ex.: 'D', 'h', 'min')
+        start (str): Data do primeiro candle
+
+    Returns:
+        pd.DataFrame: DataFrame com colunas Date, Open, High, Low, Close, Volume
+    """
+    rng = np.random.default_rng(seed)
+
+    log_returns = rng.normal(drift, volatility, n_bars)
+    close = start_price * np.exp(np.cumsum(log_returns))
+
+    gaps = rng.normal(0, volatility * 0.1, n_bars)
+    open_ = np.empty(n_bars)
+    open_[:1] = start_price
+    open_[1:] = close[:-1] * np.exp(gaps[1:])
+
+    body_high = np.maximum(open_, close)
+    body_low = np.minimum(open_, close)
+    high = body_high * np.exp(np.abs(rng.normal(0, volatility * 0.5, n_bars)))
+    low = body_low * np.exp(-np.abs(rng.normal(0, volatility * 0.5, n_bars)))
+
+    return pd.DataFrame({
+        'Date': pd.date_range(start=start, periods=n_bars, freq=freq, tz='UTC'),
+        'Open': open_,
+        'High': high,
+        'Low': low,
+        'Close': close,
+        'Volume': np.zeros(n_bars, dtype=np.int64),
+    })
+
+
+class SyntheticSource:
+    """
+    Fonte de dados local com a interface de download em lote usada por fetch_many.
+
+    Cada ticker tem uma série própria (semente derivada do nome e do início do
+    período), e a mesma requisição devolve sempre os mesmos candles. latency simula
+    o tempo de resposta de cada requisição e failures faz as primeiras requisições
+    falharem, para exercitar as novas tentativas. As chamadas ficam em calls.
+    """
+
+    def __init__(self, latency=0.0, failures=0, seed=42, start_price=5.0, volatility=0.008):
+        self.latency = latency
+        self.failures = failures
+        self.seed = seed
+        self.start_price = start_price
+        self.volatility = volatility
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _history(self, ticker, start, end, interval):
+        dates = pd.date_range(start, end, freq=INTERVAL_FREQS[interval], inclusive='left', name='Date')
+        dates = dates.tz_localize('UTC') if dates.tz is None else dates
+        seed = self.seed + zlib.crc32(f"{ticker}|{dates[0] if len(dates) else ''}".encode('utf-8'))
+        bars = generate_ohlc(len(dates), seed=seed, start_price=self.start_price, volatility=self.volatility)
+        return bars.drop(columns='Date').set_index(dates)
+
+    def download(self, tickers, start, end, interval='1d'):
+        """
+        Candles de vários tickers em uma única requisição.
+
+        Returns:
+            dict: {ticker: DataFrame indexado pela data, com Open, High, Low, Close, Volume}
+        """
+        with self._lock:
+            self.calls.append((tuple(tickers), start, end, interval))
+            fail = len(self.calls) <= self.failures
+        if self.latency:
+            time.sleep(self.latency)
+        if fail:
+            raise ConnectionError("Falha simulada da fonte sintética")
+        return {ticker: self._history(ticker, start, end, interval) for ticker in tickers}
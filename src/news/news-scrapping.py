@@ -11,7 +11,7 @@ from typing import List, Dict, Optional
 logger = logging.getLogger(__name__)
 
 
-def fetch_news_with_llm(currency_pair="BRL/USD", days=7, llm_provider="gemini"):
+def fetch_news_with_llm(currency_pair="BRL/USD", days=7, llm_provider="gemini", cache=None, deadline=None):
     """
     Busca notícias recentes usando LLM para buscar contexto.
     
@@ -19,13 +19,28 @@ def fetch_news_with_llm(currency_pair="BRL/USD", days=7, llm_provider="gemini"):
         currency_pair (str): Par de moedas (padrão: BRL/USD)
         days (int): Número de dias para buscar notícias (padrão: 7)
         llm_provider (str): Provedor de LLM
+        cache (NewsCache, optional): Cache persistente (src/news/news_cache.py); as
+            notícias do fallback nunca são gravadas nele
+        deadline (float, optional): Instante (time.monotonic) em que a busca no LLM
+            desiste e devolve o fallback
     
     Returns:
         List[Dict]: Lista de notícias com título, data e snippet
     """
+    if cache is not None:
+        return cache.get(
+            currency_pair, days, llm_provider,
+            fetch=lambda: _fetch_news(currency_pair, days, llm_provider, deadline),
+            cacheable=lambda news: bool(news) and not any(item.get('fallback') for item in news),
+        )
+    return _fetch_news(currency_pair, days, llm_provider, deadline)
+
+
+def _fetch_news(currency_pair, days, llm_provider, deadline=None):
+    """Busca as notícias no provedor, recorrendo ao fallback em caso de erro."""
     try:
         if llm_provider == "gemini":
-            return _fetch_news_gemini(currency_pair, days)
+            return _fetch_news_gemini(currency_pair, days, deadline)
         else:
             logger.warning(f"Provedor {llm_provider} não suportado. Usando fallback.")
             return _fetch_news_fallback(currency_pair, days)
@@ -34,19 +49,16 @@ def fetch_news_with_llm(currency_pair="BRL/USD", days=7, llm_provider="gemini"):
         return _fetch_news_fallback(currency_pair, days)
 
 
-def _fetch_news_gemini(currency_pair, days):
+def _fetch_news_gemini(currency_pair, days, deadline=None):
     """Busca notícias usando Google Gemini via LangChain."""
     try:
-        from langchain_google_genai import ChatGoogleGenerativeAI
-        from langchain_core.prompts import ChatPromptTemplate
+        from src.agent.llm_clients import get_registry
         
         api_key = os.getenv("GOOGLE_API_KEY")
         if not api_key:
             logger.warning("GOOGLE_API_KEY não encontrada. Usando fallback.")
             return _fetch_news_fallback(currency_pair, days)
         
-        model_name = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
-        
         prompt_text = f"""Você é um assistente especializado em análise financeira. 
 Busque e resuma as principais notícias e eventos recentes (últimos {days} dias) 
 que possam impactar o par de moedas {currency_pair}.
@@ -70,35 +82,14 @@ Formato de resposta (JSON):
 Se não encontrar notícias específicas, mencione eventos econômicos gerais relevantes 
 para o par de moedas que foi informado que possam afetar a taxa de câmbio."""
 
-        prompt_template = ChatPromptTemplate.from_messages([
-            ("human", "{user_prompt}")
-        ])
-        
+        # Clientes reutilizados entre chamadas; modelos que falharam recentemente são pulados
         try:
-            llm = ChatGoogleGenerativeAI(
-                model=model_name,
-                google_api_key=api_key,
-                temperature=0.5,
-                max_output_tokens=800,
-            )
-            
-            chain = prompt_template | llm
-            response = chain.invoke({"user_prompt": prompt_text})
-            
-        except Exception as e:
-            logger.warning(f"Modelo {model_name} não disponível: {str(e)}. Tentando fallback para gemini-1.5-flash.")
-            try:
-                llm = ChatGoogleGenerativeAI(
-                    model="gemini-1.5-flash",
-                    google_api_key=api_key,
-                    temperature=0.5,
-                    max_output_tokens=800,
-                )
-                chain = prompt_template | llm
-                response = chain.invoke({"user_prompt": prompt_text})
-            except Exception:
-                logger.warning("gemini-1.5-flash não disponível. Usando fallback.")
-                return _fetch_news_fallback(currency_pair, days)
+            response, route = get_registry().invoke(prompt_text, temperature=0.5, max_output_tokens=800,
+                                                    deadline=deadline)
+        except (RuntimeError, TimeoutError) as e:
+            logger.warning(f"{str(e)}. Usando fallback.")
+            return _fetch_news_fallback(currency_pair, days)
+        logger.debug(f"Notícias obtidas pelo modelo {route}")
         
         content = response.content if hasattr(response, 'content') else str(response)
         
@@ -169,7 +160,8 @@ def _fetch_news_fallback(currency_pair, days):
         {
             'title': f'Monitoramento de {currency_pair}',
             'date': datetime.now().strftime('%Y-%m-%d'),
-            'snippet': f'Sem notícias para o par de moedas: {currency_pair}.'
+            'snippet': f'Sem notícias para o par de moedas: {currency_pair}.',
+            'fallback': True
         }
     ]
 
@@ -0,0 +1,180 @@
+"""
+Cache persistente das notícias coletadas via LLM.
+Guarda em disco as notícias de cada par de moedas, janela de dias e provedor,
+com validade (TTL) e stale-while-revalidate: uma entrada vencida há pouco é
+devolvida na hora enquanto uma thread em segundo plano busca a versão nova.
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "news")
+
+# Validade das notícias (1 hora) e tolerância extra em que a entrada vencida
+# ainda é servida enquanto é atualizada em segundo plano (1 dia)
+DEFAULT_TTL = 3600
+DEFAULT_STALE_TTL = 86400
+
+
+class NewsCache:
+    """
+    Cache em disco de notícias, um arquivo JSON por (par, dias, provedor).
+
+    - Entrada com idade menor que ttl: devolvida sem chamar o LLM (hit).
+    - Idade entre ttl e ttl + stale_ttl: devolvida na hora e atualizada em uma
+      thread em segundo plano, no máximo uma por chave (stale).
+    - Sem entrada, entrada ilegível ou mais velha que isso: busca síncrona (miss).
+
+    A função de busca não recebe argumentos e devolve a lista de notícias. Só
+    resultados aceitos por cacheable são gravados (as notícias genéricas do
+    fallback não são), então uma falha do LLM não substitui notícias válidas.
+    """
+
+    def __init__(self, cache_dir=None, ttl=None, stale_ttl=None, clock=time.time):
+        self.cache_dir = cache_dir or os.getenv("NEWS_CACHE_DIR", DEFAULT_CACHE_DIR)
+        self.ttl = float(ttl if ttl is not None else os.getenv("NEWS_CACHE_TTL", DEFAULT_TTL))
+        self.stale_ttl = float(stale_ttl if stale_ttl is not None else os.getenv("NEWS_CACHE_STALE_TTL", DEFAULT_STALE_TTL))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._refreshing = {}
+        self.stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'refresh_failures': 0,
+            'last_mode': None,
+            'last_age_seconds': None,
+        }
+
+    def _path(self, currency_pair, days, provider):
+        name = re.sub(r'[^A-Za-z0-9]+', '_', f"{currency_pair}_{days}d_{provider}").strip('_')
+        return os.path.join(self.cache_dir, f"{name}.json")
+
+    def _load(self, path):
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+            return entry if isinstance(entry.get('news'), list) else None
+        except Exception as e:
+            logger.warning(f"Entrada de cache de notícias ilegível ({path}): {str(e)}. Ignorando.")
+            return None
+
+    def _save(self, path, news):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'fetched_at': self._clock(), 'news': news}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def _record(self, mode, age):
+        with self._lock:
+            self.stats['last_mode'] = mode
+            self.stats['last_age_seconds'] = age
+            if mode == 'hit':
+                self.stats['hits'] += 1
+            elif mode == 'stale':
+                self.stats['stale_hits'] += 1
+            else:
+                self.stats['misses'] += 1
+
+    def age(self, currency_pair, days, provider):
+        """Idade em segundos da entrada salva (None se não existir)."""
+        entry = self._load(self._path(currency_pair, days, provider))
+        return None if entry is None else max(0.0, self._clock() - entry['fetched_at'])
+
+    def get(self, currency_pair, days, provider, fetch, cacheable=None):
+        """
+        Retorna as notícias do par, chamando fetch só quando o cache não as tem válidas.
+
+        Args:
+            currency_pair (str): Par de moedas (ex.: 'BRL/USD')
+            days (int): Janela de dias das notícias
+            provider (str): Provedor de LLM
+            fetch (callable): fetch() -> lista de notícias
+            cacheable (callable, optional): cacheable(notícias) -> bool; por padrão
+                grava qualquer lista não vazia
+
+        Returns:
+            List[Dict]: Lista de notícias com título, data e snippet
+        """
+        cacheable = cacheable or bool
+        path = self._path(currency_pair, days, provider)
+        entry = self._load(path)
+        age = None if entry is None else max(0.0, self._clock() - entry['fetched_at'])
+
+        if age is not None and age < self.ttl:
+            self._record('hit', age)
+            logger.info(f"Cache de notícias de {currency_pair} ({days}d, {provider}): hit, idade {age:.0f}s")
+            return entry['news']
+
+        if age is not None and age < self.ttl + self.stale_ttl:
+            self._record('stale', age)
+            logger.info(
+                f"Cache de notícias de {currency_pair} ({days}d, {provider}): vencido há "
+                f"{age - self.ttl:.0f}s; atualizando em segundo plano"
+            )
+            self._refresh_async(path, fetch, cacheable)
+            return entry['news']
+
+        self._record('miss', age)
+        started = time.perf_counter()
+        news = fetch()
+        if cacheable(news):
+            self._save(path, news)
+        logger.info(
+            f"Cache de notícias de {currency_pair} ({days}d, {provider}): miss, "
+            f"{len(news)} notícias buscadas em {time.perf_counter() - started:.2f}s"
+        )
+        return news
+
+    def _refresh_async(self, path, fetch, cacheable):
+        """Inicia a atualização da entrada em uma thread, se ainda não houver uma para ela."""
+        with self._lock:
+            if path in self._refreshing:
+                return
+            thread = threading.Thread(target=self._refresh, args=(path, fetch, cacheable), daemon=True)
+            self._refreshing[path] = thread
+        thread.start()
+
+    def _refresh(self, path, fetch, cacheable):
+        try:
+            news = fetch()
+            updated = cacheable(news)
+            if updated:
+                self._save(path, news)
+        except Exception as e:
+            logger.warning(f"Falha ao atualizar o cache de notícias ({path}): {str(e)}")
+            updated = False
+        with self._lock:
+            self._refreshing.pop(path, None)
+            self.stats['refreshes' if updated else 'refresh_failures'] += 1
+        if not updated:
+            logger.warning(f"Atualização do cache de notícias sem resultado válido ({path}); mantendo a entrada anterior")
+
+    def wait(self, timeout=None):
+        """
+        Aguarda as atualizações em segundo plano (ex.: antes de encerrar o processo).
+
+        Returns:
+            bool: True se todas terminaram dentro do timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            threads = list(self._refreshing.values())
+        for thread in threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        return not any(thread.is_alive() for thread in threads)
+
+    def report(self):
+        """Resumo das métricas do cache (hits, entradas vencidas servidas, misses e atualizações)."""
+        with self._lock:
+            return dict(self.stats)
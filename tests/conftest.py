@@ -0,0 +1,19 @@
+"""
+Configuração comum dos testes: coloca a raiz do projeto no sys.path (imports src.*)
+e oferece séries OHLC sintéticas reprodutíveis.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.data.synthetic import generate_ohlc
+
+
+@pytest.fixture
+def ohlc():
+    """400 candles diários sintéticos (semente fixa)."""
+    return generate_ohlc(400, seed=7)
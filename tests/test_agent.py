@@ -0,0 +1,164 @@
+import os
+import re
+import sys
+import random
+import asyncio
+import subprocess
+
+from src.agent import llm_clients
+from src.agent.agent import agenerate_insights, generate_insight, InsightStream, _generate_fallback
+from src.agent.llm_clients import LLMClientRegistry, FakeChatModel, TokenBucket
+
+CLASSES = ['Tendência de Alta', 'Tendência de Baixa', 'Alta Volatilidade', 'Neutro']
+
+
+def _requests(n):
+    return [
+        {
+            'classification': {'classification': f"{CLASSES[i % len(CLASSES)]} #{i}", 'confidence': 0.5},
+            'indicators_summary': {'price': 5.0 + i / 100},
+            'news_list': [],
+        }
+        for i in range(n)
+    ]
+
+
+def _echo(messages):
+    """Resposta que identifica o pedido pela classificação presente no prompt."""
+    prompt = messages[-1][1]
+    label = re.search(r"Classificação Atual: (.+)", prompt).group(1)
+    return f"O cenário de {label} é descrito pelos indicadores técnicos e pelo contexto do período."
+
+
+def _run(requests, model, **kwargs):
+    registry = LLMClientRegistry(factory=lambda *args: model, attempt_timeout=0)
+    return asyncio.run(agenerate_insights(requests, registry=registry, **kwargs))
+
+
+def test_results_follow_request_order():
+    requests = _requests(12)
+
+    insights = _run(requests, FakeChatModel(responses=_echo, latency=0.01), max_concurrency=4)
+
+    assert insights == [
+        f"O cenário de {request['classification']['classification']} é descrito pelos "
+        f"indicadores técnicos e pelo contexto do período."
+        for request in requests
+    ]
+
+
+def test_failed_call_falls_back_for_that_item_only():
+    requests = _requests(6)
+
+    def flaky(messages):
+        if "#3" in messages[-1][1]:
+            raise RuntimeError("Falha simulada do modelo")
+        return _echo(messages)
+
+    insights = _run(requests, FakeChatModel(responses=flaky), max_concurrency=6)
+
+    for i, (request, insight) in enumerate(zip(requests, insights)):
+        if i == 3:
+            assert insight == _generate_fallback(
+                request['classification'], request['indicators_summary'], request['news_list'])
+        else:
+            assert request['classification']['classification'] in insight
+
+
+def test_semaphore_caps_concurrent_calls():
+    model = FakeChatModel(latency=0.05)
+
+    insights = _run(_requests(20), model, max_concurrency=3)
+
+    assert len(insights) == 20
+    assert model.calls == 20
+    assert model.peak_in_flight == 3
+
+
+def test_token_bucket_waits_for_refill_on_the_injected_clock():
+    now = [0.0]
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=fake_sleep)
+
+    async def acquire(n):
+        for _ in range(n):
+            await bucket.acquire()
+
+    asyncio.run(acquire(2))
+    assert sleeps == []
+
+    asyncio.run(acquire(1))
+    assert sleeps == [0.5]
+
+    # Tempo parado acumula fichas só até a capacidade
+    now[0] += 10
+    asyncio.run(acquire(3))
+    assert sleeps == [0.5, 0.5]
+
+
+STREAM_TEXTS = [
+    FakeChatModel.DEFAULT_RESPONSE,
+    "  Analistas dizem: compre agora ou venda agora, e você deve comprar antes do fechamento; "
+    "sugiro que você investir é comum em textos assim. Buy now aparece também.",
+    "Texto curto demais.",
+    "O real oscila sem direção definida e sem pontuação no fim do texto",
+    "   ",
+]
+
+
+def test_stream_output_equals_whole_text_output(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "chave-de-teste")
+    request = _requests(1)[0]
+    rng = random.Random(7)
+
+    for text in STREAM_TEXTS:
+        for _ in range(15):
+            model = FakeChatModel(responses=[text], chunk_size=rng.randint(1, 40))
+            registry = LLMClientRegistry(factory=lambda *args: model, attempt_timeout=0)
+            monkeypatch.setattr(llm_clients, 'get_registry', lambda: registry)
+
+            stream = InsightStream(**request, registry=registry)
+            streamed = "".join(stream)
+            whole = generate_insight(**request)
+
+            assert streamed == stream.insight == whole
+
+
+def test_stream_never_shows_text_that_final_validation_rejects(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "chave-de-teste")
+    request = _requests(1)[0]
+    model = FakeChatModel(responses=["Resposta curta."], chunk_size=3)
+    registry = LLMClientRegistry(factory=lambda *args: model, attempt_timeout=0)
+
+    stream = InsightStream(**request, registry=registry)
+    chunks = list(stream)
+
+    assert chunks == [stream.insight]
+    assert "Resposta curta" not in stream.insight
+
+
+def test_stream_checks_the_api_key_before_calling_the_model(monkeypatch):
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    request = _requests(1)[0]
+    model = FakeChatModel()
+    registry = LLMClientRegistry(factory=lambda *args: model, attempt_timeout=0)
+
+    chunks = list(InsightStream(**request, registry=registry))
+
+    assert model.calls == 0
+    assert "".join(chunks) == generate_insight(**request)
+
+
+def test_agent_runs_as_a_script(tmp_path):
+    script = os.path.join(os.path.dirname(os.path.dirname(__file__)), "src", "agent", "agent.py")
+
+    result = subprocess.run([sys.executable, script], cwd=tmp_path, capture_output=True, text=True, timeout=60)
+
+    assert result.returncode == 0
+    assert "Erro ao gerar insight" not in result.stderr
+    assert "=== Insight Gerado ===" in result.stdout
@@ -0,0 +1,131 @@
+"""
+Testes do módulo de análise técnica (src/analysis/analysis.py).
+"""
+
+import pandas as pd
+import pytest
+
+from src.analysis.analysis import (
+    analyze_market,
+    analyze_markets,
+    calculate_all_indicators,
+    classify_heuristic,
+    classify_heuristic_series,
+    get_feature_importance_budgeted,
+    get_rule_contributions,
+    rule_attribution_frame,
+)
+from src.analysis.backtest import backtest_heuristic, backtest_markets
+from src.data.synthetic import generate_ohlc
+
+
+def test_classify_heuristic_series_matches_per_row_rules(ohlc):
+    df = calculate_all_indicators(ohlc)
+    series = classify_heuristic_series(df)
+
+    # As primeiras linhas (SMA_50 ainda NaN) exercitam o aquecimento
+    assert df['SMA_50'].isna().iloc[:49].all()
+
+    for i in range(len(df)):
+        expected = classify_heuristic(df.iloc[:i + 1])
+        assert series['classification'].iloc[i] == expected['classification'], i
+        assert series['confidence'].iloc[i] == expected['confidence'], i
+
+    assert series.index.equals(df.index)
+    assert set(series['classification'].iloc[60:]) - {'Neutro'}
+
+
+
+def test_rule_contributions_add_up_to_heuristic_scores(ohlc):
+    df = calculate_all_indicators(ohlc)
+    attribution = rule_attribution_frame(df)
+    contributions = get_rule_contributions(df)
+
+    expected, total = {}, 0
+    for i in range(len(df)):
+        result = classify_heuristic(df.iloc[:i + 1])
+        label = result['classification']
+        if label == 'Neutro':
+            # Nenhuma regra pontuou (ou indicadores ainda em aquecimento)
+            continue
+        points = attribution.iloc[i][label]
+        score = result['scores'][label]
+        # As regras da classe vencedora somam o score da heurística, e a confiança vem dele
+        assert points.sum() == score, i
+        assert result['confidence'] == min(score / 4.0, 1.0), i
+        total += score
+        for feature, value in points.items():
+            expected[feature] = expected.get(feature, 0) + value
+
+    assert total > 0
+    assert sum(contributions.values()) == pytest.approx(1.0)
+    for feature in set(expected) | set(contributions):
+        assert contributions.get(feature, 0) * total == pytest.approx(expected.get(feature, 0)), feature
+
+
+@pytest.mark.parametrize('budget_clock', ['wall', 'cpu'])
+def test_budgeted_importance_stops_on_budget_or_convergence(ohlc, budget_clock):
+    df = calculate_all_indicators(ohlc)
+
+    tiny = get_feature_importance_budgeted(df, time_budget=0.0, budget_clock=budget_clock,
+                                           batch_trees=16, max_trees=300, n_jobs=1)
+    assert tiny['n_estimators'] == 16
+    assert tiny['budget_exhausted'] and not tiny['converged']
+    assert tiny['feature_importance']
+
+    large = get_feature_importance_budgeted(df, time_budget=1e6, budget_clock=budget_clock,
+                                            batch_trees=16, max_trees=300, n_jobs=1)
+    assert large['converged'] and not large['budget_exhausted']
+    assert 16 < large['n_estimators'] < 300
+    assert large['n_estimators'] % 16 == 0
+    assert sum(large['feature_importance'].values()) == pytest.approx(1.0)
+
+
+def test_short_histories_return_nan_indicators(ohlc):
+    for n_rows in (0, 1, 2):
+        df = calculate_all_indicators(ohlc.iloc[:n_rows])
+        assert len(df) == n_rows
+        assert df['SMA_20'].isna().all()
+        assert len(classify_heuristic_series(df)) == n_rows
+
+
+def test_chunked_indicators_match_single_pass(ohlc):
+    full = calculate_all_indicators(ohlc)
+    for chunk_size in (1, 7, 128):
+        pd.testing.assert_frame_equal(calculate_all_indicators(ohlc, chunk_size=chunk_size), full,
+                                      check_exact=False, rtol=1e-9)
+
+
+def _panel():
+    # Pares com tamanhos diferentes exercitam o alinhamento pelo candle mais recente
+    return {
+        'BRL=X': generate_ohlc(320, seed=1),
+        'EURBRL=X': generate_ohlc(260, seed=2, start_price=6.0),
+        'JPY=X': generate_ohlc(300, seed=3, start_price=150.0),
+    }
+
+
+def test_analyze_markets_matches_single_pair_analysis():
+    panel = _panel()
+    results = analyze_markets(panel, explain_mode='rules')
+
+    assert set(results) == set(panel)
+    for pair, df in panel.items():
+        single = analyze_market(df, explain_mode='rules')
+        assert results[pair]['classification'] == single['classification']
+        assert results[pair]['confidence'] == single['confidence']
+        assert results[pair]['latest_data'].keys() == single['latest_data'].keys()
+        for key, value in single['indicators_summary'].items():
+            assert results[pair]['indicators_summary'][key] == pytest.approx(value, rel=1e-9), (pair, key)
+
+
+def test_backtest_markets_matches_single_pair_backtest():
+    panel = _panel()
+    result = backtest_markets(panel, horizons=(1, 5), max_workers=1)
+
+    assert set(result['pairs']) == set(panel)
+    for pair, df in panel.items():
+        single = backtest_heuristic(df, horizons=(1, 5))
+        assert (result['pairs'][pair]['labels']['classification'].to_numpy()
+                == single['labels']['classification'].to_numpy()).all()
+    assert result['overall']
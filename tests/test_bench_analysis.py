@@ -0,0 +1,41 @@
+"""
+Testes do gate de regressão de benchmarks/bench_analysis.py.
+"""
+
+import os
+import sys
+import importlib.util
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def bench():
+    spec = importlib.util.spec_from_file_location(
+        "bench_analysis", os.path.join(ROOT, "benchmarks", "bench_analysis.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_missing_baseline_fails(bench, tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, 'argv', ['bench_analysis.py', '--baseline', str(tmp_path / 'baseline.json')])
+    assert bench.main() == 2
+
+
+def test_compare_reports_regressions_and_uncovered(bench):
+    baseline = {'results': {'stage': {'1000': {'seconds': 1.0, 'peak_mib': 10.0}}}}
+    results = {'stage': {
+        '1000': {'seconds': 2.0, 'peak_mib': 10.0},
+        '2000': {'seconds': 1.0, 'peak_mib': 10.0},
+        '3000': {'skipped': 'acima de --max-model-bars'},
+    }}
+
+    regressions, uncovered = bench.compare(results, baseline, threshold=0.25, memory_threshold=0.25,
+                                           min_seconds=0.01)
+
+    assert len(regressions) == 1 and regressions[0].startswith('stage @ 1000: tempo')
+    assert uncovered == ['stage @ 2000']
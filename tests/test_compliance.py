@@ -0,0 +1,149 @@
+import random
+
+import pytest
+
+from src.agent.compliance import (
+    ComplianceEngine,
+    StreamingComplianceFilter,
+    DEFAULT_PHRASES,
+    REPLACEMENTS,
+    expand_pattern,
+)
+
+
+def _reference_scan(engine, text):
+    """Varredura direta: em cada posição, a frase mais longa; sem sobreposição."""
+    lower = text.lower()
+    matches, position = [], 0
+    while position < len(lower):
+        found = next((phrase for phrase in engine.phrases if lower.startswith(phrase, position)), None)
+        if found is None:
+            position += 1
+            continue
+        matches.append((position, position + len(found), found))
+        position += len(found)
+    return matches
+
+
+def _spans(matches):
+    return [(match['start'], match['end'], match['phrase']) for match in matches]
+
+
+def test_longest_phrase_wins_at_the_same_position():
+    engine = ComplianceEngine()
+
+    assert _spans(engine.scan("Compre agora!")) == [(0, 12, 'compre agora')]
+    assert _spans(engine.scan("compre amanhã")) == [(0, 6, 'compre')]
+
+
+def test_leftmost_match_wins_over_a_longer_one_starting_later():
+    engine = ComplianceEngine(phrases={'pt': {'forbidden': ['ab', 'bcdef'], 'recommendation': []}})
+
+    assert _spans(engine.scan("abcdef")) == [(0, 2, 'ab')]
+
+
+def test_matches_do_not_overlap():
+    engine = ComplianceEngine()
+
+    # "não invista" contém "invista": só a frase que começa antes conta
+    assert _spans(engine.scan("Não invista hoje")) == [(0, 11, 'não invista')]
+    # "você deve comprar" começa antes de "deve comprar"
+    matches = engine.scan("Você deve comprar dólares")
+    assert _spans(matches) == [(0, 17, 'você deve comprar')]
+    assert matches[0]['category'] == 'recommendation'
+
+
+def test_scan_matches_the_reference_on_random_text():
+    engine = ComplianceEngine()
+    rng = random.Random(3)
+    words = ['compre', 'agora', 'venda', 'não', 'invista', 'você', 'deve', 'comprar', 'sugiro', 'que',
+             'vender', 'buy', 'now', 'o', 'real', 'é', 'recomendável', 'investir', 'seria']
+
+    for _ in range(300):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(0, 25)))
+        assert _spans(engine.scan(text)) == _reference_scan(engine, text)
+
+
+def test_spans_point_into_the_original_text():
+    engine = ComplianceEngine()
+    # "İ" vira dois caracteres em lower(); as posições continuam valendo no original
+    text = "İstanbul: VOCÊ PODE VENDER, ou Buy Now."
+
+    matches = engine.scan(text)
+
+    assert [match['text'] for match in matches] == ['VOCÊ PODE VENDER', 'Buy Now']
+    for match in matches:
+        assert text[match['start']:match['end']] == match['text']
+    assert [match['language'] for match in matches] == ['pt', 'en']
+
+
+def test_redact_replaces_each_span_by_its_category():
+    engine = ComplianceEngine()
+
+    clean, matches = engine.redact("Compre agora, seria recomendável investir.")
+
+    assert clean == f"{REPLACEMENTS['forbidden']}, {REPLACEMENTS['recommendation']}."
+    assert len(matches) == 2
+    assert engine.redact("Texto neutro.") == ("Texto neutro.", [])
+
+
+def test_batch_scanning_matches_one_text_at_a_time():
+    engine = ComplianceEngine()
+    texts = ["compre agora", "", "nada a declarar", "você precisa investir e venda agora", "SELL NOW"]
+
+    assert engine.scan_batch(texts) == [engine.scan(text) for text in texts]
+    assert engine.redact_batch(texts) == [engine.redact(text) for text in texts]
+
+
+def test_languages_select_the_phrase_lists():
+    english = ComplianceEngine(languages=['en'])
+
+    assert english.scan("compre agora") == []
+    assert _spans(english.scan("You should buy now")) == [(0, 14, 'you should buy')]
+
+    portuguese = ComplianceEngine(languages=['pt'])
+    assert portuguese.scan("buy now") == []
+
+    with pytest.raises(ValueError):
+        ComplianceEngine(languages=['fr'])
+
+
+def test_phrase_in_several_lists_keeps_the_first_language():
+    phrases = {
+        'pt': {'forbidden': ['hold'], 'recommendation': []},
+        'en': {'forbidden': [], 'recommendation': ['hold']},
+    }
+
+    assert ComplianceEngine(phrases, languages=['pt', 'en']).scan("hold")[0]['language'] == 'pt'
+    match = ComplianceEngine(phrases, languages=['en', 'pt']).scan("hold")[0]
+    assert (match['language'], match['category']) == ('en', 'recommendation')
+
+
+def test_expand_pattern_covers_alternatives_and_optional_groups():
+    phrases = expand_pattern(r'(sugiro|recomendo) (que você )?comprar')
+
+    assert sorted(phrases) == sorted([
+        'sugiro que você comprar', 'sugiro comprar', 'recomendo que você comprar', 'recomendo comprar',
+    ])
+    for pattern in DEFAULT_PHRASES['pt']['recommendation']:
+        assert all('(' not in phrase for phrase in expand_pattern(pattern))
+
+
+def test_streaming_filter_equals_redact_at_random_chunk_sizes():
+    engine = ComplianceEngine()
+    text = ("O real oscilou; você deve comprar? Não invista, compre agora ou venda. "
+            "Seria aconselhável vender, sugiro que você investir. Buy now!") * 3
+    rng = random.Random(11)
+
+    for _ in range(50):
+        stream = StreamingComplianceFilter(engine)
+        position, output = 0, []
+        while position < len(text):
+            size = rng.randint(1, 12)
+            output.append(stream.feed(text[position:position + size]))
+            position += size
+        output.append(stream.flush())
+
+        clean, matches = engine.redact(text)
+        assert "".join(output) == clean
+        assert _spans(stream.matches) == _spans(matches)
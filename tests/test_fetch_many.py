@@ -0,0 +1,81 @@
+"""
+Testes da busca concorrente de vários tickers (fetch_many em src/data/forex-scrapping.py),
+com a fonte local SyntheticSource no lugar do Yahoo Finance.
+"""
+
+import os
+import time
+import threading
+import importlib.util
+
+import pytest
+
+from src.data.synthetic import SyntheticSource
+
+pytest.importorskip('yfinance')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='module')
+def forex():
+    spec = importlib.util.spec_from_file_location(
+        "forex_scrapping", os.path.join(ROOT, "src", "data", "forex-scrapping.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+TICKERS = [f"PAIR{i}=X" for i in range(12)]
+
+
+def test_batches_run_concurrently(forex):
+    source = SyntheticSource(latency=0.2)
+
+    started = time.perf_counter()
+    data = forex.fetch_many(TICKERS, years=1, batch_size=5, max_workers=3, source=source)
+    elapsed = time.perf_counter() - started
+
+    assert set(data) == set(TICKERS)
+    assert sorted(len(tickers) for tickers, *_ in source.calls) == [2, 5, 5]
+    # Três lotes em paralelo: perto de uma latência, não de três
+    assert elapsed < 0.5
+    assert all(list(df.columns) == ['Date', 'Open', 'High', 'Low', 'Close', 'Volume'] for df in data.values())
+
+
+def test_concurrent_requests_for_same_tickers_are_coalesced(forex):
+    source = SyntheticSource(latency=0.3)
+    results = []
+    barrier = threading.Barrier(5)
+
+    def worker():
+        barrier.wait()
+        results.append(forex.fetch_many(TICKERS[:3], years=1, source=source))
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(source.calls) == 1
+    assert len(results) == 5
+    for result in results:
+        assert all(result[ticker] is results[0][ticker] for ticker in TICKERS[:3])
+
+
+def test_failures_are_retried(forex):
+    source = SyntheticSource(failures=2)
+    data = forex.fetch_many(TICKERS[:2], years=1, retries=3, backoff=0.0, source=source)
+
+    assert set(data) == set(TICKERS[:2])
+    assert len(source.calls) == 3
+
+
+def test_exhausted_retries_leave_tickers_out(forex):
+    source = SyntheticSource(failures=10)
+    data = forex.fetch_many(TICKERS[:2], years=1, retries=1, backoff=0.0, source=source)
+
+    assert data == {}
+    assert len(source.calls) == 2
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.synthetic import generate_ohlc
+from src.analysis.analysis import calculate_all_indicators
+from src.analysis.incremental import IncrementalIndicators, INDICATOR_COLUMNS
+
+CENTERED = ['Support', 'Resistance']
+
+
+@pytest.fixture(scope='module')
+def bars():
+    """500 candles com um trecho de preço parado no meio (janelas de variância zero)."""
+    df = generate_ohlc(500, seed=3)
+    df.loc[250:320, ['Open', 'High', 'Low', 'Close']] = 5.0
+    return df
+
+
+@pytest.fixture(scope='module')
+def batch(bars):
+    return calculate_all_indicators(bars)
+
+
+def _feed(bars, warmup):
+    engine = IncrementalIndicators.from_history(bars.iloc[:warmup])
+    rows, levels = [], {}
+    for bar in bars.iloc[warmup:].to_dict('records'):
+        rows.append(engine.update(bar))
+        if engine.centered_levels is not None:
+            levels[engine.centered_levels['index']] = engine.centered_levels
+    return engine, pd.DataFrame(rows, index=bars.index[warmup:]), levels
+
+
+# 0 e 5: linhas de aquecimento ainda NaN; 150: antes de SMA_200; 230 e 260: EMAs em
+# lote no início e o trecho parado entrando ou já dentro da janela
+@pytest.mark.parametrize('warmup', [0, 5, 150, 230, 260, 400])
+def test_update_matches_batch_indicators(bars, batch, warmup):
+    _, incremental, _ = _feed(bars, warmup)
+
+    for column in INDICATOR_COLUMNS:
+        if column in CENTERED:
+            continue
+        np.testing.assert_allclose(
+            incremental[column].to_numpy(float), batch[column].iloc[warmup:].to_numpy(float),
+            rtol=1e-9, err_msg=column,
+        )
+
+
+@pytest.mark.parametrize('warmup', [0, 230])
+def test_centered_levels_match_batch_support_and_resistance(bars, batch, warmup):
+    engine, incremental, levels = _feed(bars, warmup)
+
+    # Na linha mais recente a janela centralizada ainda não fechou, como no lote
+    assert incremental[CENTERED].isna().all().all()
+    assert engine.centered_levels['index'] == len(bars) - 10
+
+    closed = sorted(levels)
+    assert closed == list(range(max(warmup, 19) - 9, len(bars) - 9))
+    for column in CENTERED:
+        np.testing.assert_allclose(
+            [levels[index][column] for index in closed], batch[column].loc[closed].to_numpy(float),
+            rtol=1e-9, err_msg=column,
+        )
+
+
+def test_flat_run_gives_exact_zero_spread(bars, batch):
+    _, incremental, _ = _feed(bars, 0)
+    flat = slice(300, 320)
+
+    assert (incremental.loc[flat, 'BB_Width'] == 0).all()
+    assert incremental.loc[flat, 'RSI'].isna().all()
+    assert incremental.loc[flat, 'BB_Position'].isna().all()
+    assert (batch.loc[flat, 'BB_Width'] == 0).all()
+
@@ -0,0 +1,78 @@
+"""
+Paridade do kernel de momentos móveis (src/analysis/kernels.py) com o rolling do pandas.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis.kernels import (
+    rolling_mean, rolling_std, rolling_min, rolling_max, rolling_moments, moments_to_mean,
+)
+
+
+def _series(n_rows, n_cols=None, seed=0):
+    rng = np.random.default_rng(seed)
+    values = 5.0 + np.cumsum(rng.normal(0, 0.01, (n_rows, n_cols or 1)), axis=0)
+    # Trechos repetidos e NaN exercitam as janelas constantes e a propagação de NaN
+    if n_rows > 40:
+        values[10:35] = values[10]
+        values[37] = np.nan
+    return values[:, 0] if n_cols is None else values
+
+
+@pytest.mark.parametrize('n_rows', [0, 1, 2, 3, 25, 300])
+@pytest.mark.parametrize('n_cols', [None, 3])
+@pytest.mark.parametrize('window', [1, 2, 20, 200])
+def test_kernel_matches_pandas_rolling(n_rows, n_cols, window):
+    values = _series(n_rows, n_cols)
+    frame = pd.DataFrame(values.reshape(n_rows, n_cols or 1))
+    rolling = frame.rolling(window=window)
+
+    # O próprio rolling do pandas acumula erro de arredondamento (ex.: desvio ~1e-9 em
+    # janelas constantes, onde o kernel devolve zero exato)
+    def check(result, expected):
+        np.testing.assert_allclose(np.asarray(result).reshape(frame.shape), expected.to_numpy(),
+                                   rtol=1e-9, atol=1e-8)
+
+    check(rolling_mean(values, window), rolling.mean())
+    check(rolling_std(values, window), rolling.std())
+    check(rolling_min(values, window), rolling.min())
+    check(rolling_max(values, window, center=True), frame.rolling(window=window, center=True).max())
+
+
+@pytest.mark.parametrize('n_rows', [0, 1])
+def test_short_input_returns_nan_windows(n_rows):
+    moments = rolling_moments(np.ones(n_rows), [20, 50], stats=('sum', 'sumsq'))
+    assert moments_to_mean(moments, 20).shape == (n_rows,)
+    assert np.isnan(moments_to_mean(moments, 50)).all()
+
+
+@pytest.mark.parametrize('n_cols', [None, 3])
+def test_infinite_values_only_void_their_own_windows(n_cols):
+    values = _series(1000, n_cols)
+    values[300] = np.inf
+    values[700] = -np.inf
+    # ±inf conta como NaN, como no rolling do pandas
+    frame = pd.DataFrame(np.where(np.isinf(values), np.nan, values).reshape(1000, n_cols or 1))
+
+    for window in (20, 200):
+        mean = np.asarray(rolling_mean(values, window)).reshape(frame.shape)
+        std = np.asarray(rolling_std(values, window)).reshape(frame.shape)
+        np.testing.assert_allclose(mean, frame.rolling(window).mean().to_numpy(), rtol=1e-9, atol=1e-8)
+        np.testing.assert_allclose(std, frame.rolling(window).std().to_numpy(), rtol=1e-9, atol=1e-8)
+        np.testing.assert_allclose(rolling_max(values, window).reshape(frame.shape),
+                                   frame.rolling(window).max().to_numpy())
+        # Fora das janelas com inf, nada de NaN no mesmo bloco de somas
+        assert np.isfinite(std[300 + window:700]).all()
+        assert np.isfinite(std[700 + window:]).all()
+
+
+def test_std_keeps_precision_on_a_drifting_series():
+    rng = np.random.default_rng(1)
+    # Tendência forte: o preço se afasta milhares de desvios do início da série
+    values = 5.0 + np.cumsum(rng.normal(0.05, 0.01, 20000))
+
+    for window in (20, 200):
+        exact = np.lib.stride_tricks.sliding_window_view(values, window).std(axis=1, ddof=1)
+        np.testing.assert_allclose(rolling_std(values, window)[window - 1:], exact, rtol=1e-10)
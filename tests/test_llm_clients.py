@@ -0,0 +1,124 @@
+import time
+
+import pytest
+
+from src.agent.llm_clients import LLMClientRegistry, FakeChatModel
+
+
+def _registry(**models):
+    return LLMClientRegistry(factory=lambda model, *args: models[model], attempt_timeout=0)
+
+
+def test_invoke_gives_up_at_the_deadline_without_tripping_the_breakers():
+    registry = _registry(slow=FakeChatModel(latency=1.0))
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        registry.invoke("prompt", models=["slow"], deadline=started + 0.1)
+
+    assert time.monotonic() - started < 0.5
+    route = registry.report()['routes']['slow']
+    assert route['failures'] == 0
+    assert route['state'] == 'closed'
+
+
+def test_invoke_with_an_expired_deadline_does_not_call_the_model():
+    model = FakeChatModel()
+    registry = _registry(fast=model)
+
+    with pytest.raises(TimeoutError):
+        registry.invoke("prompt", models=["fast"], deadline=time.monotonic())
+    assert model.calls == 0
+
+
+def test_invoke_answers_within_the_deadline():
+    registry = _registry(fast=FakeChatModel(responses=["resposta"]))
+
+    response, route = registry.invoke("prompt", models=["fast"], deadline=time.monotonic() + 5)
+
+    assert (response.content, route) == ("resposta", "fast")
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_only_after_consecutive_failures_and_reports_state():
+    clock = _Clock()
+    failing = FakeChatModel(failures=1.0)
+    backup = FakeChatModel(responses=["reserva"])
+    registry = LLMClientRegistry(factory=lambda model, *args: {'main': failing, 'backup': backup}[model],
+                                 failure_threshold=3, cooldown=60, attempt_timeout=0, clock=clock)
+
+    for expected_failures in (1, 2):
+        registry.invoke("prompt", models=["main", "backup"])
+        assert registry.breaker_state("main") == {
+            'state': 'closed', 'consecutive_failures': expected_failures, 'retry_in': 0.0}
+
+    registry.invoke("prompt", models=["main", "backup"])
+    assert registry.breaker_state("main")['state'] == 'open'
+    assert registry.breaker_state("main")['retry_in'] == 60
+
+    # Com o circuito aberto o modelo é pulado, sem nova chamada
+    registry.invoke("prompt", models=["main", "backup"])
+    assert failing.calls == 3
+
+    clock.now = 45
+    assert registry.breaker_state("main")['retry_in'] == 15
+    clock.now = 60
+    assert registry.breaker_state("main")['state'] == 'half_open'
+    assert registry.breaker_state("unused") is None
+
+
+def test_breaker_defaults_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("LLM_BREAKER_THRESHOLD", "5")
+    monkeypatch.setenv("LLM_BREAKER_COOLDOWN", "12")
+
+    registry = LLMClientRegistry(factory=lambda *args: FakeChatModel())
+
+    assert (registry.failure_threshold, registry.cooldown) == (5, 12.0)
+
+
+def test_breaker_defaults_tolerate_an_isolated_failure(monkeypatch):
+    monkeypatch.delenv("LLM_BREAKER_THRESHOLD", raising=False)
+    monkeypatch.delenv("LLM_BREAKER_COOLDOWN", raising=False)
+
+    registry = LLMClientRegistry(factory=lambda *args: FakeChatModel())
+
+    assert registry.failure_threshold >= 3
+    assert registry.cooldown < 300
+
+
+def test_attempt_timeout_is_opt_in(monkeypatch):
+    monkeypatch.delenv("LLM_ATTEMPT_TIMEOUT", raising=False)
+    model = FakeChatModel(responses=["resposta longa"], latency=0.3)
+    registry = LLMClientRegistry(factory=lambda *args: model)
+
+    response, _ = registry.invoke("prompt", models=["lento"], max_output_tokens=2500)
+
+    assert registry.attempt_timeout == 0
+    assert response.content == "resposta longa"
+    assert registry.breaker_state("lento")['consecutive_failures'] == 0
+
+
+def test_hedge_wins_when_the_primary_is_slow_without_failing_the_primary():
+    slow = FakeChatModel(responses=["primária"], latency=1.0)
+    backup = FakeChatModel(responses=["reserva"])
+    registry = _registry(slow=slow, backup=backup)
+
+    started = time.monotonic()
+    response, route = registry.invoke("prompt", models=["slow", "backup"], hedge_after=0.1)
+
+    assert (response.content, route) == ("reserva", "backup")
+    assert time.monotonic() - started < 0.5
+    report = registry.report()
+    assert (report['hedges'], report['hedge_wins']) == (1, 1)
+    assert report['routes']['backup']['wins'] == 1
+    # A primária abandonada não conta como falha nem abre o circuito
+    assert report['routes']['slow']['failures'] == 0
+    assert registry.breaker_state("slow") == {'state': 'closed', 'consecutive_failures': 0, 'retry_in': 0.0}
+    assert (slow.calls, backup.calls) == (1, 1)
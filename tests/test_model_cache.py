@@ -0,0 +1,73 @@
+"""
+Testes do cache do modelo de explicabilidade (src/analysis/model_cache.py).
+"""
+
+import os
+
+from src.analysis.analysis import calculate_all_indicators, analyze_market
+from src.analysis.model_cache import ExplainabilityModelCache
+from src.data.synthetic import generate_ohlc
+
+
+def test_growing_history_warm_starts_single_entry(tmp_path):
+    cache = ExplainabilityModelCache(cache_dir=str(tmp_path), warm_trees=5)
+    df = calculate_all_indicators(generate_ohlc(500, seed=3))
+
+    first = cache.feature_importance(df.iloc[:400], pair='BRL/USD')
+    assert first and cache.report()['last_mode'] == 'cold'
+
+    assert cache.feature_importance(df.iloc[:400], pair='BRL/USD') == first
+    assert cache.report()['last_mode'] == 'hit'
+
+    cache.feature_importance(df, pair='BRL/USD')
+    assert cache.report()['last_mode'] == 'warm'
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def _live(window, drift):
+    """Janela como a de main.py: o último candle ainda em formação, com preço provisório."""
+    window = window.copy()
+    window.loc[window.index[-1], 'Close'] *= 1 + drift
+    return window
+
+
+def test_rolling_window_warm_starts_next_day(tmp_path):
+    cache = ExplainabilityModelCache(cache_dir=str(tmp_path), warm_trees=5)
+    raw = generate_ohlc(1400, seed=3)
+
+    # Dia 1, duas execuções: só o preço do candle em formação muda
+    analyze_market(_live(raw.iloc[:1300], 0.001), model_cache=cache, pair='BRL/USD')
+    assert cache.report()['last_mode'] == 'cold'
+    analyze_market(_live(raw.iloc[:1300], -0.002), model_cache=cache, pair='BRL/USD')
+    assert cache.report()['last_mode'] == 'hit'
+
+    # Dia 2: a janela de 5 anos perdeu o candle mais antigo, fechou o de ontem e abriu um novo
+    analyze_market(_live(raw.iloc[1:1301], 0.001), model_cache=cache, pair='BRL/USD')
+    assert cache.report()['last_mode'] == 'warm'
+    assert cache.report()['warm_starts'] == 1
+
+    analyze_market(_live(raw.iloc[:1300], 0.0), model_cache=cache, pair='EUR/BRL')
+    assert sorted(name.split('_')[0] for name in os.listdir(tmp_path)) == ['BRL', 'EUR']
+
+
+def test_revised_history_refits_from_scratch(tmp_path):
+    cache = ExplainabilityModelCache(cache_dir=str(tmp_path), warm_trees=5)
+    raw = generate_ohlc(1400, seed=3)
+    cache.feature_importance(calculate_all_indicators(raw.iloc[:1300]), pair='BRL/USD')
+
+    revised = raw.iloc[1:1301].copy()
+    revised.loc[revised.index[600], 'Close'] *= 1.01
+    cache.feature_importance(calculate_all_indicators(revised), pair='BRL/USD')
+
+    assert cache.report()['last_mode'] == 'cold'
+
+
+def test_superseded_entries_are_evicted(tmp_path):
+    cache = ExplainabilityModelCache(cache_dir=str(tmp_path))
+    df = calculate_all_indicators(generate_ohlc(400, seed=3))
+
+    cache.feature_importance(df, pair='BRL/USD')
+    cache.feature_importance(df.drop(columns=['MACD']), pair='BRL/USD')
+
+    assert len(os.listdir(tmp_path)) == 1
+    assert cache.report()['evictions'] == 1
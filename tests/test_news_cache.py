@@ -0,0 +1,120 @@
+"""
+Testes do cache de notícias (src/news/news_cache.py) com relógio simulado e busca falsa.
+"""
+
+import threading
+
+import pytest
+
+from src.news.news_cache import NewsCache
+
+OLD = [{'title': 'Notícia antiga'}]
+NEW = [{'title': 'Notícia nova'}]
+FALLBACK = [{'title': 'Contexto genérico', 'fallback': True}]
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _Fetch:
+    """Busca falsa que conta as chamadas; com gate, espera a liberação antes de responder."""
+
+    def __init__(self, result, gate=None):
+        self.result = result
+        self.gate = gate
+        self.calls = 0
+        self.entered = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+
+def _not_fallback(news):
+    """Mesmo critério de fetch_news_with_llm: o fallback genérico não é gravado."""
+    return bool(news) and not any(item.get('fallback') for item in news)
+
+
+@pytest.fixture
+def clock():
+    return _Clock()
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = NewsCache(cache_dir=str(tmp_path), ttl=100, stale_ttl=1000, clock=clock)
+    cache.get('BRL/USD', 7, 'gemini', _Fetch(OLD), cacheable=_not_fallback)
+    return cache
+
+
+def _get(cache, fetch):
+    return cache.get('BRL/USD', 7, 'gemini', fetch, cacheable=_not_fallback)
+
+
+def test_fresh_entry_is_a_hit_without_fetching(cache, clock):
+    clock.now += 40
+    fetch = _Fetch(NEW)
+
+    assert _get(cache, fetch) == OLD
+    assert fetch.calls == 0
+    report = cache.report()
+    assert (report['hits'], report['misses'], report['stale_hits']) == (1, 1, 0)
+    assert (report['last_mode'], report['last_age_seconds']) == ('hit', 40)
+
+
+def test_stale_entry_is_served_at_once_and_refreshed_exactly_once(cache, clock):
+    clock.now += 150
+    gate = threading.Event()
+    fetch = _Fetch(NEW, gate=gate)
+
+    # Enquanto a atualização não termina, as leituras seguem servindo a entrada vencida
+    assert [_get(cache, fetch) for _ in range(3)] == [OLD] * 3
+    assert fetch.entered.wait(5)
+    gate.set()
+    assert cache.wait(timeout=5)
+
+    assert fetch.calls == 1
+    report = cache.report()
+    assert (report['stale_hits'], report['refreshes'], report['refresh_failures']) == (3, 1, 0)
+    assert (report['last_mode'], report['last_age_seconds']) == ('stale', 150)
+
+    # A entrada nova vale a partir do horário da atualização
+    assert _get(cache, _Fetch(NEW)) == NEW
+    assert cache.report()['last_age_seconds'] == 0
+
+
+@pytest.mark.parametrize('result', [RuntimeError("LLM indisponível"), FALLBACK, []])
+def test_failed_or_fallback_refresh_keeps_the_cached_entry(cache, clock, result):
+    clock.now += 150
+    fetch = _Fetch(result)
+
+    assert _get(cache, fetch) == OLD
+    assert cache.wait(timeout=5)
+
+    assert fetch.calls == 1
+    report = cache.report()
+    assert (report['refreshes'], report['refresh_failures']) == (0, 1)
+    assert cache.age('BRL/USD', 7, 'gemini') == 150
+    assert _get(cache, _Fetch(NEW)) == OLD
+    assert cache.wait(timeout=5)
+
+
+def test_entry_past_the_stale_window_is_fetched_synchronously(cache, clock):
+    clock.now += 100 + 1000
+    fetch = _Fetch(NEW)
+
+    assert _get(cache, fetch) == NEW
+    assert fetch.calls == 1
+    report = cache.report()
+    assert (report['misses'], report['last_mode'], report['last_age_seconds']) == (2, 'miss', 1100)
+    assert cache.age('BRL/USD', 7, 'gemini') == 0
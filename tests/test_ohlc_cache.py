@@ -0,0 +1,110 @@
+"""
+Testes do cache local de candles (src/data/ohlc_cache.py).
+"""
+
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from src.data.ohlc_cache import OHLCCache
+from src.data.synthetic import generate_ohlc
+
+BARS = generate_ohlc(24 * 120, freq='h', start='2024-01-01')
+
+
+def _aware(moment):
+    """Data sem fuso como hora local (a convenção do yfinance e de datetime.now())."""
+    return pd.Timestamp(moment.astimezone())
+
+
+def _bars(start, end):
+    return BARS[(BARS['Date'] >= _aware(start)) & (BARS['Date'] < _aware(end))].reset_index(drop=True)
+
+
+def _source(history_days=None):
+    """Fonte com os candles de BARS; com history_days, só serve os últimos dias antes do fim pedido."""
+    calls = []
+
+    def fetch(start, end):
+        calls.append((start, end))
+        if history_days is not None:
+            start = max(start, end - timedelta(days=history_days))
+        return _bars(start, end)
+
+    return fetch, calls
+
+
+@pytest.fixture(params=['UTC', 'America/Sao_Paulo'])
+def local_tz(request, monkeypatch):
+    monkeypatch.setenv('TZ', request.param)
+    time.tzset()
+    yield request.param
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_incremental_fetch_starts_at_last_saved_bar(tmp_path, local_tz):
+    cache = OHLCCache(cache_dir=str(tmp_path))
+    fetch, calls = _source()
+    start = datetime(2024, 1, 1)
+
+    first = cache.load('BRL=X', '1h', start, datetime(2024, 2, 1), fetch)
+    second = cache.load('BRL=X', '1h', start, datetime(2024, 2, 10), fetch)
+
+    assert cache.report()['last_mode'] == 'hit'
+    # Início incremental na mesma convenção do fim pedido (hora local sem fuso)
+    assert calls[-1][0].tzinfo is None
+    assert _aware(calls[-1][0]) == first['Date'].iloc[-1]
+    pd.testing.assert_frame_equal(second, _bars(start, datetime(2024, 2, 10)), check_dtype=False)
+
+
+def test_stored_history_follows_the_longest_lookback_requested(tmp_path):
+    cache = OHLCCache(cache_dir=str(tmp_path))
+    fetch, _ = _source()
+    path = cache._path('BRL=X', '1h')
+
+    def stored_start():
+        return cache._load(path)['df']['Date'].iloc[0]
+
+    # Janela móvel de 31 dias: o que sai da janela deixa o arquivo
+    cache.load('BRL=X', '1h', datetime(2024, 1, 1), datetime(2024, 2, 1), fetch)
+    df = cache.load('BRL=X', '1h', datetime(2024, 1, 11), datetime(2024, 2, 11), fetch)
+    assert cache.report()['last_mode'] == 'hit'
+    assert stored_start() == df['Date'].iloc[0] == _aware(datetime(2024, 1, 11))
+
+    # Um pedido de 41 dias passa a valer para o corte, mesmo nas janelas de 31 dias seguintes
+    cache.load('BRL=X', '1h', datetime(2024, 1, 1), datetime(2024, 2, 11), fetch)
+    df = cache.load('BRL=X', '1h', datetime(2024, 1, 12), datetime(2024, 2, 12), fetch)
+    assert cache.report()['last_mode'] == 'hit'
+    assert stored_start() == _aware(datetime(2024, 1, 2))
+    pd.testing.assert_frame_equal(df, _bars(datetime(2024, 1, 12), datetime(2024, 2, 12)), check_dtype=False)
+
+
+def test_cache_older_than_provider_limit_is_refetched(tmp_path):
+    cache = OHLCCache(cache_dir=str(tmp_path))
+    fetch, calls = _source(history_days=30)
+    start = datetime(2024, 1, 1)
+
+    cache.load('BRL=X', '1h', start, datetime(2024, 1, 20), fetch, history_limit=timedelta(days=30))
+    # O último candle salvo (19/01) está fora dos 30 dias servidos a partir de 30/03
+    df = cache.load('BRL=X', '1h', start, datetime(2024, 3, 30), fetch, history_limit=timedelta(days=30))
+
+    assert cache.report()['gaps'] == 1
+    assert cache.report()['last_mode'] == 'miss'
+    assert calls[-1] == (start, datetime(2024, 3, 30))
+    assert df['Date'].diff().iloc[1:].max() == pd.Timedelta(hours=1)
+
+
+def test_cache_within_provider_limit_stays_incremental(tmp_path):
+    cache = OHLCCache(cache_dir=str(tmp_path))
+    fetch, _ = _source(history_days=30)
+    start = datetime(2024, 3, 1)
+
+    cache.load('BRL=X', '1h', start, datetime(2024, 3, 20), fetch, history_limit=timedelta(days=30))
+    df = cache.load('BRL=X', '1h', start, datetime(2024, 3, 30), fetch, history_limit=timedelta(days=30))
+
+    assert cache.report()['gaps'] == 0
+    assert cache.report()['last_mode'] == 'hit'
+    assert df['Date'].diff().iloc[1:].max() == pd.Timedelta(hours=1)
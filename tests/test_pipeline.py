@@ -0,0 +1,79 @@
+import time
+import threading
+
+import pytest
+
+pytest.importorskip('dotenv')
+pytest.importorskip('yfinance')
+
+import main
+
+
+def test_news_timeout_is_passed_to_the_llm_call_as_deadline(monkeypatch):
+    seen = {}
+    released = threading.Event()
+
+    def slow_news(currency_pair, days, llm_provider, cache, deadline):
+        seen['deadline'] = deadline
+        released.wait(1)
+        return [{'title': 'atrasada'}]
+
+    monkeypatch.setattr(main, 'fetch_news_with_llm', slow_news)
+    monkeypatch.setattr(main, '_market_stage', lambda cancel: ('dados', 'analise'))
+
+    started = time.monotonic()
+    _, _, news_list, _ = main.run_stages('gemini', None, news_timeout=0.1)
+    released.set()
+
+    assert started < seen['deadline'] <= started + 0.2
+    assert all(item.get('fallback') for item in news_list)
+
+
+def test_market_failure_cancels_news_stage_that_has_not_started(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, 'fetch_news_with_llm', lambda *args, **kwargs: calls.append(kwargs) or [])
+
+    def failing_market(cancel):
+        raise RuntimeError("falha na análise")
+
+    # A etapa de notícias só começa depois que a análise já falhou
+    start_stage = main._start_stage
+
+    def delayed_start(name, stage, timings, *args):
+        if name == 'news':
+            def delayed(*stage_args):
+                time.sleep(0.1)
+                return stage(*stage_args)
+            return start_stage(name, delayed, timings, *args)
+        return start_stage(name, stage, timings, *args)
+
+    monkeypatch.setattr(main, '_market_stage', failing_market)
+    monkeypatch.setattr(main, '_start_stage', delayed_start)
+
+    with pytest.raises(RuntimeError):
+        main.run_stages('gemini', None)
+    time.sleep(0.3)
+
+    assert calls == []
+
+
+def test_replay_source_runs_the_analysis_on_every_replayed_bar(monkeypatch):
+    monkeypatch.setenv("FOREX_DATA_SOURCE", "replay")
+    monkeypatch.setenv("FOREX_REPLAY_PATH", "synthetic")
+    monkeypatch.setenv("FOREX_REPLAY_PAIRS", "BRL=X,EURBRL=X")
+    monkeypatch.setenv("FOREX_REPLAY_SPEED", "0")
+    monkeypatch.setenv("FOREX_REPLAY_EVENTS", "6")
+    calls = []
+
+    def fake_analyze(forex_data, model_cache, pair):
+        calls.append((pair, len(forex_data)))
+        return {'pair': pair, 'bars': len(forex_data)}
+
+    monkeypatch.setattr(main, '_analyze', fake_analyze)
+
+    forex_data, analysis = main._market_stage(threading.Event())
+
+    # Um só feed: pares intercalados, histórico crescendo um candle por evento
+    assert calls == [(pair, 300 + i) for i in range(1, 4) for pair in ('BRL=X', 'EURBRL=X')]
+    assert len(forex_data) == 303
+    assert analysis == {'pair': 'BRL=X', 'bars': 303}
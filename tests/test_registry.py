@@ -0,0 +1,94 @@
+"""
+Testes do registro de indicadores (src/analysis/registry.py).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.analysis import registry
+from src.analysis.analysis import (
+    ALL_INDICATORS,
+    analysis_columns,
+    analyze_market,
+    calculate_all_indicators,
+    calculate_indicators,
+)
+from src.analysis.registry import IndicatorRegistry, default_registry
+
+
+@pytest.fixture
+def kernel_windows(monkeypatch):
+    """Janelas passadas ao kernel de momentos em cada chamada."""
+    calls = []
+    original = registry.rolling_moments
+
+    def spy(values, windows, **kwargs):
+        calls.append(list(windows))
+        return original(values, windows, **kwargs)
+
+    monkeypatch.setattr(registry, 'rolling_moments', spy)
+    return calls
+
+
+@pytest.mark.parametrize('names, windows', [
+    (['SMA_20'], [20]),
+    (['SMA_50'], [50]),
+    (['BB_Width', 'SMA_200'], [20, 200]),
+    (['RSI', 'MACD'], None),
+])
+def test_kernel_windows_follow_request(ohlc, kernel_windows, names, windows):
+    default_registry.compute(ohlc, names)
+    assert kernel_windows == ([windows] if windows else [])
+
+
+def test_registry_matches_calculate_all_indicators(ohlc):
+    full = calculate_all_indicators(ohlc)
+    for columns in (['SMA_20', 'BB_Position'], analysis_columns('rules'), analysis_columns('model')):
+        partial = calculate_indicators(ohlc, columns)
+        assert list(partial.columns) == list(ohlc.columns) + [c for c in columns if c not in ohlc.columns]
+        pd.testing.assert_frame_equal(partial, full[partial.columns])
+
+
+def test_analyze_market_computes_only_requested_indicators(ohlc):
+    rules = analyze_market(ohlc, explain_mode='rules', indicators=[])
+    assert 'SMA_200' not in rules['latest_data'] and 'MACD' not in rules['latest_data']
+
+    extra = analyze_market(ohlc, explain_mode='rules', indicators=['SMA_200', 'Support'])
+    full = calculate_all_indicators(ohlc).iloc[-1]
+    assert extra['latest_data']['SMA_200'] == full['SMA_200']
+    assert extra['classification'] == rules['classification']
+    assert extra['indicators_summary'] == rules['indicators_summary']
+
+
+def test_analyze_market_keeps_full_latest_data_by_default(ohlc):
+    full = calculate_all_indicators(ohlc).iloc[-1].to_dict()
+
+    for compact in (False, True):
+        latest = analyze_market(ohlc, explain_mode='rules', compact=compact)['latest_data']
+        assert set(ALL_INDICATORS) <= set(latest)
+        for column in ALL_INDICATORS:
+            assert latest[column] == pytest.approx(full[column], rel=1e-6, nan_ok=True), (compact, column)
+
+    latest = analyze_market(ohlc, explain_mode='rules')['latest_data']
+    assert latest.keys() == full.keys()
+    pd.testing.assert_series_equal(pd.Series(latest), pd.Series(full))
+
+
+def test_demand_reaches_only_declared_dependency():
+    reg = IndicatorRegistry()
+    reg.register('Base', ['x'], lambda x, demand=(): x * len(demand))
+    reg.register('A', ['Base'], lambda base: base + 1, demand={'Base': 'a'})
+    reg.register('B', ['Base'], lambda base: base + 2, demand={'Base': 'b'})
+
+    df = pd.DataFrame({'x': np.arange(3.0)})
+    assert reg.compute(df, ['A'])['A'].tolist() == [1.0, 2.0, 3.0]
+    assert reg.compute(df, ['A', 'B'])['B'].tolist() == [2.0, 4.0, 6.0]
+
+
+def test_circular_dependency_raises():
+    reg = IndicatorRegistry()
+    reg.register('A', ['B'], lambda b: b)
+    reg.register('B', ['A'], lambda a: a)
+    with pytest.raises(ValueError):
+        reg.resolve(['A'])
@@ -0,0 +1,109 @@
+"""
+Testes do feed de candles reproduzidos (src/data/replay.py) com relógio simulado.
+"""
+
+import pandas as pd
+import pytest
+
+from src.data.replay import ReplayFeed, run_load_test
+from src.data.synthetic import generate_ohlc
+
+
+class _Clock:
+    """Relógio simulado: sleep avança o tempo na hora, sem esperar."""
+
+    def __init__(self, now=100.0):
+        self.now = now
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _feed(recordings, clock, **kwargs):
+    kwargs.setdefault('warmup_bars', 5)
+    return ReplayFeed(recordings, clock=clock, sleep=clock.sleep, **kwargs)
+
+
+def _offsets(feed, clock):
+    start = clock.now
+    return [event['released'] - start for event in feed.events()]
+
+
+def test_steady_mode_releases_each_bar_at_its_own_time():
+    clock = _Clock()
+    # Candles diários a 86400x: um candle por segundo
+    feed = _feed({'BRL=X': generate_ohlc(12, freq='D')}, clock, speed=86400)
+
+    assert _offsets(feed, clock) == [0, 1, 2, 3, 4, 5, 6]
+    assert clock.sleeps == [1] * 6
+
+
+def test_bursty_mode_releases_each_burst_at_its_last_bar():
+    clock = _Clock()
+    feed = _feed({'BRL=X': generate_ohlc(12, freq='D')}, clock, speed=86400, mode='bursty', burst_size=3)
+
+    assert _offsets(feed, clock) == [2, 2, 2, 5, 5, 5, 6]
+    assert clock.sleeps == [2, 3, 1]
+
+
+def test_without_speed_bars_are_released_immediately():
+    clock = _Clock()
+    feed = _feed({'BRL=X': generate_ohlc(12, freq='D')}, clock, speed=None)
+
+    assert _offsets(feed, clock) == [0] * 7
+    assert clock.sleeps == []
+
+
+def test_pairs_are_interleaved_by_date():
+    clock = _Clock()
+    hourly = generate_ohlc(8, freq='h', start='2024-01-01 00:00')
+    shifted = generate_ohlc(8, freq='h', start='2024-01-01 00:30', seed=1)
+    same_dates = generate_ohlc(8, freq='h', start='2024-01-01 00:00', seed=2)
+    feed = _feed({'A': hourly, 'B': shifted, 'C': same_dates}, clock, speed=None)
+
+    events = list(feed.events())
+
+    # Mesma data: a ordem da gravação desempata (A antes de C)
+    assert [event['pair'] for event in events] == ['A', 'C', 'B'] * 3
+    assert [event['sequence'] for event in events] == list(range(9))
+    dates = [event['date'] for event in events]
+    assert dates == sorted(dates)
+    assert feed.pairs == ['A', 'B', 'C']
+
+
+def test_history_grows_by_one_bar_per_event():
+    clock = _Clock()
+    recordings = {'A': generate_ohlc(10, freq='h'), 'B': generate_ohlc(10, freq='h', seed=1)}
+    feed = _feed(recordings, clock, speed=None)
+    assert {pair: len(feed.history(pair)) for pair in feed.pairs} == {'A': 5, 'B': 5}
+
+    for event in feed.events():
+        history = feed.history(event['pair'])
+        row = len(history) - 1
+        assert history['Date'].iloc[-1] == event['date']
+        pd.testing.assert_frame_equal(history, recordings[event['pair']].iloc[:row + 1])
+
+    assert {pair: len(feed.history(pair)) for pair in feed.pairs} == {'A': 10, 'B': 10}
+
+
+def test_load_test_measures_latency_on_the_feed_clock():
+    clock = _Clock()
+    feed = _feed({'BRL=X': generate_ohlc(10, freq='D')}, clock, speed=86400)
+
+    def handler(pair, history):
+        # 1,5s por candle com chegadas a cada 1s: a fila cresce 0,5s por candle
+        clock.now += 1.5
+        return {'analysis': 1.5}
+
+    result = run_load_test(feed, handler)
+
+    assert result['events'] == 5
+    assert result['arrival_rate'] == pytest.approx(1.0)
+    assert result['latency']['max'] == pytest.approx(1.5 + 0.5 * 4)
+    assert result['latency']['mean'] == pytest.approx(2.5)
+    assert result['stages']['analysis']['p50'] == pytest.approx(1.5)
@@ -0,0 +1,91 @@
+"""
+Testes da validação de candles (validate_ohlc e validate_data em src/data/forex-scrapping.py).
+"""
+
+import os
+import importlib.util
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data.synthetic import generate_ohlc
+
+pytest.importorskip('yfinance')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PRICES = ['Open', 'High', 'Low', 'Close']
+SPIKE, BROKEN, MISSING, LATE_SPIKE = 400, 450, 300, 520
+
+
+@pytest.fixture(scope='module')
+def forex():
+    spec = importlib.util.spec_from_file_location(
+        "forex_scrapping", os.path.join(ROOT, "src", "data", "forex-scrapping.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def bars():
+    """600 candles com um pico em Close, um candle com High < Low e um NaN."""
+    df = generate_ohlc(600, seed=5)
+    for row in (SPIKE, LATE_SPIKE):
+        df.loc[row, 'Close'] *= 1.5
+        df.loc[row, 'High'] = df.loc[row, 'Close']
+    df.loc[BROKEN, ['High', 'Low']] = df.loc[BROKEN, ['Low', 'High']].to_numpy()
+    df.loc[MISSING, 'Open'] = np.nan
+    return df
+
+
+def _old_validate_data(df):
+    """Comportamento de validate_data antes de validate_ohlc: remove NaN e OHLC inválido e ordena."""
+    df = df.dropna(subset=PRICES)
+    invalid = ((df['High'] < df['Low']) | (df['High'] < df['Open']) | (df['High'] < df['Close']) |
+               (df['Low'] > df['Open']) | (df['Low'] > df['Close']))
+    return df[~invalid].sort_values('Date').reset_index(drop=True)
+
+
+def test_spike_is_flagged_and_broken_rows_are_dropped(forex, bars):
+    clean, report = forex.validate_ohlc(bars)
+
+    assert report['counts']['nan'] == 1
+    assert report['counts']['invalid_ohlc'] == 1
+    assert report['dropped'].to_dict('list') == {
+        'Date': [bars['Date'][MISSING], bars['Date'][BROKEN]],
+        'reason': ['nan', 'invalid_ohlc'],
+    }
+    assert (report['n_rows'], report['n_valid']) == (600, 598)
+
+    spike = report['outliers'][report['outliers']['Date'] == bars['Date'][SPIKE]]
+    assert 'Close' in set(spike['column'])
+    close = spike[spike['column'] == 'Close'].iloc[0]
+    assert close['value'] == bars['Close'][SPIKE]
+    assert close['expected'] == pytest.approx(bars['Close'][SPIKE] / 1.5, rel=0.05)
+    assert close['score'] > forex.OUTLIER_THRESHOLD
+    # Outliers são marcados, não removidos
+    assert bars['Date'][SPIKE] in set(clean['Date'])
+
+
+@pytest.mark.parametrize('split', [200, 410, 500])
+def test_validating_the_tail_with_history_matches_the_whole_frame(forex, bars, split):
+    whole, whole_report = forex.validate_ohlc(bars)
+    history, _ = forex.validate_ohlc(bars.iloc[:split])
+
+    tail, tail_report = forex.validate_ohlc(bars.iloc[split:], history=history)
+
+    cut = bars['Date'][split]
+    pd.testing.assert_frame_equal(tail, whole[whole['Date'] >= cut].reset_index(drop=True))
+    expected = whole_report['outliers'][whole_report['outliers']['Date'] >= cut].reset_index(drop=True)
+    pd.testing.assert_frame_equal(tail_report['outliers'], expected)
+    assert len(tail_report['outliers']) > 0
+
+
+def test_validate_data_keeps_the_old_behaviour(forex, bars):
+    shuffled = bars.sample(frac=1, random_state=0)
+
+    pd.testing.assert_frame_equal(forex.validate_data(shuffled), _old_validate_data(shuffled))
+    pd.testing.assert_frame_equal(forex.validate_data(bars), _old_validate_data(bars))